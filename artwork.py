@@ -0,0 +1,198 @@
+# artwork.py
+"""Poster artwork from the playlist's tvg-logo URLs.
+
+Each distinct logo URL is downloaded once, concurrently over pooled
+keep-alive connections. Images are stored in a content-addressed cache
+(named by their SHA-256), so one image shared by thousands of entries is
+stored once. They are then hardlinked, or copied where hardlinks are not
+possible, into the movie and show directories. Later runs revalidate with
+ETag/Last-Modified, so an unchanged logo costs a 304 and no body.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Dict, Iterable, Optional
+from urllib.parse import urljoin
+
+import httppool
+
+_MAX_REDIRECTS: int = 3
+
+
+class ArtworkCache:
+    """Content-addressed image store plus a URL index with validators."""
+
+    def __init__(self, cache_dir: str, index_suffix: str = "") -> None:
+        """Initializes ArtworkCache object.
+
+        Args:
+            index_suffix: Added to the index file name, so sharded runs keep
+                one index each while sharing the image store.
+        """
+        self.cache_dir: str = cache_dir
+        self.index_path: str = os.path.join(cache_dir, f"index{index_suffix}.json")
+        self.index: Dict[str, dict] = {}  # url -> {"sha256", "etag", "last_modified", "checked_at"}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def blobPath(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "objects", digest[:2], digest)
+
+    def lookup(self, url: str) -> Optional[str]:
+        """Returns the cached image for a URL, if there is one on disk."""
+        entry: Optional[dict] = self.index.get(url)
+        if entry and os.path.exists(self.blobPath(entry["sha256"])):
+            return self.blobPath(entry["sha256"])
+        return None
+
+    def store(self, url: str, body: bytes, headers: Dict[str, str]) -> str:
+        """Adds an image and records its validators; identical images share one file."""
+        digest: str = hashlib.sha256(body).hexdigest()
+        path: str = self.blobPath(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path: str = f"{path}.{uuid.uuid4().hex[:8]}.tmp"  # Unique: other workers may store the same image
+            with open(temp_path, "wb") as f:
+                f.write(body)
+            os.replace(temp_path, path)
+        self.index[url] = {
+            "sha256": digest,
+            "etag": headers.get("etag", ""),
+            "last_modified": headers.get("last-modified", ""),
+            "checked_at": time.time(),
+        }
+        return path
+
+    def place(self, image: str, destination: str) -> bool:
+        """Puts a cached image at destination as a hardlink, or a copy if linking fails.
+
+        An existing file is only replaced if its content is itself in the
+        cache (an older logo placed by a previous run); artwork added by
+        hand or by the media server is left alone.
+
+        Returns:
+            bool: True if the file was created or replaced.
+        """
+        if os.path.exists(destination):
+            if os.path.samefile(image, destination):
+                return False
+            with open(destination, "rb") as f:
+                digest: str = hashlib.sha256(f.read()).hexdigest()
+            if digest == os.path.basename(image) or not os.path.exists(self.blobPath(digest)):
+                return False  # Same image already copied, or not ours to replace
+            os.remove(destination)
+        try:
+            os.link(image, destination)
+        except OSError:  # Other filesystem, or no hardlink support
+            shutil.copyfile(image, destination)
+        return True
+
+    def save(self) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path: str = f"{self.index_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(temp_path, self.index_path)
+
+
+class ArtworkFetcher:
+    """Downloads logo URLs into an ArtworkCache."""
+
+    def __init__(
+        self,
+        cache: ArtworkCache,
+        per_host: int = 4,
+        concurrency: int = 16,
+        timeout: float = 20.0,
+        revalidate_after: float = 86400.0,
+        max_bytes: int = 10 * 1024 * 1024,
+    ) -> None:
+        """Initializes ArtworkFetcher object.
+
+        Args:
+            per_host: Concurrent downloads (and pooled connections) per host.
+            concurrency: Downloads in flight across all hosts.
+            revalidate_after: Seconds before a cached image is checked again.
+            max_bytes: Larger images are skipped.
+        """
+        self.cache: ArtworkCache = cache
+        self.per_host: int = per_host
+        self.concurrency: int = max(1, concurrency)
+        self.timeout: float = timeout
+        self.revalidate_after: float = revalidate_after
+        self.max_bytes: int = max_bytes
+        self.stats: Dict[str, int] = {"downloaded": 0, "revalidated": 0, "fresh": 0, "failed": 0}
+
+    @classmethod
+    def from_config(cls, config, default_cache_dir: str, index_suffix: str = "") -> "ArtworkFetcher":
+        """Builds a fetcher from the ``[artwork]`` section."""
+        return cls(
+            ArtworkCache(config.get("artwork", "cache_dir", fallback=default_cache_dir), index_suffix),
+            per_host=config.getint("artwork", "per_host", fallback=4),
+            concurrency=config.getint("artwork", "concurrency", fallback=16),
+            timeout=config.getfloat("artwork", "timeout", fallback=20.0),
+            revalidate_after=config.getfloat("artwork", "revalidate_hours", fallback=24.0) * 3600,
+            max_bytes=config.getint("artwork", "max_bytes", fallback=10 * 1024 * 1024),
+        )
+
+    def run(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Fetches URLs from synchronous code and saves the cache index.
+
+        Returns:
+            dict: URL -> cached image path, or None if no image is available.
+        """
+        try:
+            return asyncio.run(self.fetch_all(urls))
+        finally:
+            self.cache.save()
+
+    async def fetch_all(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        pool = httppool.HttpPool(self.per_host, 0.0, self.timeout)
+        try:
+            return dict(await httppool.run_bounded(
+                dict.fromkeys(urls), lambda url: self.fetch(pool, url), self.concurrency
+            ))
+        finally:
+            pool.close()
+
+    async def fetch(self, pool: httppool.HttpPool, url: str) -> Optional[str]:
+        """Returns the cached image for a URL, downloading or revalidating it as needed."""
+        cached: Optional[str] = self.cache.lookup(url)
+        entry: dict = self.cache.index.get(url, {})
+        if cached and time.time() - entry.get("checked_at", 0) < self.revalidate_after:
+            self.stats["fresh"] += 1
+            return cached
+        headers: Dict[str, str] = {}
+        if cached and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if cached and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        current: str = url
+        try:
+            for _ in range(_MAX_REDIRECTS + 1):
+                response: httppool.Response = await pool.request(current, "GET", headers, self.max_bytes)
+                location: Optional[str] = response.headers.get("location")
+                if 300 <= response.status < 400 and response.status != 304 and location:
+                    current = urljoin(current, location)
+                    continue
+                break
+        except httppool.CONNECTION_ERRORS:
+            self.stats["failed"] += 1
+            return cached  # Keep serving the old image while the host is unreachable
+        if response.status == 304 and cached:
+            entry["checked_at"] = time.time()
+            self.stats["revalidated"] += 1
+            return cached
+        if response.status != 200 or not response.body:
+            self.stats["failed"] += 1
+            return cached
+        self.stats["downloaded"] += 1
+        return self.cache.store(url, response.body, response.headers)
+
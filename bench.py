@@ -0,0 +1,1125 @@
+# bench.py
+"""Micro-benchmarks for the converter.
+
+Run ``python bench.py <name>``; each benchmark prints one result line per
+measurement so numbers can be tracked across commits.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+_REPO_DIR: str = os.path.dirname(os.path.abspath(__file__))
+
+_SAMPLE_M3U: str = """#EXTM3U
+#EXTINF:-1 group-title="Movie VOD",HD : The Gentlemen 2020
+http://movies.example/M/1.mkv
+#EXTINF:-1 group-title="TV VOD",HD : Roswell New Mexico S02E02
+http://tv.example/vod/2.mkv
+"""
+
+
+def bench_cold_start(args: argparse.Namespace) -> None:
+    """Measures headless cold start: interpreter launch to first parsed entry."""
+    wall_times: List[float] = []
+    first_entry_times: List[float] = []
+    heavy_imports: set = set()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "m3u"))
+        with open(os.path.join(workdir, "m3u", "bench.m3u"), "w", encoding="utf-8") as f:
+            f.write(_SAMPLE_M3U)
+        with open(os.path.join(workdir, "config.ini"), "w", encoding="utf-8") as f:
+            f.write(
+                "[paths]\n"
+                "input_m3u = m3u/bench.m3u\n"
+                f"output_dir = {os.path.join(workdir, 'streams')}\n"
+                "[settings]\nlog_level = DEBUG\n"
+            )
+        for _ in range(args.runs):
+            start: float = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", os.path.join(_REPO_DIR, "main.py"), "--no-ui"],
+                cwd=workdir,
+                capture_output=True,
+                text=True,
+            )
+            wall_times.append(time.perf_counter() - start)
+            if proc.returncode != 0:
+                sys.exit(proc.stderr)
+            match = re.search(r"Time to first parsed entry: ([0-9.]+)s", proc.stderr)
+            if match:
+                first_entry_times.append(float(match.group(1)))
+            for module in ("PyQt6", "requests", "wget", "ssl", "asyncio", "urllib.request", "sqlite3"):
+                if re.search(rf"\|\s+{module}(\.|$)", proc.stderr, re.MULTILINE):
+                    heavy_imports.add(module)
+    print(f"cold-start wall median: {statistics.median(wall_times) * 1000:.1f} ms over {args.runs} runs")
+    if first_entry_times:
+        print(f"cold-start first entry median: {statistics.median(first_entry_times) * 1000:.1f} ms")
+    print(f"heavy modules imported: {', '.join(sorted(heavy_imports)) or 'none'}")
+    if heavy_imports:
+        sys.exit("the headless path should not import these for a local playlist")
+
+
+def bench_metadata(args: argparse.Namespace) -> None:
+    """Measures metadata index build time and lookup throughput on a synthetic dataset."""
+    import random
+
+    import metadata
+
+    rng = random.Random(42)
+    words: List[str] = [f"word{i}" for i in range(5000)]
+    titles: List[tuple] = []
+    with tempfile.TemporaryDirectory() as workdir:
+        dataset: str = os.path.join(workdir, "title.basics.tsv")
+        with open(dataset, "w", encoding="utf-8") as f:
+            f.write("tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\tstartYear\tendYear\truntimeMinutes\tgenres\n")
+            for i in range(args.rows):
+                title: str = " ".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+                year: int = rng.randint(1920, 2024)
+                kind: str = rng.choice(("movie", "tvSeries", "short"))
+                f.write(f"tt{i:08d}\t{kind}\t{title}\t{title}\t0\t{year}\t\\N\t90\tDrama\n")
+                if i % 10 == 0:
+                    titles.append((title, str(year), "tvshow" if kind == "tvSeries" else "movie"))
+        index_path: str = os.path.join(workdir, "metadata.sqlite")
+        start: float = time.perf_counter()
+        count: int = metadata.build_index(dataset, index_path)
+        build_seconds: float = time.perf_counter() - start
+        print(f"metadata build: {args.rows} rows -> {count} titles in {build_seconds:.2f}s "
+              f"({args.rows / build_seconds:,.0f} rows/s, {os.path.getsize(index_path) / 1e6:.1f} MB)")
+        index = metadata.MetadataIndex(index_path)
+        start = time.perf_counter()
+        hits: int = sum(1 for title, year, kind in titles if index.lookup(title, year, kind))
+        lookup_seconds: float = time.perf_counter() - start
+        index.close()
+        print(f"metadata lookup: {len(titles)} lookups ({hits} hits) at {len(titles) / lookup_seconds:,.0f} lookups/s")
+
+
+# (title, title with its tags stripped), checked before the tags benchmark runs
+_TAG_CASES: List[tuple] = [
+    ("HD : The Gentlemen 2020", "The Gentlemen 2020"),
+    ("|FR| Blindspot S01E03 HD", "|FR| Blindspot S01E03"),  # The language tag keeps both bars
+    ("|FR| Le plan B 1080p x265", "|FR| Le plan B"),
+    ("Some Movie - 1080p - FR", "Some Movie - FR"),
+    # Word tags are title words unless they sit where tags go
+    ("THE FRENCH CONNECTION (1971)", "THE FRENCH CONNECTION (1971)"),
+    ("CHARLOTTE'S WEB 2006", "CHARLOTTE'S WEB 2006"),
+    ("THE GERMAN DOCTOR", "THE GERMAN DOCTOR"),
+    ("SPANISH AFFAIR", "SPANISH AFFAIR"),
+    ("Show S01E01 FRENCH 720p", "Show S01E01"),
+    ("Movie - MULTI - 2019", "Movie - 2019"),
+    # A bar left alone by a removed tag goes with it
+    ("US- ABC 7 (Detroit) | HD", "US- ABC 7 (Detroit)"),
+    ("Movie Title | FHD", "Movie Title"),
+    ("|HD| Movie", "Movie"),
+    ("|FR| HD | Movie", "|FR| Movie"),
+]
+
+
+def bench_tags(args: argparse.Namespace) -> None:
+    """Shows tag-matching cost per title as the tag dictionary grows, against a regex alternation."""
+    import random
+
+    import tagmatcher
+
+    default_matcher = tagmatcher.TagMatcher(dict(tagmatcher.DEFAULT_TAGS))
+    for title, expected in _TAG_CASES:
+        stripped: str = default_matcher.parse(title)[0]
+        assert stripped == expected, f"{title!r} stripped to {stripped!r}, expected {expected!r}"
+    rng = random.Random(42)
+    base_tags: List[str] = list(tagmatcher.DEFAULT_TAGS)
+    titles: List[str] = [
+        f"HD : Some Show Title {i} S01E{i % 20:02d} {' '.join(rng.sample(base_tags, 3))}"
+        for i in range(args.rows // 100)
+    ]
+    for size in (len(base_tags), 500, 5000, 50000):
+        tags: Dict[str, tuple] = dict(tagmatcher.DEFAULT_TAGS)
+        for i in range(size - len(base_tags)):
+            tags[f"Tag{i}x{rng.randint(0, 999)}"] = ("extra", str(i))
+        matcher = tagmatcher.TagMatcher(tags)
+        start: float = time.perf_counter()
+        for title in titles:
+            matcher.parse(title)
+        automaton_us: float = (time.perf_counter() - start) / len(titles) * 1e6
+        line: str = f"tags {len(tags):>6}: automaton {automaton_us:7.1f} us/title"
+        if len(tags) <= 5000:  # Larger alternations take too long to be worth timing
+            pattern = re.compile("|".join(re.escape(tag) for tag in sorted(tags, key=len, reverse=True)), re.IGNORECASE)
+            start = time.perf_counter()
+            for title in titles:
+                pattern.sub("", title)
+            line += f", regex alternation {(time.perf_counter() - start) / len(titles) * 1e6:7.1f} us/title"
+        print(line)
+
+
+def bench_xmltv(args: argparse.Namespace) -> None:
+    """Measures XMLTV filtering throughput and peak memory on a synthetic guide."""
+    import resource
+
+    import live
+
+    channels: int = max(1, args.rows // 100)
+    wanted = {f"channel{i}.example" for i in range(0, channels, 10)}
+    with tempfile.TemporaryDirectory() as workdir:
+        source: str = os.path.join(workdir, "guide.xml")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n<tv>\n')
+            for i in range(channels):
+                f.write(f'  <channel id="channel{i}.example"><display-name>Channel {i}</display-name></channel>\n')
+            for i in range(args.rows):
+                f.write(
+                    f'  <programme start="20240101{i % 24:02d}0000 +0000" channel="channel{i % channels}.example">'
+                    f"<title>Programme {i}</title><desc>{'Lorem ipsum dolor sit amet. ' * 8}</desc></programme>\n"
+                )
+            f.write("</tv>\n")
+        size_mb: float = os.path.getsize(source) / 1e6
+        before_kb: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start: float = time.perf_counter()
+        kept = live.filter_xmltv(source, os.path.join(workdir, "filtered.xml"), wanted)
+        seconds: float = time.perf_counter() - start
+        peak_kb: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"xmltv filter: {size_mb:.1f} MB in {seconds:.2f}s ({size_mb / seconds:.1f} MB/s), "
+          f"kept {kept[0]} channels / {kept[1]} programmes, peak RSS growth {(peak_kb - before_kb) / 1024:.1f} MB")
+
+
+def _start_probe_server(delay: float):
+    """Starts a local stand-in stream host. Paths pick the behaviour:
+
+    ``/ok/*`` 200, ``/dead/*`` 404, ``/nohead/*`` 405 on HEAD and 206 on GET,
+    ``/redirect/*`` 302 to ``/ok/*``, ``/drop/*`` closes without answering.
+    Every response is delayed by `delay` seconds.
+    """
+    import http.server
+    import threading
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive
+
+        def setup(self) -> None:
+            super().setup()
+            self.server.connections += 1
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def answer(self, head_only: bool) -> None:
+            time.sleep(delay)
+            kind: str = self.path.split("/")[1]
+            if kind == "drop":
+                self.close_connection = True
+                return
+            status, body, headers = 200, b"", {}
+            if kind == "dead":
+                status = 404
+            elif kind == "nohead":
+                status, body = (405, b"") if head_only else (206, b"x")
+            elif kind == "redirect":
+                status, headers = 302, {"Location": self.path.replace("/redirect/", "/ok/")}
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head_only:
+                self.wfile.write(body)
+
+        def do_HEAD(self) -> None:
+            self.answer(True)
+
+        def do_GET(self) -> None:
+            self.answer(False)
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _start_artwork_server(images: Dict[str, bytes]):
+    """Starts a local stand-in logo host serving ``images`` (path -> body) with ETags.
+
+    A request whose If-None-Match matches gets a 304; ``server.bodies`` and
+    ``server.not_modified`` count the two kinds of answers. ``images`` may
+    be changed between runs.
+    """
+    import hashlib
+    import http.server
+    import threading
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            body: Optional[bytes] = self.server.images.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            etag: str = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.server.not_modified += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.server.bodies += 1
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.images = images
+    server.bodies = 0
+    server.not_modified = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_artwork(args: argparse.Namespace) -> None:
+    """Places logos for a playlist three times against a stand-in host that supports ETags.
+
+    Run 1 downloads each URL once and hardlinks one stored copy per
+    distinct image into every directory. Run 2 revalidates every URL and
+    gets only 304s. Before run 3 one logo changes: only it is downloaded
+    again and relinked, while artwork placed by hand is left alone.
+    """
+    import configparser
+
+    import logger
+    import streamClasses
+
+    entries: int = max(20, args.rows // 1000)
+    logos: int = 6
+    images: Dict[str, bytes] = {f"/logo/{i}.png": b"PNG" + bytes([i % 3]) * 512 for i in range(logos)}  # 3 images
+    server = _start_artwork_server(images)
+    with tempfile.TemporaryDirectory() as workdir:
+        playlist: str = os.path.join(workdir, "bench.m3u")
+        with open(playlist, "w", encoding="utf-8") as f:
+            f.write("#EXTM3U\n")
+            for i in range(entries):
+                f.write(f'#EXTINF:-1 tvg-logo="http://127.0.0.1:{server.server_port}/logo/{i % logos}.png" '
+                        f'group-title="Movie VOD",Movie {_letters(i)} ({1950 + i % 70})\n'
+                        f"http://movies.example/M/{i}.mkv\n")
+        config = configparser.ConfigParser()
+        config.read_dict({
+            "paths": {"input_m3u": playlist, "output_dir": os.path.join(workdir, "streams")},
+            "artwork": {"enabled": "true", "revalidate_hours": "0"},  # Every run revalidates
+        })
+        movies: str = os.path.join(workdir, "streams", "movies")
+        objects: str = os.path.join(workdir, "streams", ".m3u_to_strm.artwork", "objects")
+
+        def placed() -> Dict[str, int]:
+            """Relative artwork path -> inode."""
+            return {
+                os.path.relpath(os.path.join(directory, name), movies): os.stat(os.path.join(directory, name)).st_ino
+                for directory, _, names in os.walk(movies) for name in names if name.endswith(".jpg")
+            }
+
+        stats: List[Dict[str, int]] = []
+        bodies: List[int] = []
+        first: Dict[str, int] = {}
+        for run in range(3):
+            if run == 2:
+                images["/logo/0.png"] = b"PNG new logo"
+                chosen: str = os.path.join(movies, f"Movie {_letters(1)} - (1951)", "poster.jpg")
+                os.remove(chosen)  # A hardlink: writing through it would change the stored image
+                with open(chosen, "wb") as f:
+                    f.write(b"chosen by hand")
+            before: int = server.bodies
+            start: float = time.perf_counter()
+            converter = streamClasses.rawStreamList(config, logger.LogLevel.WARNING)
+            print(f"artwork run {run + 1}: {converter.artwork.stats} in {time.perf_counter() - start:.2f}s")
+            stats.append(converter.artwork.stats)
+            bodies.append(server.bodies - before)
+            blobs: Dict[int, str] = {
+                os.stat(os.path.join(directory, name)).st_ino: name
+                for directory, _, names in os.walk(objects) for name in names
+            }
+            files: Dict[str, int] = placed()
+            if run == 0:
+                assert stats[0]["downloaded"] == logos and bodies[0] == logos, "a logo URL was downloaded twice"
+                assert len(blobs) == 3, f"{len(blobs)} stored images for 3 distinct ones"
+                assert len(files) == 2 * entries and set(files.values()) <= set(blobs), "artwork was copied, not linked"
+                first = files
+            elif run == 1:
+                assert stats[1]["revalidated"] == logos and bodies[1] == 0, f"unchanged logos sent again: {stats[1]}"
+                assert files == first, "unchanged artwork was replaced"
+            else:
+                assert stats[2]["downloaded"] == 1 and stats[2]["revalidated"] == logos - 1, stats[2]
+                changed: set = {path for path in files if files[path] != first[path]}
+                expected: set = {
+                    os.path.join(f"Movie {_letters(i)} - ({1950 + i % 70})", name)
+                    for i in range(0, entries, logos) for name in ("poster.jpg", "folder.jpg")
+                }
+                assert changed == expected | {os.path.join(f"Movie {_letters(1)} - (1951)", "poster.jpg")}, (
+                    f"relinked {len(changed)} files, expected {len(expected)} plus the hand-placed one"
+                )
+                with open(chosen, "rb") as f:
+                    assert f.read() == b"chosen by hand", "artwork placed by hand was overwritten"
+    server.shutdown()
+    print(f"artwork: {entries} entries, {logos} logo URLs, 3 distinct images; "
+          f"bodies sent per run {bodies}, one stored copy per image, hardlinked")
+
+
+def bench_probe(args: argparse.Namespace) -> None:
+    """Probes URLs on a fast-but-flaky and a slow local stand-in host, then again from the cache."""
+    import probe
+
+    fast = _start_probe_server(0.0)
+    slow = _start_probe_server(0.2)
+    kinds: List[str] = ["ok"] * 6 + ["dead", "nohead", "redirect", "drop"]
+    count: int = max(10, args.rows // 1000)
+    urls: List[str] = [f"http://127.0.0.1:{fast.server_port}/{kinds[i % len(kinds)]}/{i}" for i in range(count)]
+    urls += [f"http://127.0.0.1:{slow.server_port}/ok/{i}" for i in range(count // 10)]
+    with tempfile.TemporaryDirectory() as workdir:
+        cache = probe.ProbeCache(os.path.join(workdir, "probe.json"), ttl=3600)
+        prober = probe.UrlProber(per_host=8, timeout=2.0)
+        start: float = time.perf_counter()
+        results = prober.run(urls)
+        seconds: float = time.perf_counter() - start
+        for url, result in results.items():
+            cache.put(url, result)
+        cache.save()
+        alive: int = sum(result.alive for result in results.values())
+        print(f"probe: {len(urls)} URLs in {seconds:.2f}s ({len(urls) / seconds:,.0f}/s), {alive} alive, "
+              f"{len(urls) - alive} dead; connections opened: fast host {fast.connections}, slow host {slow.connections}")
+        cache = probe.ProbeCache(cache.path, ttl=3600)
+        start = time.perf_counter()
+        pending: List[str] = [url for url in urls if cache.get(url) is None]
+        prober.run(pending)
+        print(f"probe rerun: {len(urls) - len(pending)} from cache, {len(pending)} re-probed "
+              f"in {time.perf_counter() - start:.2f}s")
+    fast.shutdown()
+    slow.shutdown()
+
+
+def _legacy_movie_path(movie, target) -> str:
+    """Movie path building as it was before output templates, kept for comparison."""
+    import tools
+
+    title: str = tools.sanitize_filename(movie.title)
+    year = None
+    if movie.year:
+        year = movie.year if movie.year.startswith("(") else f"({movie.year})"
+    directory: str = f"{title}{' - ' + year if year else ''}"
+    filestring: List[str] = [title]
+    if year:
+        filestring.append(year)
+    if movie.resolution:
+        filestring.append(movie.resolution)
+    return os.path.join(target.output_dir, target.movie_output_dir, directory, f"{' - '.join(filestring)}.strm")
+
+
+def _legacy_episode_path(episode, target) -> str:
+    """Episode path building as it was before output templates, kept for comparison."""
+    import tools
+
+    showtitle: str = tools.sanitize_filename(episode.showtitle)
+    filestring: List[str] = [showtitle]
+    filestring.append(episode.airdate.strip() if episode.airdate else episode.sXXeXX.strip())
+    if episode.episodename:
+        filestring.append(episode.episodename.strip())
+    if episode.language:
+        filestring.append(episode.language.strip())
+    if episode.resolution:
+        filestring.append(episode.resolution.strip())
+    season_dir: str = f"{showtitle} - Season {episode.seasonnumber.strip()}" if episode.seasonnumber else ""
+    return os.path.join(
+        target.output_dir,
+        target.tvshow_output_dir,
+        showtitle,
+        season_dir,
+        f"{' - '.join(filestring).replace(':', '-').replace('*', '_')}.strm",
+    )
+
+
+def bench_paths(args: argparse.Namespace) -> None:
+    """Compares compiled output templates with the legacy path building.
+
+    Both sides construct each entry inside the timed loop, so the cost of
+    building an entry counts too.
+    """
+    import streamClasses
+
+    target = streamClasses.OutputTarget()
+    count: int = args.rows // 10
+
+    def movie(i: int) -> "streamClasses.Movie":
+        return streamClasses.Movie(f"Some Movie: Part {i}", "http://x", year=f"({1950 + i % 70})", resolution="1080p")
+
+    def episode(i: int) -> "streamClasses.TVEpisode":
+        return streamClasses.TVEpisode(
+            f"Some Show {i % 500}", "http://x", seasonnumber=f"{i % 20:02d}", episodenumber=f"{i % 30:02d}",
+            resolution="720p", episodename="An Episode: Title*",
+        )
+
+    for label, make, legacy in (("movies", movie, _legacy_movie_path), ("episodes", episode, _legacy_episode_path)):
+        assert all(make(i).getFilename(target) == legacy(make(i), target) for i in range(1000))
+        timings: Dict[str, float] = {}
+        for name, build in (("legacy", legacy), ("template", lambda item, t: item.getFilename(t))):
+            best: float = float("inf")
+            for _ in range(args.runs):
+                start: float = time.perf_counter()
+                for i in range(count):
+                    build(make(i), target)
+                best = min(best, time.perf_counter() - start)
+            timings[name] = count / best
+        print(f"paths {label} (construct + path): legacy {timings['legacy']:,.0f}/s, "
+              f"template {timings['template']:,.0f}/s ({timings['template'] / timings['legacy']:.2f}x)")
+
+
+def _output_tree(root: str) -> Dict[str, str]:
+    """Relative path -> content of every file under root, leaving out the converter's own state files."""
+    tree: Dict[str, str] = {}
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories[:] = [name for name in subdirectories if not name.startswith(".m3u_to_strm")]
+        for filename in filenames:
+            if not filename.startswith(".m3u_to_strm"):
+                path: str = os.path.join(directory, filename)
+                with open(path, "r", encoding="utf-8") as f:
+                    tree[os.path.relpath(path, root)] = f.read()
+    return tree
+
+
+def _start_refresh_server(failures: int):
+    """Starts a local stand-in media server that answers 503 to its first `failures` requests, then 200.
+
+    The JSON bodies of all requests are kept in ``server.bodies``.
+    """
+    import http.server
+    import json
+    import threading
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_POST(self) -> None:
+            self.server.bodies.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(503 if len(self.server.bodies) <= failures else 200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.bodies = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_refresh(args: argparse.Namespace) -> None:
+    """Refreshes many changed directories, given as relative paths, on a stand-in server whose first request fails."""
+    import refresh
+
+    server = _start_refresh_server(failures=1)
+    with tempfile.TemporaryDirectory() as workdir:
+        root: str = os.path.join(workdir, "media", "tv")
+        count: int = max(10, args.rows // 100)
+        changed: List[str] = [
+            os.path.relpath(os.path.join(root, f"Show {i}", f"Season {i % 3 + 1}")) for i in range(count)
+        ]
+        changed.append(os.path.relpath(os.path.join(workdir, "media", "tv2", "Other Show")))  # Shares the prefix text
+        media_server = refresh.MediaServer(
+            "bench", "jellyfin", f"http://127.0.0.1:{server.server_port}",
+            local_prefix=root, remote_prefix="/data/tv", batch_size=500, backoff=0.05,
+        )
+        start: float = time.perf_counter()
+        paths: List[str] = media_server.notify(changed, [os.path.relpath(root), os.path.join(workdir, "media", "tv2")])
+        seconds: float = time.perf_counter() - start
+    server.shutdown()
+    sent: List[str] = [update["Path"] for body in server.bodies[1:] for update in body["Updates"]]
+    assert server.bodies[0] == server.bodies[1], "the failed request was not retried"
+    assert sent == paths and all(os.path.isabs(path) for path in sent), "relative paths were sent"
+    assert sum(path.startswith("/data/tv/") for path in sent) == len(sent) - 1, "prefix not translated"
+    assert any(path.endswith(os.path.join("media", "tv2", "Other Show")) for path in sent), "tv2 was translated"
+    print(f"refresh: {len(changed)} changed directories -> {len(paths)} paths in {len(server.bodies)} requests "
+          f"(first failed, retried) in {seconds:.2f}s")
+
+
+def bench_resume(args: argparse.Namespace) -> None:
+    """Kills a conversion between two checkpoints, resumes it, and checks the end-of-run state matches a clean run.
+
+    The crash lands after entries past the last checkpoint were written, so
+    the resumed run finds their files already on disk; their directories
+    and artwork still have to reach the refresh and artwork steps.
+    """
+    import configparser
+
+    import logger
+    import streamClasses
+
+    entries: int = max(50, args.rows // 1000)
+    crash_at: int = entries // 2 * 2 + 7  # Playlist line of an entry a few positions past a checkpoint
+    server = _start_probe_server(delay=0)
+    with tempfile.TemporaryDirectory() as workdir:
+        playlist: str = os.path.join(workdir, "bench.m3u")
+        with open(playlist, "w", encoding="utf-8") as f:
+            f.write("#EXTM3U\n")
+            for i in range(entries):
+                logo: str = f'tvg-logo="http://127.0.0.1:{server.server_port}/ok/{i % 7}.png"'
+                if i % 2:
+                    f.write(f'#EXTINF:-1 {logo} group-title="TV VOD",Show {_letters(i % 13)} '
+                            f"S{i % 5 + 1:02d}E{i:02d}\nhttp://tv.example/vod/{i}.mkv\n")
+                else:
+                    f.write(f'#EXTINF:-1 {logo} group-title="Movie VOD",Movie {_letters(i)} ({1950 + i % 70})\n'
+                            f"http://movies.example/M/{i}.mkv\n")
+
+        def config(label: str) -> configparser.ConfigParser:
+            parser = configparser.ConfigParser()
+            parser.read_dict({
+                "paths": {"input_m3u": playlist, "output_dir": os.path.join(workdir, label)},
+                "settings": {"checkpoint_interval": "10", "log_level": "WARNING"},
+                "artwork": {"enabled": "true"},
+            })
+            with open(os.path.join(workdir, f"{label}.ini"), "w", encoding="utf-8") as f:
+                parser.write(f)
+            return parser
+
+        def state(converter, label: str) -> Dict[str, List[str]]:
+            root: str = os.path.join(workdir, label)
+            return {
+                "changed": sorted(os.path.relpath(path, root) for path in converter.targets[0].changed_directories),
+                "artwork": sorted(os.path.relpath(path, root) for path in converter.artwork_jobs),
+            }
+
+        clean: Dict[str, List[str]] = state(streamClasses.rawStreamList(config("clean"), logger.LogLevel.WARNING),
+                                            "clean")
+        config("resumed")
+        crash: str = (
+            "import configparser, os, sys\n"
+            f"sys.path.insert(0, {_REPO_DIR!r})\n"
+            "import logger, streamClasses\n"
+            "parse = streamClasses.rawStreamList.parseEntry\n"
+            "def crash(self, linenumber, *rest):\n"
+            f"    if linenumber >= {crash_at}:\n"
+            "        os._exit(3)  # No cleanup, no buffer flushes: as close to a power cut as a process gets\n"
+            "    return parse(self, linenumber, *rest)\n"
+            "streamClasses.rawStreamList.parseEntry = crash\n"
+            "config = configparser.ConfigParser()\n"
+            "config.read('resumed.ini')\n"
+            "streamClasses.rawStreamList(config, logger.LogLevel.WARNING)\n"
+        )
+        returncode: int = subprocess.run(
+            [sys.executable, "-c", crash], cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ).returncode
+        assert returncode == 3, f"the interrupted run did not crash as planned ({returncode})"
+        start: float = time.perf_counter()
+        resumed_converter = streamClasses.rawStreamList(config("resumed"), logger.LogLevel.WARNING, resume=True)
+        seconds: float = time.perf_counter() - start
+        resumed: Dict[str, List[str]] = state(resumed_converter, "resumed")
+        assert _output_tree(os.path.join(workdir, "clean")) == _output_tree(os.path.join(workdir, "resumed"))
+        assert resumed["changed"] == clean["changed"], (
+            f"{len(set(clean['changed']) - set(resumed['changed']))} changed directories lost by the crash"
+        )
+        assert resumed["artwork"] == clean["artwork"], (
+            f"{len(set(clean['artwork']) - set(resumed['artwork']))} artwork jobs lost by the crash"
+        )
+    server.shutdown()
+    print(f"resume: {entries} entries, killed at line {crash_at}, resumed in {seconds:.2f}s; "
+          f"{len(clean['changed'])} changed directories and {len(clean['artwork'])} artwork jobs match a clean run")
+
+
+def bench_targets(args: argparse.Namespace) -> None:
+    """Fans one playlist out to two targets with different naming, NFO placement and permissions.
+
+    Checks every entry is parsed once and written to both targets under
+    their own paths, with tvshow.nfo in each target's show directory;
+    then compares the run's time with a single-target run.
+    """
+    import configparser
+    import stat
+
+    import logger
+    import metadata
+    import streamClasses
+
+    entries: int = min(1000, max(20, args.rows // 1000))  # Episode numbers stay two-digit
+    with tempfile.TemporaryDirectory() as workdir:
+        playlist: str = os.path.join(workdir, "bench.m3u")
+        dataset: str = os.path.join(workdir, "title.basics.tsv")
+        expected: Dict[str, set] = {"kodi": set(), "jellyfin": set()}
+        with open(playlist, "w", encoding="utf-8") as f, open(dataset, "w", encoding="utf-8") as tsv:
+            f.write("#EXTM3U\n")
+            tsv.write("tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\tstartYear\tendYear\t"
+                      "runtimeMinutes\tgenres\n")
+            for i in range(entries):
+                if i % 2:
+                    show: str = f"Show {_letters(i % 7)}"
+                    episode: int = i // 14 + 1
+                    f.write(f'#EXTINF:-1 group-title="TV VOD",|FR| {show} S01E{episode:02d} 1080p\n'
+                            f"http://tv.example/vod/{i}.mkv\n")
+                    tsv.write(f"tt{i:07d}\ttvSeries\t{show}\t{show}\t0\t2010\t\\N\t45\tDrama\n")
+                    expected["kodi"] |= {f"tvshows/{show}/{show} - Season 01/{show} - S01E{episode:02d} - FR - 1080p.strm",
+                                         f"tvshows/{show}/tvshow.nfo"}
+                    expected["jellyfin"] |= {f"series/FR/{show}/S01/{show} S01E{episode:02d}.strm",
+                                             f"series/FR/{show}/tvshow.nfo"}
+                else:
+                    movie: str = f"Movie {_letters(i)}"
+                    year: int = 1950 + i % 70
+                    f.write(f'#EXTINF:-1 group-title="Movie VOD",{movie} ({year}) 1080p\n'
+                            f"http://movies.example/M/{i}.mkv\n")
+                    tsv.write(f"tt{i:07d}\tmovie\t{movie}\t{movie}\t0\t{year}\t\\N\t90\tDrama\n")
+                    expected["kodi"] |= {f"movies/{movie} - ({year})/{movie} - ({year}) - 1080p.strm",
+                                         f"movies/{movie} - ({year})/movie.nfo"}
+                    expected["jellyfin"] |= {f"films/{movie} [{year}]/{movie}.strm",
+                                             f"films/{movie} [{year}]/movie.nfo"}
+        index_path: str = os.path.join(workdir, "metadata.sqlite")
+        metadata.build_index(dataset, index_path)
+
+        def config(targets: List[str]) -> configparser.ConfigParser:
+            parser = configparser.ConfigParser(interpolation=None)
+            parser.read_dict({
+                "paths": {"input_m3u": playlist},
+                "settings": {"checkpoint_interval": "0"},
+                "metadata": {"index_path": index_path},
+            })
+            sections: Dict[str, Dict[str, str]] = {
+                "kodi": {"output_dir": os.path.join(workdir, "kodi")},
+                "jellyfin": {
+                    "output_dir": os.path.join(workdir, "jellyfin"),
+                    "movie_output_dir": "films",
+                    "tvshow_output_dir": "series",
+                    "file_permissions": "600",
+                    "movie_template": "{title}[ [[{year}]]]/{title}",
+                    "tvshow_template": "[{language}/]{show}/[S{season:02}/]{show}[ S{season:02}E{episode:02}]",
+                },
+            }
+            parser.read_dict({f"target.{name}": sections[name] for name in targets})
+            return parser
+
+        start: float = time.perf_counter()
+        converter = streamClasses.rawStreamList(config(["kodi"]), logger.LogLevel.WARNING)
+        single_seconds: float = time.perf_counter() - start
+        for name in ("kodi", "jellyfin"):
+            for directory, _, filenames in os.walk(os.path.join(workdir, name)):
+                for filename in filenames:
+                    os.remove(os.path.join(directory, filename))
+        start = time.perf_counter()
+        converter = streamClasses.rawStreamList(config(["kodi", "jellyfin"]), logger.LogLevel.WARNING)
+        fanout_seconds: float = time.perf_counter() - start
+        assert converter.stats["movies"] + converter.stats["episodes"] == entries, "entries were parsed per target"
+        for name, files in expected.items():
+            root: str = os.path.join(workdir, name)
+            written: set = {
+                os.path.relpath(os.path.join(directory, filename), root)
+                for directory, _, filenames in os.walk(root) for filename in filenames
+                if not filename.startswith(".m3u_to_strm")
+            }
+            assert written == files, f"{name}: missing {sorted(files - written)[:3]}, unexpected {sorted(written - files)[:3]}"
+            modes: set = {
+                stat.S_IMODE(os.stat(os.path.join(root, path)).st_mode) for path in written if path.endswith(".strm")
+            }
+            assert modes == {0o600 if name == "jellyfin" else 0o644}, f"{name}: file modes {modes}"
+    print(f"targets: {entries} entries parsed once, {sum(map(len, expected.values()))} files in 2 targets; "
+          f"1 target {single_seconds * 1000:.0f} ms, 2 targets {fanout_seconds * 1000:.0f} ms")
+
+
+def bench_service(args: argparse.Namespace) -> None:
+    """Submits jobs to a resident service over a Unix socket with the local client, then checks health and status."""
+    import configparser
+    import json
+    import threading
+
+    import logger
+    import service
+
+    entries: int = max(20, args.rows // 1000)
+    with tempfile.TemporaryDirectory() as workdir:
+        playlist: str = os.path.join(workdir, "bench 100%.m3u")  # "%" must survive the job config
+        with open(playlist, "w", encoding="utf-8") as f:
+            f.write("#EXTM3U\n")
+            for i in range(entries):
+                f.write(f'#EXTINF:-1 group-title="TV VOD",|FR| Show {_letters(i % 5)} S01E{i // 5 + 1:02d} 1080p\n'
+                        f"http://tv.example/vod/{i}.mkv\n")
+        config = configparser.ConfigParser()
+        config.read_dict({"settings": {"log_level": "WARNING"}})
+        conversion_service = service.ConversionService(config, logger.LogLevel.WARNING)
+        address: str = os.path.join(workdir, "service.sock")
+        server = service.make_server(conversion_service, address)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        output_dir: str = os.path.join(workdir, "streams")
+        seconds: List[float] = []
+        summaries: List[dict] = []
+        for run in range(2):
+            start: float = time.perf_counter()
+            events: List[dict] = list(service.submit_job(
+                address, playlist, output_dir, {"output_paths": {"file_permissions": "640"}}, timeout=60
+            ))
+            seconds.append(time.perf_counter() - start)
+            kinds: List[str] = [event["event"] for event in events]
+            assert kinds[0] == "accepted" and kinds[-1] == "done", f"job {run + 1} ended with {kinds[-1]}: {events[-1]}"
+            assert kinds.count("result") == entries and events[-1]["files"] == entries, "results missing"
+            summaries.append(events[0])
+        warm: Dict[str, int] = {}
+        for key in conversion_service._warm:
+            warm[key[0]] = warm.get(key[0], 0) + 1
+        assert warm == {"log": 1, "shows": 1, "tags": 1}, f"jobs did not share their warm state: {warm}"
+        with open(os.path.join(output_dir, ".m3u_to_strm.shows"), encoding="utf-8") as f:
+            assert len(f.readlines()) == 5, "the second job added show names again"
+        connection = service._connect(address, timeout=10)
+        connection.request("GET", "/health")
+        health: dict = json.loads(connection.getresponse().read())
+        assert health == {"status": "ok", "queued": 0}, health
+        connection = service._connect(address, timeout=10)
+        connection.request("GET", f"/jobs/{summaries[0]['job']}")
+        status: List[str] = [json.loads(line)["event"] for line in connection.getresponse() if line.strip()]
+        assert status == ["following", "queued", "started", "done"], f"finished job kept {status}"
+        server.shutdown()
+        server.server_close()
+    print(f"service: {entries} entries per job; first job {seconds[0] * 1000:.0f} ms, "
+          f"warm job {seconds[1] * 1000:.0f} ms; health and finished-job status as expected")
+
+
+def bench_shows(args: argparse.Namespace) -> None:
+    """Checks that show variants from later runs land in the first run's directories, then times a large show index.
+
+    Each run rewrites the playlist with the shows in another spelling and,
+    after the first, in reverse order; only the index file carries the
+    first spelling from run to run.
+    """
+    import configparser
+
+    import logger
+    import streamClasses
+
+    shows: List[str] = [f"Show {_letters(i)}" for i in range(max(10, args.rows // 10000))]
+    with tempfile.TemporaryDirectory() as workdir:
+        config = configparser.ConfigParser()
+        config.read_dict({"paths": {"input_m3u": os.path.join(workdir, "bench.m3u"),
+                                    "output_dir": os.path.join(workdir, "streams")}})
+        variants: Dict[int, Callable[[str], str]] = {
+            1: lambda show: show,
+            2: lambda show: f"|FR| {show.upper()}",  # Reordered below, so a variant comes first
+            3: lambda show: f"{show.lower()} [VOSTFR]",
+        }
+        for run, variant in variants.items():
+            with open(config["paths"]["input_m3u"], "w", encoding="utf-8") as f:
+                f.write("#EXTM3U\n")
+                for show in (shows if run == 1 else reversed(shows)):
+                    f.write(f'#EXTINF:-1 group-title="TV VOD",{variant(show)} S01E{run:02d}\n'
+                            f"http://tv.example/vod/{run}/{len(show)}.mkv\n")
+            streamClasses.rawStreamList(config, logger.LogLevel.WARNING)
+        tvshows: str = os.path.join(workdir, "streams", "tvshows")
+        assert sorted(os.listdir(tvshows)) == sorted(shows), "a variant got its own show directory"
+        for show in shows:
+            episodes: List[str] = [name for _, _, names in os.walk(os.path.join(tvshows, show)) for name in names]
+            assert len(episodes) == len(variants), f"{show}: {episodes}"
+        with open(os.path.join(workdir, "streams", ".m3u_to_strm.shows"), encoding="utf-8") as f:
+            assert len(f.readlines()) == len(shows), "show names were appended again by a later run"
+
+        path: str = os.path.join(workdir, "large.shows")
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(args.rows):
+                f.write(f"show {_letters(i)}\tShow {_letters(i)}\n")
+        start: float = time.perf_counter()
+        index = streamClasses.ShowIndex(path)
+        load_seconds: float = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(0, args.rows, 10):
+            index.canonical(f"|FR| SHOW {_letters(i).upper()}")
+        lookup_seconds: float = time.perf_counter() - start
+        assert len(index.shows) == args.rows, "lookups of known shows added names"
+    print(f"shows: {len(shows)} shows in {len(variants)} spellings over {len(variants)} runs -> "
+          f"{len(shows)} directories; index of {args.rows} names loaded in {load_seconds:.2f}s, "
+          f"{args.rows // 10 / lookup_seconds:,.0f} variant lookups/s")
+
+
+def bench_shards(args: argparse.Namespace) -> None:
+    """Converts one playlist in a single process, then with --shards worker processes, and checks the outputs match."""
+    entries: int = max(100, args.rows // 10)
+    run_id: str = str(int(time.time()))
+    with tempfile.TemporaryDirectory() as workdir:
+        playlist: str = os.path.join(workdir, "bench.m3u")
+        with open(playlist, "w", encoding="utf-8") as f:
+            f.write("#EXTM3U\n")
+            for i in range(entries):
+                if i % 2:
+                    show: str = f"Show {_letters(i % 997)}"
+                    variant: str = show.upper() if i % 4 == 1 else f"|FR| {show}"  # Variants of one show
+                    f.write(f'#EXTINF:-1 group-title="TV VOD",{variant} S{i % 9 + 1:02d}E{i % 30 + 1:02d} HD\n'
+                            f"http://tv.example/vod/{i}.mkv\n")
+                else:
+                    f.write(f'#EXTINF:-1 group-title="Movie VOD",Movie {_letters(i)} ({1950 + i % 70}) 1080p\n'
+                            f"http://movies.example/M/{i}.mkv\n")
+        runs: Dict[str, List[List[str]]] = {
+            "serial": [[]],
+            "sharded": [["--shard", f"{i}/{args.shards}", "--run-id", run_id] for i in range(args.shards)],
+        }
+        seconds: Dict[str, float] = {}
+        trees: Dict[str, Dict[str, str]] = {}
+        for label, workers in runs.items():
+            rundir: str = os.path.join(workdir, label)
+            os.makedirs(rundir)
+            with open(os.path.join(rundir, "config.ini"), "w", encoding="utf-8") as f:
+                f.write(f"[paths]\ninput_m3u = {playlist}\noutput_dir = {os.path.join(rundir, 'streams')}\n"
+                        "[settings]\nlog_level = WARNING\n")
+            command: List[str] = [sys.executable, os.path.join(_REPO_DIR, "main.py"), "--no-ui"]
+            start: float = time.perf_counter()
+            processes = [
+                subprocess.Popen(command + extra, cwd=rundir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                for extra in workers
+            ]
+            if any(process.wait() != 0 for process in processes):
+                sys.exit(f"{label} run failed, see {rundir}/logs")
+            if label == "sharded":
+                subprocess.run(
+                    command + ["--merge-shards", "--run-id", run_id], cwd=rundir, check=True,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                )
+            seconds[label] = time.perf_counter() - start
+            trees[label] = _output_tree(os.path.join(rundir, "streams"))
+        assert trees["serial"] == trees["sharded"], "sharded output differs from the serial run"
+        print(f"shards: {entries} entries, {len(trees['serial'])} files; serial {seconds['serial']:.2f}s, "
+              f"{args.shards} workers + merge {seconds['sharded']:.2f}s "
+              f"({seconds['serial'] / seconds['sharded']:.2f}x on {os.cpu_count()} CPUs), outputs identical")
+
+
+def bench_adversarial(args: argparse.Namespace) -> None:
+    """Times the title helpers on adversarial lines of growing length to check they scale linearly.
+
+    Each function runs on every input shape at length n and 8n; a linear
+    function takes about 8x longer, a quadratic one about 64x. Functions
+    growing by more than 20x are flagged.
+    """
+    import contextlib
+    import io
+
+    import tools
+
+    shapes: Dict[str, Callable[[int], str]] = {
+        "commas": lambda n: '#EXTINF:-1 tvg-name="' + "a," * n + '",Title 2020',
+        "brackets": lambda n: "[" * n + "Title",
+        "open quotes": lambda n: 'tvg-name="x tvg-logo="' * (n // 20) + ",Title",
+        "pipes": lambda n: "|F" * n + ",Title",
+        "digits": lambda n: "1 2 " * (n // 4) + ",Title",
+        "season-ish": lambda n: "S0E" * (n // 3) + ",Title S01",
+        "colons": lambda n: ",HD" + " :" * (n // 2),
+    }
+    functions: Dict[str, Callable[[str], object]] = {
+        "infoMatch": tools.infoMatch,
+        "parseMovieInfo": tools.parseMovieInfo,
+        "stripTags": tools.stripTags,
+        "showKey": tools.showKey,
+        "matchTags": tools.matchTags,
+        "stripYear": tools.stripYear,
+        "stripSxxExx": tools.stripSxxExx,
+        "sxxExxMatch": tools.sxxExxMatch,
+        "airDateMatch": tools.airDateMatch,
+        "tvgNameMatch": tools.tvgNameMatch,
+        "parseEpisode": tools.parseEpisode,
+    }
+    base: int = max(1000, args.rows // 100)
+
+    def timed(function: Callable[[str], object], line: str) -> float:
+        best: float = float("inf")
+        for _ in range(args.runs):
+            start: float = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):  # parseEpisode prints its match
+                function(line)
+            best = min(best, time.perf_counter() - start)
+        return max(best, 1e-7)
+
+    flagged: int = 0
+    for name, function in functions.items():
+        worst_ratio: float = 0.0
+        worst_shape: str = ""
+        worst_seconds: float = 0.0
+        for shape, build in shapes.items():
+            small: float = timed(function, build(base))
+            large: float = timed(function, build(base * 8))
+            if large / small > worst_ratio:
+                worst_ratio, worst_shape, worst_seconds = large / small, shape, large
+        verdict: str = "ok" if worst_ratio < 20 else "SUPERLINEAR"
+        flagged += verdict != "ok"
+        print(f"adversarial {name:<15} worst x{worst_ratio:5.1f} for 8x input ({worst_shape}, "
+              f"{worst_seconds * 1000:.2f} ms at {base * 8} chars) {verdict}")
+    if flagged:
+        sys.exit(f"{flagged} functions grew faster than linearly")
+
+
+def _letters(number: int) -> str:
+    """Spells a number in letters, for synthetic titles without digit runs that look like years."""
+    return "".join(chr(ord("a") + int(digit)) for digit in str(number))
+
+
+def _record_xtream_catalog(directory: str, movies: int, series: int, episodes: int) -> None:
+    """Writes synthetic player_api.php responses in the layout _start_xtream_server replays."""
+    import json
+
+    os.makedirs(os.path.join(directory, "get_series_info"), exist_ok=True)
+    categories = [{"category_id": str(i), "category_name": f"Category {i}", "parent_id": 0} for i in range(20)]
+    for action in ("get_vod_categories", "get_series_categories"):
+        with open(os.path.join(directory, f"{action}.json"), "w", encoding="utf-8") as f:
+            json.dump(categories, f)
+    with open(os.path.join(directory, "get_vod_streams.json"), "w", encoding="utf-8") as f:
+        f.write("[")
+        for i in range(movies):
+            f.write(("," if i else "") + json.dumps({
+                "num": i + 1, "name": f"EN - Movie {_letters(i)}, The Return (19{i % 100:02d}) 1080p", "stream_type": "movie",
+                "stream_id": i, "stream_icon": f"http://img.example/{i}.jpg", "rating": "7.1", "added": "1700000000",
+                "category_id": str(i % 20), "container_extension": "mkv", "year": f"19{i % 100:02d}",
+                "plot": "Lorem ipsum dolor sit amet. " * 10,
+            }))
+        f.write("]")
+    with open(os.path.join(directory, "get_series.json"), "w", encoding="utf-8") as f:
+        json.dump([
+            {"num": i + 1, "name": f"Show {i}", "series_id": i, "cover": f"http://img.example/s{i}.jpg",
+             "plot": "Lorem ipsum dolor sit amet. " * 10, "cast": "A, B, C", "last_modified": "1700000000",
+             "category_id": str(i % 20)}
+            for i in range(series)
+        ], f)
+    for i in range(series):
+        seasons = {
+            str(season): [
+                {"id": str(i * 1000 + season * 100 + number), "episode_num": number, "season": season,
+                 "title": f"Show {i} - S{season:02d}E{number:02d} - Episode {number}",
+                 "container_extension": "mp4", "info": {"plot": "Lorem ipsum. " * 5}}
+                for number in range(1, episodes // 2 + 1)
+            ]
+            for season in (1, 2)
+        }
+        with open(os.path.join(directory, "get_series_info", f"{i}.json"), "w", encoding="utf-8") as f:
+            json.dump({"seasons": [], "info": {"name": f"Show {i}"}, "episodes": seasons}, f)
+
+
+def _start_xtream_server(directory: str, delay: float):
+    """Starts a local stand-in Xtream provider replaying recorded responses.
+
+    ``player_api.php?action=<action>`` serves ``<directory>/<action>.json``
+    and ``action=get_series_info&series_id=<id>`` serves
+    ``<directory>/get_series_info/<id>.json``. Series info answers are
+    delayed by `delay` seconds, like a provider building them on demand.
+    """
+    import http.server
+    import shutil
+    import threading
+    from urllib.parse import parse_qs, urlsplit
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            query = parse_qs(urlsplit(self.path).query)
+            action: str = query.get("action", [""])[0]
+            path: str = os.path.join(directory, f"{action}.json")
+            if action == "get_series_info":
+                self.server.series_requests += 1
+                time.sleep(delay)
+                path = os.path.join(directory, action, f"{query.get('series_id', [''])[0]}.json")
+            if not os.path.isfile(path):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(os.path.getsize(path)))
+            self.end_headers()
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, self.wfile)
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.series_requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_xtream(args: argparse.Namespace) -> None:
+    """Ingests a catalog from a stand-in Xtream provider, then again with the series cache warm.
+
+    Uses recorded responses from --responses if given, otherwise a
+    synthetic catalog sized by --rows.
+    """
+    import configparser
+    import json
+    import resource
+
+    import logger
+    import streamClasses
+    import xtream
+
+    with tempfile.TemporaryDirectory() as workdir:
+        responses: str = args.responses or os.path.join(workdir, "responses")
+        if not args.responses:
+            _record_xtream_catalog(responses, movies=args.rows // 4, series=max(1, args.rows // 200), episodes=20)
+        server = _start_xtream_server(responses, delay=0.01)
+        config = configparser.ConfigParser()
+        config.read_dict({
+            "paths": {"output_dir": os.path.join(workdir, "streams")},
+            "xtream": {"url": f"http://127.0.0.1:{server.server_port}", "username": "user", "password": "pass"},
+        })
+        vod_path: str = os.path.join(responses, "get_vod_streams.json")
+        size_mb: float = os.path.getsize(vod_path) / 1e6
+        before_kb: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        with open(vod_path, "rb") as f:
+            start: float = time.perf_counter()
+            count: int = sum(1 for _ in xtream.iter_json_array(iter(lambda: f.read(256 * 1024), b"")))
+            seconds: float = time.perf_counter() - start
+        streaming_kb: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        with open(vod_path, "rb") as f:
+            start = time.perf_counter()
+            json.loads(f.read())
+            loads_seconds: float = time.perf_counter() - start
+        loads_kb: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"xtream vod list: {size_mb:.1f} MB, {count} movies; incremental {seconds:.2f}s, "
+              f"peak RSS growth {(streaming_kb - before_kb) / 1024:.1f} MB; json.loads {loads_seconds:.2f}s, "
+              f"peak RSS growth {(loads_kb - before_kb) / 1024:.1f} MB")
+        for run in ("cold", "warm"):
+            requests_before: int = server.series_requests
+            start = time.perf_counter()
+            converter = streamClasses.rawStreamList(config, logger.LogLevel.WARNING)
+            if not args.responses:  # Movie names are taken whole, commas included
+                assert any(", The Return - (19" in filename for filename in converter.streams), "comma title lost"
+            print(f"xtream ingest ({run}): {len(converter.streams)} files in {time.perf_counter() - start:.2f}s, "
+                  f"{server.series_requests - requests_before} series info requests, {converter.xtream.stats}")
+        server.shutdown()
+
+
+_BENCHMARKS: Dict[str, Callable[[argparse.Namespace], None]] = {
+    "adversarial": bench_adversarial,
+    "artwork": bench_artwork,
+    "cold-start": bench_cold_start,
+    "metadata": bench_metadata,
+    "paths": bench_paths,
+    "probe": bench_probe,
+    "refresh": bench_refresh,
+    "resume": bench_resume,
+    "service": bench_service,
+    "shards": bench_shards,
+    "shows": bench_shows,
+    "tags": bench_tags,
+    "targets": bench_targets,
+    "xmltv": bench_xmltv,
+    "xtream": bench_xtream,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run converter benchmarks.")
+    parser.add_argument("benchmark", choices=sorted(_BENCHMARKS))
+    parser.add_argument("--runs", type=int, default=5, help="Repetitions per measurement")
+    parser.add_argument("--rows", type=int, default=200000, help="Synthetic dataset size")
+    parser.add_argument("--shards", type=int, default=4, help="Worker processes (shards benchmark)")
+    parser.add_argument("--responses", help="Directory of recorded Xtream responses (xtream benchmark)")
+    args: argparse.Namespace = parser.parse_args()
+    _BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# httppool.py
+"""Minimal asyncio HTTP/1.1 client with per-host keep-alive pools.
+
+Used by the stages that make many small requests to a few provider hosts
+(URL probing, artwork, Xtream episode lists). Each host gets a bounded set
+of persistent connections, a concurrency limit and optional request pacing.
+run_bounded drives such a stage with a fixed number of workers.
+"""
+import asyncio
+import ssl
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
+from urllib.parse import SplitResult, urlsplit
+
+# Errors that mean "no usable response"; callers catch these as a group
+CONNECTION_ERRORS: tuple = (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, IndexError)
+
+_Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+_Item = TypeVar("_Item")
+_Result = TypeVar("_Result")
+
+
+class Response(NamedTuple):
+    """Status, lower-cased headers and body of one response."""
+
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+class _HostPool:
+    """Keep-alive connections, concurrency limit and request pacing for one host."""
+
+    def __init__(self, parts: SplitResult, limit: int, rate: float) -> None:
+        self.host: str = parts.hostname or ""
+        self.tls: bool = parts.scheme == "https"
+        self.port: int = parts.port or (443 if self.tls else 80)
+        self.limit: int = limit
+        self.semaphore: asyncio.Semaphore = asyncio.Semaphore(limit)
+        self.interval: float = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot: float = 0.0
+        self._idle: List[_Connection] = []
+
+    async def wait_turn(self) -> None:
+        """Spaces request starts at least `interval` seconds apart."""
+        if not self.interval:
+            return
+        now: float = asyncio.get_running_loop().time()
+        slot: float = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def acquire(self) -> Tuple[_Connection, bool]:
+        """Returns an idle connection (reused=True) or opens a new one."""
+        if self._idle:
+            return self._idle.pop(), True
+        context: Optional[ssl.SSLContext] = ssl.create_default_context() if self.tls else None
+        return await asyncio.open_connection(self.host, self.port, ssl=context), False
+
+    def release(self, connection: _Connection, reusable: bool) -> None:
+        if reusable and len(self._idle) < self.limit:
+            self._idle.append(connection)
+        else:
+            connection[1].close()
+
+    def close(self) -> None:
+        for _, writer in self._idle:
+            writer.close()
+        self._idle = []
+
+
+class HttpPool:
+    """Sends requests over pooled keep-alive connections, one pool per host."""
+
+    def __init__(self, per_host: int = 4, rate: float = 0.0, timeout: float = 10.0) -> None:
+        """Initializes HttpPool object.
+
+        Args:
+            per_host: Concurrent requests (and pooled connections) per host.
+            rate: Request starts per second per host, 0 for no limit.
+            timeout: Seconds allowed for each request.
+        """
+        self.per_host: int = max(1, per_host)
+        self.rate: float = rate
+        self.timeout: float = timeout
+        self._pools: Dict[Tuple[str, str], _HostPool] = {}
+
+    def close(self) -> None:
+        """Closes all idle connections; call before the event loop ends."""
+        for pool in self._pools.values():
+            pool.close()
+        self._pools = {}
+
+    async def request(
+        self,
+        url: str,
+        method: str = "GET",
+        headers: Optional[Dict[str, str]] = None,
+        max_body: int = 64 * 1024,
+    ) -> Response:
+        """Sends one request.
+
+        Bodies larger than `max_body` are not read: the response comes back
+        with an empty body and its connection is dropped.
+
+        Raises:
+            One of CONNECTION_ERRORS if no response could be read.
+        """
+        parts: SplitResult = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"unsupported URL: {url}")
+        key: Tuple[str, str] = (parts.scheme, parts.netloc)
+        pool: Optional[_HostPool] = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = _HostPool(parts, self.per_host, self.rate)
+        async with pool.semaphore:
+            await pool.wait_turn()
+            while True:
+                connection, reused = await asyncio.wait_for(pool.acquire(), self.timeout)
+                try:
+                    response, reusable = await asyncio.wait_for(
+                        self._exchange(connection, parts, method, headers or {}, max_body), self.timeout
+                    )
+                except CONNECTION_ERRORS:
+                    connection[1].close()
+                    if reused:  # The server may have closed an idle connection: retry on a fresh one
+                        continue
+                    raise
+                pool.release(connection, reusable)
+                return response
+
+    async def _exchange(
+        self, connection: _Connection, parts: SplitResult, method: str, headers: Dict[str, str], max_body: int
+    ) -> Tuple[Response, bool]:
+        """Writes a request and reads the response."""
+        reader, writer = connection
+        target: str = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        lines: List[str] = [f"{method} {target} HTTP/1.1", f"Host: {parts.netloc}", "User-Agent: m3u_to_strm", "Accept: */*"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+        status_line: bytes = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        status: int = int(status_line.split()[1])
+        response_headers: Dict[str, str] = {}
+        while True:
+            line: bytes = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        reusable: bool = (
+            status_line.startswith(b"HTTP/1.1") and response_headers.get("connection", "").lower() != "close"
+        )
+        body: bytes = b""
+        if method == "HEAD" or status in (204, 304) or status < 200:
+            return Response(status, response_headers, body), reusable
+        length: str = response_headers.get("content-length", "")
+        if length.isdigit():
+            if int(length) > max_body:
+                return Response(status, response_headers, body), False  # Cheaper to drop the connection
+            body = await reader.readexactly(int(length))
+        elif response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks: List[bytes] = []
+            size: int = 0
+            while True:
+                chunk_size: int = int((await reader.readline()).split(b";")[0], 16)
+                if chunk_size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):  # Trailers
+                        pass
+                    break
+                size += chunk_size
+                if size > max_body:
+                    return Response(status, response_headers, b""), False
+                chunks.append(await reader.readexactly(chunk_size))
+                await reader.readexactly(2)  # CRLF after each chunk
+            body = b"".join(chunks)
+        else:
+            data: bytearray = bytearray()  # Delimited by connection close
+            while len(data) <= max_body:
+                piece: bytes = await reader.read(65536)
+                if not piece:
+                    break
+                data += piece
+            body = bytes(data) if len(data) <= max_body else b""
+            reusable = False
+        return Response(status, response_headers, body), reusable
+
+
+async def run_bounded(
+    items: Iterable[_Item], call: Callable[[_Item], Awaitable[_Result]], concurrency: int
+) -> List[Tuple[_Item, _Result]]:
+    """Awaits call(item) for every item, with at most `concurrency` calls in flight.
+
+    Workers pull from one shared iterator, so each item is handled once and
+    a slow item only holds up its own worker; items are not materialized
+    up front.
+
+    Returns:
+        list: (item, result) pairs in the order the calls finished.
+    """
+    pending: Iterator[_Item] = iter(items)
+    results: List[Tuple[_Item, _Result]] = []
+
+    async def worker() -> None:
+        for item in pending:
+            results.append((item, await call(item)))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return results
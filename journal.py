@@ -0,0 +1,128 @@
+# journal.py
+"""Append-only run journal for checkpointed, resumable conversions.
+
+The journal's first line names the hash of the playlist being converted.
+Every following line is either a playlist offset up to which all
+entries have been written to every target, or a tab-separated record of
+state the end of the run needs (directories that changed, artwork to
+fetch). Records are flushed as they are written, before the files they
+describe, so they survive a crash between two offsets. A ``--resume``
+run on an unchanged playlist starts at the last committed offset with
+every record restored, so recovery costs only the remaining work. The journal is removed once a run completes.
+"""
+import hashlib
+import os
+from typing import IO, Callable, Iterable, List, Optional, Tuple
+
+_HEADER: str = "m3u_to_strm-journal 1"
+
+
+def hash_lines(lines: Iterable[str]) -> str:
+    """Hashes playlist lines so a resumed run can tell whether the source changed."""
+    digest = hashlib.sha256()
+    for line in lines:
+        digest.update(line.encode("utf-8", "surrogateescape"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class RunJournal:
+    """Records committed playlist offsets for one source."""
+
+    def __init__(
+        self, path: str, source_hash: str, interval: int = 100, on_commit: Optional[Callable[[], None]] = None
+    ) -> None:
+        """Initializes RunJournal object.
+
+        Args:
+            path: Journal file location.
+            source_hash: hash_lines() of the playlist being converted.
+            interval: Playlist positions between two committed offsets.
+            on_commit: Called before each offset is committed, to make
+                state kept outside the journal durable first.
+        """
+        self.path: str = path
+        self.source_hash: str = source_hash
+        self.interval: int = interval
+        self.on_commit: Callable[[], None] = on_commit or (lambda: None)
+        self._file: Optional[IO[str]] = None
+        self._pending: int = 0
+
+    def _lines(self) -> List[str]:
+        """Returns the complete lines after the header, or [] if the journal is missing or for another source."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                content: str = f.read()
+        except FileNotFoundError:
+            return []
+        lines = content.split("\n")
+        if lines[0] != f"{_HEADER} {self.source_hash}":
+            return []
+        return lines[1:-1]  # The last element is "" after a complete line, or a torn partial write
+
+    def resume_offset(self) -> int:
+        """Returns the last committed offset, or 0 if the journal is missing or for another source."""
+        for line in reversed(self._lines()):
+            if line.isdigit():
+                return int(line)
+        return 0
+
+    def records(self) -> List[Tuple[str, ...]]:
+        """Returns every complete record, each split into (kind, field, ...).
+
+        Records past the last committed offset are kept: they describe
+        files the interrupted run may already have written.
+        """
+        lines: List[str] = self._lines()
+        return [tuple(line.split("\t")) for line in lines if not line.isdigit()]
+
+    def start(self, offset: int, records: Iterable[Tuple[str, ...]] = ()) -> None:
+        """Opens the journal for a run starting at offset; a fresh run truncates it.
+
+        A resumed run passes the records it restored, so they survive
+        another interruption.
+        """
+        directory: str = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write(f"{_HEADER} {self.source_hash}\n")
+        for fields in records:
+            self._file.write("\t".join(fields) + "\n")
+        self._file.write(f"{offset}\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def record(self, *fields: str) -> None:
+        """Appends a record and flushes it, so it reaches the file before whatever it describes."""
+        if self._file is None:
+            return
+        self._file.write("\t".join(field.replace("\t", " ").replace("\n", " ") for field in fields) + "\n")
+        self._file.flush()
+
+    def advance(self, offset: int) -> None:
+        """Notes progress; every `interval` calls the offset is committed to disk."""
+        if self._file is None:
+            return
+        self._pending += 1
+        if self._pending >= self.interval:
+            self.commit(offset)
+
+    def commit(self, offset: int) -> None:
+        """Appends an offset and forces it to disk."""
+        if self._file is None:
+            return
+        self.on_commit()
+        self._file.write(f"{offset}\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def finish(self) -> None:
+        """Closes and removes the journal after a completed run."""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,160 @@
+# live.py
+"""Live-channel output: a filtered M3U of live channels and a matching EPG.
+
+LiveWriter receives live entries during the converter's single pass over
+the playlist and writes them to a trimmed, re-grouped M3U. filter_xmltv
+then streams an XMLTV guide and keeps only the channels and programmes
+whose ID appears in that M3U. Elements are dropped as soon as they are
+written, so memory stays flat however large the guide is.
+"""
+import gzip
+import os
+from typing import IO, Dict, Optional, Set, Tuple
+from xml.etree import ElementTree
+
+import tools
+
+
+def _open_text(path: str, mode: str) -> IO:
+    opener = gzip.open if path.endswith(".gz") else open
+    return opener(path, mode + "t", encoding="utf-8")
+
+
+def _attribute(match) -> str:
+    return match.group(1).strip() if match else ""
+
+
+class LiveWriter:
+    """Writes live entries to a filtered, re-grouped M3U."""
+
+    def __init__(
+        self,
+        path: str,
+        include_groups: Optional[Set[str]] = None,
+        group_map: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Initializes LiveWriter object.
+
+        Args:
+            path: Output M3U location. It is written to a temporary file and
+                moved into place by finish().
+            include_groups: Case-folded group names to keep; None keeps all.
+            group_map: Case-folded source group -> group written to the output.
+        """
+        self.path: str = path
+        self.include_groups: Optional[Set[str]] = include_groups
+        self.group_map: Dict[str, str] = group_map or {}
+        self.channel_ids: Set[str] = set()  # tvg-ids written, used to filter the EPG
+        self.count: int = 0
+        self._temp_path: str = f"{path}.tmp"
+        self._file: Optional[IO[str]] = None
+
+    @classmethod
+    def from_config(cls, config) -> Optional["LiveWriter"]:
+        """Builds a writer from ``[live]`` and ``[live.group_map]``, or None if live output is off."""
+        path: str = config.get("live", "output_m3u", fallback="")
+        if not path:
+            return None
+        groups: str = config.get("live", "include_groups", fallback="")
+        include_groups: Optional[Set[str]] = {
+            group.strip().casefold() for group in groups.split(",") if group.strip()
+        } or None
+        group_map: Dict[str, str] = {}
+        if config.has_section("live.group_map"):
+            for group, new_group in config.items("live.group_map"):
+                group_map[group.casefold()] = new_group.strip()
+        return cls(path, include_groups, group_map)
+
+    def isLiveGroup(self, streaminfo: str) -> bool:
+        """Returns True if the entry's group is one of the configured live groups."""
+        if not self.include_groups:
+            return False
+        return _attribute(tools.tvgGroupMatch(streaminfo)).casefold() in self.include_groups
+
+    def add(self, streaminfo: str, url: str) -> bool:
+        """Writes one live entry if its group passes the filter.
+
+        Returns:
+            bool: True if the entry was written.
+        """
+        group: str = _attribute(tools.tvgGroupMatch(streaminfo))
+        if self.include_groups is not None and group.casefold() not in self.include_groups:
+            return False
+        group = self.group_map.get(group.casefold(), group)
+        info = tools.infoMatch(streaminfo)
+        name: str = info.group(1).strip() if info else ""
+        attributes: list = []
+        for key, match in (
+            ("tvg-id", tools.tvidmatch(streaminfo)),
+            ("tvg-name", tools.tvgNameMatch(streaminfo)),
+            ("tvg-logo", tools.tvgLogoMatch(streaminfo)),
+            ("tvg-chno", tools.tvgChannelMatch(streaminfo)),
+        ):
+            value: str = _attribute(match)
+            if value:
+                attributes.append(f'{key}="{value}"')
+                if key == "tvg-id":
+                    self.channel_ids.add(value)
+        if group:
+            attributes.append(f'group-title="{group}"')
+        if self._file is None:
+            directory: str = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self._temp_path, "w", encoding="utf-8")
+            self._file.write("#EXTM3U\n")
+        self._file.write(f"#EXTINF:-1 {' '.join(attributes)},{name}\n{url.strip()}\n")
+        self.count += 1
+        return True
+
+    def finish(self) -> None:
+        """Moves the finished M3U into place."""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.replace(self._temp_path, self.path)  # Players never see a half-written list
+
+
+def filter_xmltv(source: str, destination: str, channel_ids: Set[str]) -> Tuple[int, int]:
+    """Copies the channels and programmes for the given IDs from one XMLTV file to another.
+
+    Both files may be gzip-compressed (``.gz``). The source is parsed
+    incrementally and every top-level element is released once handled.
+
+    Returns:
+        tuple: Number of channels and programmes kept.
+    """
+    channels: int = 0
+    programmes: int = 0
+    temp_path: str = f"{destination}.tmp"
+    with _open_text(source, "r") as infile, _open_text(temp_path, "w") as outfile:
+        root: Optional[ElementTree.Element] = None
+        depth: int = 0
+        for event, element in ElementTree.iterparse(infile, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if root is None:
+                    root = element
+                    attributes: str = "".join(f" {key}={tools.quoteXmlAttribute(value)}" for key, value in element.attrib.items())
+                    outfile.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<{element.tag}{attributes}>\n')
+                continue
+            depth -= 1
+            if depth != 1:  # Children of <channel>/<programme> are handled with their parent
+                continue
+            if element.tag == "channel":
+                keep: bool = element.get("id", "") in channel_ids
+                channels += keep
+            elif element.tag == "programme":
+                keep = element.get("channel", "") in channel_ids
+                programmes += keep
+            else:
+                keep = False
+            if keep:
+                element.tail = None
+                outfile.write("  " + ElementTree.tostring(element, encoding="unicode") + "\n")
+            root.clear()  # Drop everything parsed so far
+        if root is not None:
+            outfile.write(f"</{root.tag}>\n")
+    os.replace(temp_path, destination)
+    return channels, programmes
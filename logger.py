@@ -1,8 +1,7 @@
 import logging
 from enum import Enum
-from os import path
-
-from PyQt6.QtCore import QObject, pyqtSignal
+from os import makedirs, path
+from typing import Callable, List
 
 
 class LogLevel(Enum):
@@ -13,14 +12,6 @@ class LogLevel(Enum):
     CRITICAL = logging.CRITICAL
 
 
-class UISignalEmitter(QObject):
-    """
-    Signal emitter for UI updates.
-    """
-
-    log_signal = pyqtSignal(str)
-
-
 class Logger(object):
     def __init__(self, name: str, log_level: LogLevel = LogLevel.DEBUG) -> None:
         formatter = logging.Formatter(
@@ -28,7 +19,13 @@ class Logger(object):
         )
         self.log = logging.getLogger(name)
         self.log.setLevel(log_level.value)  # Use .value to get the int value from Enum
-        self.ui_emitter = UISignalEmitter()
+        self.listeners: List[Callable[[str], None]] = []
+        if self.log.handlers:
+            # Already set up by an earlier instance (e.g. in the resident
+            # service), reuse its handlers instead of stacking duplicates.
+            for handler in self.log.handlers:
+                handler.setLevel(log_level.value)
+            return
 
         # create console handler and set level to debug
         ch = logging.StreamHandler()
@@ -39,12 +36,30 @@ class Logger(object):
         # create file handler
         logs_folder = "logs"
         if not path.exists(logs_folder):
-            path.makedirs(logs_folder, exist_ok=True)
-        fh = logging.FileHandler(path.join(logs_folder, f"{name}.log")) # Use f-string here
+            makedirs(logs_folder, exist_ok=True)
+        log_name = path.splitext(path.basename(name))[0]  # "/x/streamClasses.py" -> "streamClasses"
+        fh = logging.FileHandler(path.join(logs_folder, f"{log_name}.log"))
         fh.setFormatter(formatter)
         fh.setLevel(log_level.value)
         self.log.addHandler(fh)
 
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """Registers a plain callable that receives every logged message.
+
+        The UI uses this to forward messages to its Qt signals, so the
+        logger itself never has to import Qt.
+        """
+        self.listeners.append(listener)
+
     def write_to_log(self, msg: str) -> None:
         self.log.debug(msg)
-        self.ui_emitter.log_signal.emit(msg)
+        if self.listeners and self.log.isEnabledFor(logging.DEBUG):  # Listeners honour the log level too
+            for listener in self.listeners:
+                listener(msg)
+
+    def write_warning(self, msg: str) -> None:
+        """Logs a message that should be seen at the default log level."""
+        self.log.warning(msg)
+        if self.listeners and self.log.isEnabledFor(logging.WARNING):
+            for listener in self.listeners:
+                listener(msg)
@@ -1,13 +1,17 @@
 # main.py
+import time
+
+_STARTED_AT: float = time.perf_counter()  # Taken before any other import for cold-start timing
+
 import argparse
 import configparser
 import sys
 from typing import Optional
 
 import logger
+import shards
 import streamClasses
 import tools
-import wget  # Keep this here for the CLI mode
 
 
 def main() -> None:
@@ -29,9 +33,6 @@ def main() -> None:
         logger.LogLevel.INFO)
     log = logger.Logger(__file__, log_level=log_level)
     log.write_to_log(f"Log level set to: {log_level_str}")
-    log.ui_emitter.log_signal.connect(
-        lambda msg: None
-    )  # Do nothing, ui.py handles this
 
     parser = argparse.ArgumentParser(
         description="Process M3U files to create STRM files."
@@ -39,10 +40,96 @@ def main() -> None:
     parser.add_argument(
         "--no-ui", action="store_true", help="Disable UI and run in CLI mode"
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from its last checkpoint if the playlist is unchanged",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        type=shards.parse_shard,
+        help="Write only shard I of N (0-based); run one worker per shard, then --merge-shards",
+    )
+    parser.add_argument(
+        "--run-id",
+        help="Identifies a sharded run; give every worker of the run the same value, e.g. its start time",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        action="store_true",
+        help="Combine the manifests of a sharded run and refresh media servers once, then exit",
+    )
+    parser.add_argument(
+        "--build-metadata-index",
+        metavar="DATASET",
+        help="Build the offline metadata index from a title.basics.tsv(.gz) file and exit",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a resident service accepting conversion jobs",
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Service listen address (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8765, help="Service listen port (default: 8765)"
+    )
+    parser.add_argument(
+        "--socket", help="Serve on this Unix socket path instead of TCP"
+    )
+    parser.add_argument(
+        "--queue-size", type=int, default=16, help="Maximum number of queued service jobs"
+    )
     args: argparse.Namespace = parser.parse_args()
+    if args.shard and not args.run_id:
+        parser.error("--shard needs --run-id, so --merge-shards can tell this run from earlier ones")
     log.write_to_log(f"Command-line arguments: {args}")
 
-    if not args.no_ui:
+    if args.build_metadata_index:
+        import metadata
+
+        index_path: str = config.get("metadata", "index_path", fallback="metadata.sqlite")
+        log.write_to_log(f"Building metadata index {index_path} from {args.build_metadata_index}...")
+        rows: int = metadata.build_index(args.build_metadata_index, index_path)
+        log.write_to_log(f"Metadata index built with {rows} titles.")
+    elif args.merge_shards:
+        import refresh
+
+        output_root: str = streamClasses.OutputTarget.from_config(config)[0].output_dir
+        try:
+            merged: dict = shards.merge_manifests(output_root, args.run_id)
+        except (OSError, ValueError) as e:
+            log.write_warning(f"Cannot merge shards in {output_root}: {e}")
+            sys.exit(1)
+        log.write_to_log(
+            f"Merged {merged['count']} shards of run {merged['run_id']}: {len(merged['files'])} files, {merged['stats']}, "
+            f"{merged['seconds']:.1f}s wall"
+        )
+        if merged["conflicts"]:
+            log.write_warning(f"{len(merged['conflicts'])} files were written by more than one shard")
+        try:
+            for name, paths in shards.refresh_merged(refresh.MediaServer.from_config(config), merged).items():
+                log.write_to_log(f"Library refresh sent to {name}: {paths} paths")
+        except OSError as e:  # urllib errors are OSErrors
+            log.write_warning(f"Library refresh failed: {e}")
+    elif args.serve:
+        import service
+
+        conversion_service = service.ConversionService(
+            config, log_level, max_queue=args.queue_size
+        )
+        address: service.Address = args.socket or (args.host, args.port)
+        server = service.make_server(conversion_service, address)
+        log.write_to_log(f"Serving conversion jobs on {address}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    elif not args.no_ui:
         from PyQt6.QtWidgets import QApplication
         from ui import (
             MainWindow,
@@ -56,10 +143,12 @@ def main() -> None:
         # ipttvurl = r"C:\Users\000\Desktop\iptmovies.m3u" #replace url with your link, or comment this line out and put the filename in the streamlist below.
         # print(wget.download(iptmovieurl, ('m3u/iptmovies.m3u'))) #if not
         # downloading comment out this line.
-        input_m3u: str = config.get("paths", "input_m3u")
+        input_m3u: str = config.get("paths", "input_m3u", fallback="")
         if input_m3u.startswith("http"):
             log.write_to_log(f"Downloading M3U from {input_m3u}...")
             try:
+                import wget  # Imported lazily, local playlists never need it
+
                 local_m3u_path: str = "m3u/downloaded.m3u"  # Temporary local path
                 wget.download(input_m3u, local_m3u_path)
                 log.write_to_log("Download complete.")
@@ -69,7 +158,10 @@ def main() -> None:
                 return
         elif not input_m3u.startswith("/") and not input_m3u.startswith("C:\\"):
             input_m3u = f"m3u/{input_m3u}"
-        apollomovies = streamClasses.rawStreamList(config, log_level=log_level)
+        apollomovies = streamClasses.rawStreamList(
+            config, log_level=log_level, started_at=_STARTED_AT, resume=args.resume, shard=args.shard,
+            run_id=args.run_id or "",
+        )
         apollomovies.delete_downloaded_m3u()
 
 
@@ -0,0 +1,159 @@
+# metadata.py
+"""Offline metadata index used to write .nfo files next to stream files.
+
+The index is built once from a local bulk dataset such as IMDb's
+``title.basics.tsv(.gz)`` into a SQLite file keyed by normalized title,
+year and kind. Lookups go through the primary-key B-tree, so they stay
+O(log n) without loading the dataset into memory.
+"""
+import gzip
+import os
+import sqlite3
+from typing import Dict, Iterator, Optional, Tuple
+
+import tools
+
+# IMDb titleType values mapped to the kinds the converter writes
+_TITLE_KINDS: Dict[str, str] = {
+    "movie": "movie",
+    "tvMovie": "movie",
+    "video": "movie",
+    "tvSpecial": "movie",
+    "tvSeries": "tvshow",
+    "tvMiniSeries": "tvshow",
+}
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS titles (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    imdb_id TEXT NOT NULL,
+    PRIMARY KEY (kind, key, year)
+) WITHOUT ROWID
+"""
+
+_BATCH_SIZE: int = 50000
+
+
+def _open_dataset(path: str) -> Iterator[str]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="\n") as f:
+        yield from f
+
+
+def _dataset_rows(path: str) -> Iterator[Tuple[str, str, int, str]]:
+    """Streams (kind, key, year, imdb_id) rows from a title.basics.tsv file."""
+    lines: Iterator[str] = _open_dataset(path)
+    next(lines, None)  # Header
+    for line in lines:
+        fields = line.rstrip("\n").split("\t")
+        if len(fields) < 6:
+            continue
+        kind: Optional[str] = _TITLE_KINDS.get(fields[1])
+        if not kind:
+            continue
+        year: int = int(fields[5]) if fields[5].isdigit() else 0  # "\N" when unknown
+        primary: str = tools.normalizeTitle(fields[2])
+        yield kind, primary, year, fields[0]
+        original: str = tools.normalizeTitle(fields[3])
+        if original != primary:
+            yield kind, original, year, fields[0]
+
+
+def build_index(dataset_path: str, index_path: str) -> int:
+    """Builds (or rebuilds) the SQLite index from a bulk dataset.
+
+    The first row seen for a title/year/kind wins; IMDb files are sorted by
+    ID, so that is the oldest entry.
+
+    Returns:
+        int: Number of rows in the finished index.
+    """
+    temp_path: str = f"{index_path}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    connection = sqlite3.connect(temp_path)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("PRAGMA cache_size = -200000")  # ~200 MB page cache while building
+        connection.execute(_SCHEMA)
+        batch = []
+        for row in _dataset_rows(dataset_path):
+            batch.append(row)
+            if len(batch) >= _BATCH_SIZE:
+                connection.executemany("INSERT OR IGNORE INTO titles VALUES (?, ?, ?, ?)", batch)
+                batch.clear()
+        connection.executemany("INSERT OR IGNORE INTO titles VALUES (?, ?, ?, ?)", batch)
+        connection.commit()
+        count: int = connection.execute("SELECT COUNT(*) FROM titles").fetchone()[0]
+        connection.execute("VACUUM")
+    finally:
+        connection.close()
+    os.replace(temp_path, index_path)  # Readers never see a half-built index
+    return count
+
+
+class MetadataIndex:
+    """Read-only lookups against an index built by build_index."""
+
+    def __init__(self, index_path: str) -> None:
+        self.connection = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True, check_same_thread=False)
+        self._cache: Dict[Tuple[str, str, Optional[int]], Optional[str]] = {}
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def lookup(self, title: str, year: Optional[str] = None, kind: str = "movie") -> Optional[str]:
+        """Finds the IMDb ID for a title.
+
+        With a year, an exact match is tried first and then one year either
+        side (release vs. premiere dates often differ). Without one, the
+        most recent title with that name is used.
+        """
+        year_value: Optional[int] = int(year.strip("()")) if year and year.strip("()").isdigit() else None
+        cache_key = (kind, tools.normalizeTitle(title), year_value)
+        if cache_key in self._cache:  # Episodes of one show repeat the same lookup
+            return self._cache[cache_key]
+        result: Optional[Tuple[str]] = None
+        if year_value is not None:
+            for candidate in (year_value, year_value - 1, year_value + 1):
+                result = self.connection.execute(
+                    "SELECT imdb_id FROM titles WHERE kind = ? AND key = ? AND year = ?",
+                    (kind, cache_key[1], candidate),
+                ).fetchone()
+                if result:
+                    break
+        else:
+            result = self.connection.execute(
+                "SELECT imdb_id FROM titles WHERE kind = ? AND key = ? ORDER BY year DESC LIMIT 1",
+                (kind, cache_key[1]),
+            ).fetchone()
+        imdb_id: Optional[str] = result[0] if result else None
+        self._cache[cache_key] = imdb_id
+        return imdb_id
+
+
+def write_nfo(directory: str, kind: str, imdb_id: str, title: str, year: Optional[str] = None) -> Optional[str]:
+    """Writes movie.nfo or tvshow.nfo into a directory unless it already exists.
+
+    Returns:
+        str: The path written, or None if an NFO was already there.
+    """
+    root: str = "movie" if kind == "movie" else "tvshow"
+    filename: str = os.path.join(directory, f"{root}.nfo")
+    if os.path.exists(filename):
+        return None
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+        f"<{root}>",
+        f"    <title>{tools.escapeXml(title.strip())}</title>",
+    ]
+    if year and year.strip("()").isdigit():
+        lines.append(f"    <year>{year.strip('()')}</year>")
+    lines.append(f'    <uniqueid type="imdb" default="true">{imdb_id}</uniqueid>')
+    lines.append(f"</{root}>")
+    with open(filename, "w", encoding="utf-8") as nfofile:
+        nfofile.write("\n".join(lines) + "\n")
+    return filename
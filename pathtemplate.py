@@ -0,0 +1,172 @@
+# pathtemplate.py
+"""Output path templates, compiled once into Python functions.
+
+A template is a relative path such as
+``{show}/[Season {season:02}/]{show}[ - S{season:02}E{episode:02}][ - {resolution}]``:
+
+* ``{field}`` inserts a value; ``{field:spec}`` applies a format spec, with
+  numeric strings formatted as integers (``{season:02}`` turns "1" into "01").
+  Any value may be numeric, so a spec must suit both text and integers.
+* ``[...]`` is an optional segment, dropped unless every field in it has a value.
+  Fields that can be empty (an episode numbered by air date has no season)
+  must sit in one, so they can never leave a "Season /" directory behind.
+* ``/`` separates directories.
+* ``[[``, ``]]``, ``{{`` and ``}}`` stand for literal brackets and braces.
+
+Field values are stripped and the rendered path is sanitized for file
+names (``:`` to ``-``, ``*`` and ``/`` to ``_``, ``?`` and ``#`` removed) in
+one pass. The template's own ``/`` separators are kept apart from the
+values while sanitizing, so a value can never add a directory level.
+Compiling generates one function per template, so rendering is a handful
+of string concatenations.
+"""
+import functools
+from typing import Callable, FrozenSet, List, Mapping, Optional, Tuple, Union
+
+# Parsed nodes: a literal string, a (field, spec) tuple, or a list for an optional segment
+_Node = Union[str, Tuple[str, str], list]
+
+
+_SEPARATOR: str = "\x00"  # Stands in for template separators while the path is sanitized
+_MARKER: str = "\x01"  # Stands in for a field value to find where the field is rendered
+
+
+def clean(text: str) -> str:
+    """Makes text safe to use in a file name."""
+    # Chained replace beats str.translate by ~5x on short strings
+    return text.replace(":", "-").replace("*", "_").replace("/", "_").replace("?", "").replace("#", "")
+
+
+def _format(value: str, spec: str) -> str:
+    if not value:
+        return ""
+    return format(int(value), spec) if value.isdigit() else format(value, spec)
+
+
+def _parse(template: str, fields: FrozenSet[str], optional: FrozenSet[str]) -> List[_Node]:
+    """Parses a template into nodes, raising ValueError on syntax errors, unknown fields or optional fields outside [...]."""
+    stack: List[List[_Node]] = [[]]
+    position: int = 0
+    literal: List[str] = []
+
+    def flush() -> None:
+        if literal:
+            stack[-1].append("".join(literal))
+            literal.clear()
+
+    while position < len(template):
+        char: str = template[position]
+        if char in "[]{}" and template[position + 1:position + 2] == char:  # Doubled: a literal character
+            literal.append(char)
+            position += 2
+            continue
+        if char == "{":
+            end: int = template.find("}", position)
+            if end < 0:
+                raise ValueError(f"Unclosed '{{' at {position} in template {template!r}")
+            name, _, spec = template[position + 1:end].partition(":")
+            if name not in fields:
+                raise ValueError(f"Unknown field {name!r} in template {template!r}, expected one of {sorted(fields)}")
+            if name in optional and len(stack) == 1:
+                raise ValueError(
+                    f"Field {name!r} can be empty, so template {template!r} must put it in an optional [...] segment"
+                )
+            if spec:
+                try:  # Checked now rather than on the first entry it is rendered for
+                    format(0, spec)
+                    format("", spec)
+                except ValueError as e:
+                    raise ValueError(
+                        f"Format spec {spec!r} of field {name!r} in template {template!r} must suit text and numbers: {e}"
+                    ) from None
+            flush()
+            stack[-1].append((name, spec))
+            position = end + 1
+            continue
+        if char == "[":
+            flush()
+            stack.append([])
+        elif char == "]":
+            if len(stack) == 1:
+                raise ValueError(f"Unmatched ']' at {position} in template {template!r}")
+            flush()
+            segment: List[_Node] = stack.pop()
+            stack[-1].append(segment)
+        elif char == "}":
+            raise ValueError(f"Unmatched '}}' at {position} in template {template!r}")
+        else:
+            literal.append(char)
+        position += 1
+    if len(stack) != 1:
+        raise ValueError(f"Unclosed '[' in template {template!r}")
+    flush()
+    return stack[0]
+
+
+def _expression(nodes: List[_Node], used: set) -> str:
+    """Generates a Python expression concatenating the nodes."""
+    parts: List[str] = []
+    for node in nodes:
+        if isinstance(node, str):
+            parts.append(repr(node.replace("/", _SEPARATOR)))
+        elif isinstance(node, tuple):
+            name, spec = node
+            used.add(name)
+            parts.append(f"_format(f_{name}, {spec!r})" if spec else f"f_{name}")
+        else:
+            inner_used: set = set()
+            inner: str = _expression(node, inner_used)
+            used.update(inner_used)
+            condition: str = " and ".join(f"f_{name}" for name in sorted(inner_used)) or "True"
+            parts.append(f"(({inner}) if {condition} else '')")
+    return " + ".join(parts) or "''"
+
+
+class PathTemplate:
+    """A compiled output path template."""
+
+    def __init__(self, template: str, fields: FrozenSet[str], optional: FrozenSet[str] = frozenset()) -> None:
+        """Parses and compiles a template.
+
+        Args:
+            template: Template text, see the module docstring.
+            fields: Field names the template may use.
+            optional: Fields that can be empty, only allowed inside [...].
+
+        Raises:
+            ValueError: On a syntax error, an unknown field or an optional
+                field outside [...].
+        """
+        self.template: str = template
+        used: set = set()
+        expression: str = _expression(_parse(template, fields, optional), used)
+        self.fields: FrozenSet[str] = frozenset(used)
+        source: str = "def render(values):\n"
+        for name in sorted(used):
+            source += f"    f_{name} = (values.get({name!r}) or '').strip()\n"
+        source += f"    return _clean({expression}).replace({_SEPARATOR!r}, '/')\n"
+        namespace: dict = {"_format": _format, "_clean": clean}
+        exec(compile(source, f"<template {template!r}>", "exec"), namespace)
+        self._render: Callable[[Mapping[str, Optional[str]]], str] = namespace["render"]
+
+    def render(self, values: Mapping[str, Optional[str]]) -> str:
+        """Renders the template for one entry's field values; missing or None values are empty."""
+        return self._render(values)
+
+    def directory_of(self, field: str, values: Mapping[str, Optional[str]]) -> str:
+        """Returns the rendered path up to the directory named with the field's first use.
+
+        When the field is only used in the file name, that is the file's
+        directory; "" stands for the root.
+        """
+        marked: str = self._render({**values, field: _MARKER})
+        position: int = marked.find(_MARKER)
+        segments: List[str] = self._render(values).split("/")
+        depth: int = marked.count("/", 0, position) + 1 if position >= 0 else len(segments)
+        return "/".join(segments[:min(depth, len(segments) - 1)])
+
+
+@functools.lru_cache(maxsize=None)
+def compile_template(template: str, fields: FrozenSet[str], optional: FrozenSet[str] = frozenset()) -> PathTemplate:
+    """Returns the compiled template, compiling each distinct template only once."""
+    return PathTemplate(template, fields, optional)
@@ -0,0 +1,140 @@
+# probe.py
+"""Concurrent health checks for stream URLs.
+
+Each URL is checked with a HEAD request, falling back to a one-byte ranged
+GET for servers that refuse HEAD. Requests run on asyncio through
+httppool, which keeps connections to each host alive and bounds
+concurrency and request rate per host. Results are kept in a JSON cache,
+so later runs only probe new or expired URLs.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin
+
+import httppool
+
+_MAX_REDIRECTS: int = 3
+_HEAD_REFUSED: set = {400, 403, 405, 501}  # Statuses that mean "try a ranged GET instead"
+
+
+class ProbeResult(NamedTuple):
+    """Outcome of probing one URL."""
+
+    alive: bool
+    status: int  # Final HTTP status after redirects, 0 if no response was received
+    checked_at: float
+    error: str = ""
+
+
+class ProbeCache:
+    """Probe results persisted as JSON and reused until they are older than the TTL."""
+
+    def __init__(self, path: str, ttl: float) -> None:
+        """Initializes ProbeCache object.
+
+        Args:
+            path: JSON cache file.
+            ttl: Seconds a result stays valid.
+        """
+        self.path: str = path
+        self.ttl: float = ttl
+        self._results: Dict[str, ProbeResult] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for url, values in json.load(f).items():
+                    self._results[url] = ProbeResult(*values)
+        except (FileNotFoundError, ValueError, TypeError):
+            pass  # Missing or unreadable cache: everything is probed again
+
+    def get(self, url: str) -> Optional[ProbeResult]:
+        """Returns the cached result for a URL if it has not expired."""
+        result: Optional[ProbeResult] = self._results.get(url)
+        if result and time.time() - result.checked_at < self.ttl:
+            return result
+        return None
+
+    def put(self, url: str, result: ProbeResult) -> None:
+        """Stores a result. Network errors are not cached, so those URLs are retried next run."""
+        if result.status:
+            self._results[url] = result
+
+    def save(self) -> None:
+        """Writes the unexpired results back to disk."""
+        now: float = time.time()
+        fresh = {url: list(result) for url, result in self._results.items() if now - result.checked_at < self.ttl}
+        directory: str = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path: str = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(fresh, f)
+        os.replace(temp_path, self.path)
+
+
+class UrlProber:
+    """Probes URLs concurrently over per-host connection pools."""
+
+    def __init__(self, per_host: int = 4, rate: float = 0.0, timeout: float = 10.0, concurrency: int = 64) -> None:
+        """Initializes UrlProber object.
+
+        Args:
+            per_host: Concurrent requests (and pooled connections) per host.
+            rate: Request starts per second per host, 0 for no limit.
+            timeout: Seconds allowed for each request.
+            concurrency: URLs in flight across all hosts.
+        """
+        self.per_host: int = per_host
+        self.rate: float = rate
+        self.timeout: float = timeout
+        self.concurrency: int = max(1, concurrency)
+
+    @classmethod
+    def from_config(cls, config) -> "UrlProber":
+        """Builds a prober from the ``[probe]`` section."""
+        return cls(
+            per_host=config.getint("probe", "per_host", fallback=4),
+            rate=config.getfloat("probe", "rate", fallback=0.0),
+            timeout=config.getfloat("probe", "timeout", fallback=10.0),
+            concurrency=config.getint("probe", "concurrency", fallback=64),
+        )
+
+    def run(self, urls: Iterable[str]) -> Dict[str, ProbeResult]:
+        """Probes URLs from synchronous code."""
+        return asyncio.run(self.probe_all(urls))
+
+    async def probe_all(self, urls: Iterable[str]) -> Dict[str, ProbeResult]:
+        """Probes URLs with at most `concurrency` in flight."""
+        pool = httppool.HttpPool(self.per_host, self.rate, self.timeout)
+        try:
+            return dict(await httppool.run_bounded(
+                dict.fromkeys(urls), lambda url: self.probe(pool, url), self.concurrency
+            ))
+        finally:
+            pool.close()
+
+    async def probe(self, pool: httppool.HttpPool, url: str) -> ProbeResult:
+        """Probes one URL, following redirects."""
+        current: str = url.strip()
+        status: int = 0
+        try:
+            for _ in range(_MAX_REDIRECTS + 1):
+                status, location = await self._check(pool, current, "HEAD")
+                if status in _HEAD_REFUSED:
+                    status, location = await self._check(pool, current, "GET")
+                if 300 <= status < 400 and location:
+                    current = urljoin(current, location)
+                    continue
+                break
+        except httppool.CONNECTION_ERRORS as e:
+            return ProbeResult(False, 0, time.time(), str(e) or type(e).__name__)
+        # 416: the server rejected the range, so the resource exists
+        return ProbeResult(200 <= status < 400 or status == 416, status, time.time())
+
+    async def _check(self, pool: httppool.HttpPool, url: str, method: str) -> Tuple[int, Optional[str]]:
+        """Sends one probe request and returns (status, Location header)."""
+        headers: Dict[str, str] = {"Range": "bytes=0-0"} if method == "GET" else {}
+        response: httppool.Response = await pool.request(url, method, headers)
+        return response.status, response.headers.get("location")
@@ -0,0 +1,202 @@
+# refresh.py
+"""Targeted media-server library refresh for the directories a run changed.
+
+Instead of a full library scan, each configured server is told about the
+directories that actually received new files. Paths are de-duplicated,
+collapsed to their parent when a directory has many changed children, and
+sent in batches. Failed requests are retried with exponential backoff.
+"""
+import base64
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, Iterable, List, Optional, Set
+
+KINDS: tuple = ("jellyfin", "kodi")
+
+
+def coalesce(directories: Iterable[str], max_siblings: int, roots: Iterable[str] = ()) -> List[str]:
+    """Reduces a set of changed directories to the fewest paths that cover them.
+
+    Directories below another listed directory are dropped. When more than
+    `max_siblings` directories share a parent, the parent is listed instead.
+    This repeats up the tree but never goes above one of `roots`. Relative
+    paths are made absolute first, since a server cannot resolve them.
+
+    Returns:
+        list: Sorted absolute directories to refresh.
+    """
+    roots_set: Set[str] = {os.path.abspath(root) for root in roots}
+    paths: Set[str] = {os.path.abspath(directory) for directory in directories}
+    changed: bool = True
+    while changed and max_siblings > 0:
+        changed = False
+        children: Dict[str, List[str]] = {}
+        for path in paths:
+            if path in roots_set:
+                continue
+            parent: str = os.path.dirname(path)
+            if parent != path and (not roots_set or any(
+                parent == root or parent.startswith(root + os.sep) for root in roots_set
+            )):
+                children.setdefault(parent, []).append(path)
+        for parent, siblings in children.items():
+            if len(siblings) > max_siblings:
+                paths.difference_update(siblings)
+                paths.add(parent)
+                changed = True
+    covered: List[str] = []
+    for path in sorted(paths):  # Parents sort before their children
+        if covered and (path == covered[-1] or path.startswith(covered[-1].rstrip(os.sep) + os.sep)):
+            continue
+        covered.append(path)
+    return covered
+
+
+class MediaServer:
+    """One Jellyfin or Kodi server to notify about changed directories."""
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        url: str,
+        api_key: str = "",
+        username: str = "",
+        password: str = "",
+        local_prefix: str = "",
+        remote_prefix: str = "",
+        targets: Optional[Set[str]] = None,
+        batch_size: int = 50,
+        max_siblings: int = 20,
+        retries: int = 3,
+        backoff: float = 1.0,
+        timeout: float = 30.0,
+    ) -> None:
+        """Initializes MediaServer object.
+
+        Args:
+            kind: "jellyfin" (also Emby) or "kodi".
+            url: Server base URL, e.g. http://jellyfin:8096 or http://kodi:8080.
+            local_prefix: Path prefix as written by the converter...
+            remote_prefix: ...and the same location as the server sees it.
+            targets: Output target names this server indexes; None for all.
+            batch_size: Paths per request.
+            max_siblings: Changed siblings above which their parent is refreshed instead.
+            retries: Attempts after the first failed one.
+            backoff: Seconds before the first retry, doubled for each further one.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown media server kind {kind!r} for {name!r}, expected one of {KINDS}")
+        self.name: str = name
+        self.kind: str = kind
+        self.url: str = url.rstrip("/")
+        self.api_key: str = api_key
+        self.username: str = username
+        self.password: str = password
+        self.local_prefix: str = local_prefix
+        self.remote_prefix: str = remote_prefix
+        self.targets: Optional[Set[str]] = targets
+        self.batch_size: int = max(1, batch_size)
+        self.max_siblings: int = max_siblings
+        self.retries: int = retries
+        self.backoff: float = backoff
+        self.timeout: float = timeout
+
+    @classmethod
+    def from_config(cls, config) -> List["MediaServer"]:
+        """Builds one server per ``[refresh.<name>]`` section."""
+        servers: List[MediaServer] = []
+        for section in config.sections():
+            if not section.startswith("refresh."):
+                continue
+            targets: str = config.get(section, "targets", fallback="")
+            servers.append(
+                cls(
+                    name=section[len("refresh."):],
+                    kind=config.get(section, "kind", fallback="jellyfin"),
+                    url=config.get(section, "url"),
+                    api_key=config.get(section, "api_key", fallback=""),
+                    username=config.get(section, "username", fallback=""),
+                    password=config.get(section, "password", fallback=""),
+                    local_prefix=config.get(section, "local_prefix", fallback=""),
+                    remote_prefix=config.get(section, "remote_prefix", fallback=""),
+                    targets={name.strip() for name in targets.split(",") if name.strip()} or None,
+                    batch_size=config.getint(section, "batch_size", fallback=50),
+                    max_siblings=config.getint(section, "coalesce_siblings", fallback=20),
+                    retries=config.getint(section, "retries", fallback=3),
+                    backoff=config.getfloat(section, "backoff", fallback=1.0),
+                    timeout=config.getfloat(section, "timeout", fallback=30.0),
+                )
+            )
+        return servers
+
+    def remotePath(self, path: str) -> str:
+        """Translates a local path to the path the server sees.
+
+        The local prefix only matches whole path components, so a prefix of
+        /media/tv leaves /media/tv2 alone.
+        """
+        if not self.local_prefix:
+            return path
+        prefix: str = os.path.abspath(self.local_prefix).rstrip(os.sep)
+        if path != prefix and not path.startswith(prefix + os.sep):
+            return path
+        return self.remote_prefix.rstrip("/\\") + path[len(prefix):]
+
+    def notify(self, directories: Iterable[str], roots: Iterable[str] = ()) -> List[str]:
+        """Asks the server to rescan the given directories.
+
+        Returns:
+            list: The (server-side) paths that were sent.
+
+        Raises:
+            urllib.error.URLError: If a batch still fails after all retries.
+        """
+        paths: List[str] = [self.remotePath(path) for path in coalesce(directories, self.max_siblings, roots)]
+        for start in range(0, len(paths), self.batch_size):
+            batch: List[str] = paths[start:start + self.batch_size]
+            if self.kind == "jellyfin":
+                self._post(
+                    "/Library/Media/Updated",
+                    {"Updates": [{"Path": path, "UpdateType": "Modified"} for path in batch]},
+                )
+            else:
+                # A JSON-RPC batch: one VideoLibrary.Scan per directory in a single request
+                self._post(
+                    "/jsonrpc",
+                    [
+                        {
+                            "jsonrpc": "2.0",
+                            "id": start + offset,
+                            "method": "VideoLibrary.Scan",
+                            "params": {"directory": path.rstrip("/") + "/", "showdialogs": False},
+                        }
+                        for offset, path in enumerate(batch)
+                    ],
+                )
+        return paths
+
+    def _post(self, endpoint: str, payload) -> None:
+        headers: Dict[str, str] = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["X-Emby-Token"] = self.api_key
+        if self.username:
+            credentials: bytes = f"{self.username}:{self.password}".encode("utf-8")
+            headers["Authorization"] = "Basic " + base64.b64encode(credentials).decode("ascii")
+        body: bytes = json.dumps(payload).encode("utf-8")
+        for attempt in range(self.retries + 1):
+            request = urllib.request.Request(self.url + endpoint, data=body, headers=headers, method="POST")
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response.read()
+                return
+            except urllib.error.HTTPError as e:
+                if (e.code < 500 and e.code != 429) or attempt == self.retries:  # Client errors won't improve
+                    raise
+            except (urllib.error.URLError, OSError):
+                if attempt == self.retries:
+                    raise
+            time.sleep(self.backoff * 2 ** attempt)
@@ -0,0 +1,382 @@
+# service.py
+"""Resident conversion service.
+
+Keeps one interpreter warm and accepts conversion jobs over a small HTTP
+API on a TCP port or a Unix socket. Config, loggers, the tag matcher,
+show indexes and metadata indexes are loaded once and shared by every
+job. Job progress and results are streamed back as NDJSON.
+
+API:
+    POST /jobs          {"source": ..., "output_dir": ..., "options": {section: {key: value}}}
+                        streams the job's events until it finishes
+    GET  /jobs/<id>     streams the events of a known job; once it has finished
+                        and nobody is following it, only its summary is kept
+                        (queued, started and done or error, without results)
+    GET  /health        {"status": "ok", "queued": n}
+"""
+import collections
+import configparser
+import http.client
+import http.server
+import itertools
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import logger
+import streamClasses
+
+Address = Union[Tuple[str, int], str]  # (host, port) or Unix socket path
+
+_PER_FILE_EVENTS: Tuple[str, ...] = ("result", "progress")  # Dropped from finished jobs' history
+
+
+class JobRejected(Exception):
+    """Raised when a job cannot be accepted; carries the HTTP status to reply with."""
+
+    def __init__(self, status: int, reason: str) -> None:
+        super().__init__(reason)
+        self.status: int = status
+        self.reason: str = reason
+
+
+class ConversionJob:
+    """A queued or running conversion and the events it has produced so far."""
+
+    def __init__(
+        self, job_id: str, source: str, output_dir: str, options: Dict[str, Dict[str, str]]
+    ) -> None:
+        self.job_id: str = job_id
+        self.source: str = source
+        self.output_dir: str = output_dir
+        self.options: Dict[str, Dict[str, str]] = options
+        self.events: List[Dict[str, Any]] = []
+        self.done: bool = False
+        self._followers: int = 0
+        self._condition: threading.Condition = threading.Condition()
+
+    def same_request(self, output_dir: str, options: Dict[str, Dict[str, str]]) -> bool:
+        """Whether another submission asks for exactly this conversion."""
+        return self.output_dir == output_dir and self.options == options
+
+    def publish(self, event: Dict[str, Any], final: bool = False) -> None:
+        """Records an event and wakes every follower."""
+        with self._condition:
+            self.events.append(dict(event, job=self.job_id))
+            self.done = self.done or final
+            self._trim()
+            self._condition.notify_all()
+
+    def _trim(self) -> None:
+        """Drops per-file events once the job is done and every follower has them; call with the lock held.
+
+        Finished jobs are kept for GET /jobs/<id>, so without this each one
+        would hold an event for every file it wrote.
+        """
+        if self.done and not self._followers:
+            self.events = [event for event in self.events if event["event"] not in _PER_FILE_EVENTS]
+
+    def follow(self) -> Iterator[Dict[str, Any]]:
+        """Yields all past events, then new ones as they arrive, until the job ends."""
+        position: int = 0
+        with self._condition:
+            self._followers += 1
+        try:
+            while True:
+                with self._condition:
+                    while position == len(self.events) and not self.done:
+                        self._condition.wait()
+                    pending: List[Dict[str, Any]] = self.events[position:]
+                    finished: bool = self.done
+                position += len(pending)
+                yield from pending
+                if finished and position == len(self.events):
+                    return
+        finally:
+            with self._condition:
+                self._followers -= 1
+                self._trim()
+
+
+class ConversionService:
+    """Runs conversion jobs from a bounded queue on a warm worker thread.
+
+    Duplicate submissions for a source that is already queued or running
+    are coalesced onto the existing job when they ask for the same output,
+    and rejected when they conflict with it.
+    """
+
+    def __init__(
+        self,
+        config: configparser.ConfigParser,
+        log_level: logger.LogLevel,
+        max_queue: int = 16,
+        history: int = 100,
+    ) -> None:
+        self.config: configparser.ConfigParser = config
+        self.log_level: logger.LogLevel = log_level
+        self.log = logger.Logger(__file__, log_level=log_level)
+        self.jobs: "collections.OrderedDict[str, ConversionJob]" = collections.OrderedDict()
+        self.history: int = history
+        self._active: Dict[str, ConversionJob] = {}  # source key -> queued or running job
+        self._queue: "queue.Queue[ConversionJob]" = queue.Queue(maxsize=max_queue)
+        self._lock: threading.Lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._warm: Dict[tuple, Any] = {}  # Objects shared by every job's rawStreamList, see its `warm`
+        self._worker: threading.Thread = threading.Thread(
+            target=self._work, name="conversion-worker", daemon=True
+        )
+        self._worker.start()
+
+    @staticmethod
+    def source_key(source: str) -> str:
+        """Normalizes a source so the same playlist is recognised however it is spelled."""
+        if source.startswith("http://") or source.startswith("https://"):
+            return source
+        return os.path.realpath(source)
+
+    def queued(self) -> int:
+        """Number of jobs waiting for the worker."""
+        return self._queue.qsize()
+
+    def submit(
+        self,
+        source: str,
+        output_dir: str,
+        options: Optional[Dict[str, Dict[str, str]]] = None,
+    ) -> Tuple[ConversionJob, bool]:
+        """Queues a job, or returns the matching active job for the same source.
+
+        Returns:
+            tuple: The job and whether the submission was coalesced onto it.
+
+        Raises:
+            JobRejected: On a conflicting duplicate or when the queue is full.
+        """
+        options = {
+            section: {key: str(value) for key, value in values.items()}
+            for section, values in (options or {}).items()
+        }
+        key: str = self.source_key(source)
+        with self._lock:
+            active: Optional[ConversionJob] = self._active.get(key)
+            if active:
+                if active.same_request(output_dir, options):
+                    return active, True
+                raise JobRejected(409, f"job {active.job_id} for this source is already active")
+            job = ConversionJob(str(next(self._ids)), source, output_dir, options)
+            job.publish({"event": "queued", "source": source})
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise JobRejected(503, "job queue is full") from None
+            self._active[key] = job
+            self.jobs[job.job_id] = job
+            while len(self.jobs) > self.history:
+                self.jobs.popitem(last=False)
+        self.log.write_to_log(f"Queued job {job.job_id} for {source}")
+        return job, False
+
+    def _job_config(self, job: ConversionJob) -> configparser.ConfigParser:
+        """Builds the config for a job from the warm base config and its overrides.
+
+        Values are copied raw into a non-interpolating parser, so a "%" in a
+        source URL, path or option is kept as written.
+        """
+        config = configparser.ConfigParser(interpolation=None)
+        config.read_dict({section: dict(self.config.items(section, raw=True)) for section in self.config.sections()})
+        config.read_dict(job.options)
+        if not config.has_section("paths"):
+            config.add_section("paths")
+        config["paths"]["input_m3u"] = job.source
+        config["paths"]["output_dir"] = job.output_dir
+        return config
+
+    def _work(self) -> None:
+        while True:
+            job: ConversionJob = self._queue.get()
+            try:
+                self._run(job)
+            finally:
+                with self._lock:
+                    self._active.pop(self.source_key(job.source), None)
+                self._queue.task_done()
+
+    def _run(self, job: ConversionJob) -> None:
+        job.publish({"event": "started"})
+        progress: Dict[str, int] = {"total": 0, "step": 1, "next": 0}
+
+        def on_total(total: int) -> None:
+            progress["total"] = total
+            progress["step"] = max(1, total // 100)  # At most ~100 progress events per job
+            job.publish({"event": "progress", "line": 0, "total": total})
+
+        def on_update(line: int) -> None:
+            if line >= progress["next"]:
+                progress["next"] = line + progress["step"]
+                job.publish({"event": "progress", "line": line, "total": progress["total"]})
+
+        try:
+            stream_list = streamClasses.rawStreamList(
+                self._job_config(job),
+                self.log_level,
+                warm=self._warm,
+                progress_total=on_total,
+                progress_update=on_update,
+                result_listener=lambda result: job.publish(
+                    {
+                        "event": "result",
+                        "file": result.filename,
+                        "kind": result.kind,
+                        "title": result.title,
+                        "group": result.group,
+                        "target": result.target,
+                    }
+                ),
+            )
+        except Exception as e:
+            self.log.write_to_log(f"Job {job.job_id} failed: {e}")
+            job.publish({"event": "error", "error": str(e)}, final=True)
+            return
+        self.log.write_to_log(f"Job {job.job_id} finished with {len(stream_list.streams)} files")
+        job.publish({"event": "done", "files": len(stream_list.streams)}, final=True)
+
+
+class _ServiceRequestHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP front end for a ConversionService, shared by TCP and Unix servers."""
+
+    server_version = "m3u_to_strm"
+
+    @property
+    def service(self) -> ConversionService:
+        return self.server.service  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args: Any) -> None:
+        self.service.log.write_to_log("service: " + format % args)
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        payload: bytes = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream_events(self, job: ConversionJob, first: Dict[str, Any]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()  # No length: the stream ends when the connection closes
+        events: Iterator[Dict[str, Any]] = job.follow()
+        try:
+            self.wfile.write((json.dumps(first) + "\n").encode("utf-8"))
+            for event in events:
+                self.wfile.write((json.dumps(event) + "\n").encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client went away, the job keeps running
+        finally:
+            events.close()  # Stops following right away, so the job's history can be trimmed
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "queued": self.service.queued()})
+            return
+        if self.path.startswith("/jobs/"):
+            job: Optional[ConversionJob] = self.service.jobs.get(self.path[len("/jobs/"):])
+            if job:
+                self._stream_events(job, {"event": "following", "job": job.job_id})
+                return
+        self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        if self.path != "/jobs":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length: int = int(self.headers.get("Content-Length", "0"))
+            request: Dict[str, Any] = json.loads(self.rfile.read(length) or b"{}")
+            source: str = request["source"]
+            output_dir: str = request.get("output_dir") or self.service.config.get(
+                "paths", "output_dir", fallback="streams"
+            )
+            job, coalesced = self.service.submit(source, output_dir, request.get("options"))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self._send_json(400, {"error": f"invalid job request: {e}"})
+            return
+        except JobRejected as e:
+            self._send_json(e.status, {"error": e.reason})
+            return
+        self._stream_events(job, {"event": "accepted", "job": job.job_id, "coalesced": coalesced})
+
+
+class _TCPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self) -> Tuple[socket.socket, Tuple[str, int]]:
+        request, _ = super().get_request()
+        return request, ("local", 0)  # BaseHTTPRequestHandler expects a (host, port) pair
+
+
+def make_server(service: ConversionService, address: Address) -> socketserver.BaseServer:
+    """Creates (but does not start) a server for the service on a TCP address or Unix socket path."""
+    if isinstance(address, str):
+        if os.path.exists(address):
+            os.remove(address)  # Stale socket from a previous run
+        server: socketserver.BaseServer = _UnixServer(address, _ServiceRequestHandler)
+    else:
+        server = _TCPServer(address, _ServiceRequestHandler)
+    server.service = service  # type: ignore[attr-defined]
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: Optional[float] = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path: str = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def _connect(address: Address, timeout: Optional[float]) -> http.client.HTTPConnection:
+    if isinstance(address, str):
+        return _UnixHTTPConnection(address, timeout=timeout)
+    return http.client.HTTPConnection(address[0], address[1], timeout=timeout)
+
+
+def submit_job(
+    address: Address,
+    source: str,
+    output_dir: Optional[str] = None,
+    options: Optional[Dict[str, Dict[str, str]]] = None,
+    timeout: Optional[float] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Local client: submits a job and yields its NDJSON events as dicts.
+
+    Raises:
+        JobRejected: If the service refuses the job.
+    """
+    connection = _connect(address, timeout)
+    body: bytes = json.dumps(
+        {"source": source, "output_dir": output_dir, "options": options or {}}
+    ).encode("utf-8")
+    try:
+        connection.request("POST", "/jobs", body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        if response.status != 200:
+            raise JobRejected(response.status, json.loads(response.read()).get("error", ""))
+        for line in response:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        connection.close()
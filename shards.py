@@ -0,0 +1,277 @@
+# shards.py
+"""Sharded runs: deterministic shard assignment, lease files and manifests.
+
+A run started with ``--shard i/N`` writes only the entries whose identity
+(normalized show name or movie title) hashes to shard i. Every variant of
+a show therefore lands on the same shard, and shards never write into
+each other's show or movie directories. Workers may run on different
+hosts that share the output root, for example over NFS.
+
+Coordination happens through lease files in ``<output_root>/.m3u_to_strm.locks``.
+A lease is created with O_EXCL, records its owner and an expiry time, and
+is renewed while held. A lease that is past its expiry belongs to a worker
+that died, and may be broken by the next worker that wants it. Each shard
+writes a manifest of its files and stats, tagged with the run ID that all
+workers of a run are given. ``--merge-shards`` combines the manifests of
+one run and sends one media-server refresh for the whole run.
+"""
+import json
+import os
+import time
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LOCK_DIR: str = ".m3u_to_strm.locks"
+MANIFEST_DIR: str = ".m3u_to_strm.shards"
+MERGED_MANIFEST: str = ".m3u_to_strm.manifest.json"
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parses "i/N" (0 <= i < N) into (i, N).
+
+    Raises:
+        ValueError: If the value is malformed or out of range.
+    """
+    index, _, count = value.partition("/")
+    if not (index.isdigit() and count.isdigit()) or not 0 <= int(index) < int(count):
+        raise ValueError(f"expected a shard as i/N with 0 <= i < N, got {value!r}")
+    return int(index), int(count)
+
+
+def shard_of(key: str, count: int) -> int:
+    """Returns the shard for an identity key; CRC-32 is the same on every host and Python process."""
+    return zlib.crc32(key.encode("utf-8", "surrogateescape")) % count
+
+
+def shard_name(shard: Tuple[int, int]) -> str:
+    return f"shard-{shard[0]}-of-{shard[1]}"
+
+
+class LeaseLost(RuntimeError):
+    """Raised when a held lease was broken by another worker."""
+
+
+class Lease:
+    """An expiring lock file that works across processes and hosts sharing a filesystem."""
+
+    def __init__(self, path: str, ttl: float = 300.0) -> None:
+        """Initializes Lease object.
+
+        Args:
+            path: Lease file location.
+            ttl: Seconds a lease stays valid without renewal. Keep it well
+                above the time between renewals, and above clock skew
+                between hosts.
+        """
+        import socket  # Imported here so unsharded runs do not pay for it at start-up
+        import uuid
+
+        self.path: str = path
+        self.ttl: float = ttl
+        self.owner: str = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.renewed_at: float = 0.0
+
+    def _read(self, path: Optional[str] = None) -> Optional[dict]:
+        try:
+            with open(path or self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:  # Torn write by a dying owner: treat as expired
+            return {"owner": "", "expires": 0}
+
+    def _content(self) -> str:
+        return json.dumps({"owner": self.owner, "expires": time.time() + self.ttl})
+
+    def try_acquire(self) -> bool:
+        """Takes the lease if it is free or expired.
+
+        Returns:
+            bool: True if the lease is now held by this object.
+        """
+        directory: str = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            descriptor: int = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            self._break_if_expired()
+            return False
+        with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+            f.write(self._content())
+        self.renewed_at = time.monotonic()
+        return True
+
+    def _break_if_expired(self) -> None:
+        """Removes an expired lease so the next try_acquire can create a fresh one.
+
+        The lease is renamed away first; rename is atomic, so of several
+        workers breaking the same lease only one succeeds. If the file it
+        moved turns out to be a fresh lease (taken in between), it is put back.
+        """
+        import uuid
+
+        current: Optional[dict] = self._read()
+        if current is None or current.get("expires", 0) > time.time():
+            return
+        broken: str = f"{self.path}.broken.{uuid.uuid4().hex[:8]}"
+        try:
+            os.rename(self.path, broken)
+        except FileNotFoundError:
+            return
+        moved: Optional[dict] = self._read(broken)
+        if moved != current:
+            try:
+                os.link(broken, self.path)  # Fails if yet another lease was created meanwhile
+            except OSError:
+                pass
+        os.remove(broken)
+
+    def acquire(
+        self, timeout: Optional[float] = None, poll: float = 1.0, while_waiting: Optional[Callable[[], None]] = None
+    ) -> None:
+        """Waits until the lease is held, calling `while_waiting` between attempts (e.g. to renew another lease).
+
+        Raises:
+            TimeoutError: If it is still held by someone else after `timeout` seconds.
+        """
+        deadline: Optional[float] = time.monotonic() + timeout if timeout is not None else None
+        while not self.try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                holder: Optional[dict] = self._read()
+                raise TimeoutError(f"lease {self.path} is held by {(holder or {}).get('owner', 'unknown')}")
+            if while_waiting:
+                while_waiting()
+            time.sleep(poll)
+
+    def renew(self) -> None:
+        """Extends the lease by another ttl.
+
+        Raises:
+            LeaseLost: If the lease expired and was taken over by another worker.
+        """
+        current: Optional[dict] = self._read()
+        if not current or current.get("owner") != self.owner:
+            raise LeaseLost(f"lease {self.path} is now held by {(current or {}).get('owner', 'nobody')}")
+        temp_path: str = f"{self.path}.{self.owner.replace(':', '-')}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self._content())
+        os.replace(temp_path, self.path)
+        self.renewed_at = time.monotonic()
+
+    def heartbeat(self) -> None:
+        """Renews the lease once a third of its ttl has passed; cheap enough to call per entry."""
+        if time.monotonic() - self.renewed_at > self.ttl / 3:
+            self.renew()
+
+    def release(self) -> None:
+        """Gives the lease up if it is still held by this object."""
+        current: Optional[dict] = self._read()
+        if current and current.get("owner") == self.owner:
+            os.remove(self.path)
+
+
+def lock_path(output_root: str, name: str) -> str:
+    return os.path.join(output_root, LOCK_DIR, f"{name}.lease")
+
+
+def write_manifest(output_root: str, shard: Tuple[int, int], manifest: dict) -> str:
+    """Writes one shard's manifest (files written, stats, changed directories) atomically."""
+    directory: str = os.path.join(output_root, MANIFEST_DIR)
+    os.makedirs(directory, exist_ok=True)
+    path: str = os.path.join(directory, f"{shard_name(shard)}.json")
+    temp_path: str = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"shard": shard[0], "count": shard[1], **manifest}, f)
+    os.replace(temp_path, path)
+    return path
+
+
+def merge_manifests(output_root: str, run_id: Optional[str] = None) -> dict:
+    """Combines the manifests of one sharded run.
+
+    Without a run ID, the run of the newest manifest is merged. Manifests
+    of other runs are ignored, even for the same unchanged playlist, so a
+    shard that did not finish this time cannot be covered by its manifest
+    from an earlier run. The merged manifest is written next to the
+    manifest directory.
+
+    Returns:
+        dict: The merged manifest: run ID, source, count, summed stats,
+        sorted files, files written by more than one shard, and changed
+        directories and root per target.
+
+    Raises:
+        FileNotFoundError: If there are no manifests (for that run).
+        ValueError: If a shard of the run has no manifest.
+    """
+    directory: str = os.path.join(output_root, MANIFEST_DIR)
+    manifests: List[dict] = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                manifests.append(json.load(f))
+    if run_id is not None:
+        manifests = [manifest for manifest in manifests if manifest.get("run_id") == run_id]
+    if not manifests:
+        raise FileNotFoundError(f"no shard manifests{f' for run {run_id}' if run_id else ''} in {directory}")
+    latest: dict = max(manifests, key=lambda manifest: manifest["finished_at"])
+    run: List[dict] = [
+        manifest for manifest in manifests
+        if manifest.get("run_id") == latest.get("run_id")
+        and manifest["count"] == latest["count"] and manifest["source"] == latest["source"]
+    ]
+    missing: List[int] = sorted(set(range(latest["count"])) - {manifest["shard"] for manifest in run})
+    if missing:
+        raise ValueError(f"no manifest for shards {missing} of {latest['count']} in run {latest.get('run_id')}")
+    stats: Dict[str, float] = {}
+    owners: Dict[str, int] = {}
+    conflicts: set = set()
+    changed: Dict[str, set] = {}
+    roots: Dict[str, str] = {}
+    for manifest in run:
+        for key, value in manifest["stats"].items():
+            stats[key] = stats.get(key, 0) + value
+        for filename in manifest["files"]:
+            if owners.setdefault(filename, manifest["shard"]) != manifest["shard"]:
+                conflicts.add(filename)
+        for target, directories in manifest["changed"].items():
+            changed.setdefault(target, set()).update(directories)
+        roots.update(manifest["roots"])
+    merged: dict = {
+        "run_id": latest.get("run_id"),
+        "source": latest["source"],
+        "count": latest["count"],
+        "stats": stats,
+        "seconds": max(manifest["finished_at"] for manifest in run) - min(manifest["started_at"] for manifest in run),
+        "files": sorted(owners),
+        "conflicts": sorted(conflicts),
+        "changed": {target: sorted(directories) for target, directories in changed.items()},
+        "roots": roots,
+    }
+    path: str = os.path.join(output_root, MERGED_MANIFEST)
+    temp_path: str = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(merged, f)
+    os.replace(temp_path, path)
+    return merged
+
+
+def refresh_merged(servers: Iterable, merged: dict) -> Dict[str, int]:
+    """Sends one refresh per media server for the directories all shards changed.
+
+    Returns:
+        dict: Server name -> number of paths sent.
+
+    Raises:
+        OSError: If a server still fails after its retries.
+    """
+    sent: Dict[str, int] = {}
+    for server in servers:
+        targets: List[str] = [
+            target for target in merged["changed"] if server.targets is None or target in server.targets
+        ]
+        directories: set = set().union(*(merged["changed"][target] for target in targets))
+        if directories:
+            sent[server.name] = len(server.notify(directories, [merged["roots"][target] for target in targets]))
+    return sent
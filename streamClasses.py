@@ -1,13 +1,156 @@
 # streamClasses.py
-import asyncio
-import asyncio
+import functools
+import journal
 import logger
+import pathtemplate
 import os
-import requests
+import shards
 import re
+import tagmatcher
+import time
 import tools
-from typing import Optional, List, Dict
-from PyQt6.QtCore import QObject, pyqtSignal
+from typing import IO, Any, Callable, FrozenSet, NamedTuple, Optional, List, Dict, Set, Tuple, Union
+
+
+class StreamResult(NamedTuple):
+    """One stream file written for one target, as reported to result listeners."""
+
+    filename: str
+    kind: str  # "movie" or "tvshow"
+    title: str  # Movie title or canonical show name
+    group: Optional[str]  # The entry's group-title
+    target: str
+
+
+class OutputTarget:
+    """One library the parsed entries are written to: its root, layout and permissions.
+
+    Several targets can be configured as ``[target.<name>]`` sections so a
+    single run fans every parsed entry out to, e.g., a Kodi and a Jellyfin
+    library. Options missing from a target section fall back to
+    ``[paths]``/``[output_paths]``.
+    """
+
+    MOVIE_FIELDS: FrozenSet[str] = frozenset({"title", "year", "resolution", "language", "codec"})
+    TVSHOW_FIELDS: FrozenSet[str] = frozenset(
+        {"show", "season", "episode", "episode_id", "episode_title", "airdate", "resolution", "language", "codec"}
+    )
+    # Fields an entry may leave empty; templates must put them in [...] segments
+    MOVIE_OPTIONAL: FrozenSet[str] = MOVIE_FIELDS - {"title"}
+    TVSHOW_OPTIONAL: FrozenSet[str] = TVSHOW_FIELDS - {"show"}
+    # Layout presets: (movie template, TV template), relative to the movie/TV output directories
+    LAYOUTS: Dict[str, Tuple[str, str]] = {
+        "default": (
+            "{title}[ - ({year})]/{title}[ - ({year})][ - {resolution}]",
+            "{show}/[{show} - Season {season}/]{show}[ - {episode_id}][ - {episode_title}][ - {language}][ - {resolution}]",
+        ),
+        "jellyfin": (
+            "{title}[ ({year})]/{title}[ ({year})][ - {resolution}]",
+            "{show}/[Season {season}/]{show}[ - {episode_id}][ - {episode_title}][ - {language}][ - {resolution}]",
+        ),
+    }
+    LAYOUTS["plex"] = LAYOUTS["jellyfin"]
+
+    def __init__(
+        self,
+        name: str = "default",
+        output_dir: str = "streams",
+        movie_output_dir: str = "movies",
+        tvshow_output_dir: str = "tvshows",
+        file_permissions: int = 0o644,
+        dir_permissions: int = 0o755,
+        layout: str = "default",
+        movie_template: Optional[str] = None,
+        tvshow_template: Optional[str] = None,
+    ) -> None:
+        """Initializes OutputTarget object.
+
+        movie_template and tvshow_template override the layout's preset
+        paths (see pathtemplate); ".strm" is appended to the rendered path.
+        """
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"Unknown layout {layout!r} for target {name!r}, expected one of {tuple(self.LAYOUTS)}")
+        self.name: str = name
+        self.output_dir: str = output_dir
+        self.movie_output_dir: str = movie_output_dir
+        self.tvshow_output_dir: str = tvshow_output_dir
+        self.file_permissions: int = file_permissions
+        self.dir_permissions: int = dir_permissions
+        self.layout: str = layout
+        # Precomputed roots, so rendering a path needs no os.path.join per entry
+        self.movie_root: str = os.path.join(output_dir, movie_output_dir, "")
+        self.tvshow_root: str = os.path.join(output_dir, tvshow_output_dir, "")
+        self.movie_template: pathtemplate.PathTemplate = pathtemplate.compile_template(
+            movie_template or self.LAYOUTS[layout][0], self.MOVIE_FIELDS, self.MOVIE_OPTIONAL
+        )
+        self.tvshow_template: pathtemplate.PathTemplate = pathtemplate.compile_template(
+            tvshow_template or self.LAYOUTS[layout][1], self.TVSHOW_FIELDS, self.TVSHOW_OPTIONAL
+        )
+        self.changed_directories: Set[str] = set()  # Directories that received new files this run
+        # Called with a directory before its first new file is created, so a run journal can record it first
+        self.before_change: Optional[Callable[[str], None]] = None
+
+    @classmethod
+    def from_config(cls, config) -> List["OutputTarget"]:
+        """Builds the configured targets, or a single default target from the classic settings."""
+
+        def setting(section: str, option: str, fallback_section: str, fallback: str) -> str:
+            return config.get(
+                section, option, fallback=config.get(fallback_section, option, fallback=fallback)
+            )
+
+        sections: List[str] = [section for section in config.sections() if section.startswith("target.")]
+        if not sections:
+            sections = [""]  # No target sections: only the [paths]/[output_paths] fallbacks apply
+        targets: List[OutputTarget] = []
+        for section in sections:
+            targets.append(
+                cls(
+                    name=section[len("target."):] or "default",
+                    output_dir=setting(section, "output_dir", "paths", "streams"),
+                    movie_output_dir=setting(section, "movie_output_dir", "output_paths", "movies"),
+                    tvshow_output_dir=setting(section, "tvshow_output_dir", "output_paths", "tvshows"),
+                    file_permissions=int(setting(section, "file_permissions", "output_paths", "644"), 8),
+                    dir_permissions=int(setting(section, "dir_permissions", "output_paths", "755"), 8),
+                    layout=setting(section, "layout", "output_paths", "default"),
+                    movie_template=setting(section, "movie_template", "output_paths", "") or None,
+                    tvshow_template=setting(section, "tvshow_template", "output_paths", "") or None,
+                )
+            )
+        return targets
+
+    def willCreate(self, filename: str) -> None:
+        """Announces a file about to be written; the first new file of a directory calls before_change."""
+        directory: str = os.path.dirname(filename)
+        if self.before_change and directory not in self.changed_directories and not os.path.exists(filename):
+            self.before_change(directory)
+
+    def writeStream(self, filename: str, url: str) -> str:
+        """Creates a stream file and its directory with this target's permissions."""
+        directory: str = os.path.dirname(filename)
+
+        tools.makeDirectory(directory)  # Create directory
+        os.chmod(directory, self.dir_permissions)  # Ensure correct permissions
+
+        self.willCreate(filename)
+        if tools.makeStrm(filename, url):
+            self.changed_directories.add(directory)
+        os.chmod(filename, self.file_permissions)  # Set file permissions
+        return filename
+
+
+@functools.lru_cache(maxsize=None)
+def _defaultTarget(
+    output_dir: str, movie_output_dir: str, tvshow_output_dir: str, file_permissions: int, dir_permissions: int
+) -> OutputTarget:
+    """Returns the target for entries built with output arguments instead of a configured target."""
+    return OutputTarget(
+        output_dir=output_dir,
+        movie_output_dir=movie_output_dir,
+        tvshow_output_dir=tvshow_output_dir,
+        file_permissions=file_permissions,
+        dir_permissions=dir_permissions,
+    )
 
 
 class Movie:
@@ -20,58 +163,53 @@ class Movie:
         year: Optional[str] = None,
         resolution: Optional[str] = None,
         language: Optional[str] = None,
+        codec: Optional[str] = None,
         output_dir: str = "streams",
         movie_output_dir: str = "movies",
         tvshow_output_dir: str = "tvshows",
         file_permissions: int = 0o644,
         dir_permissions: int = 0o755,
     ) -> None:
-        """Initializes Movie object."""
+        """Initializes Movie object.
+
+        The output arguments describe the target used when getFilename and
+        makeStream are called without one; it is only built on first use.
+        """
         self.title: str = title.strip()
         self.url: str = url
         self.year: Optional[str] = year
         self.resolution: Optional[str] = resolution
         self.language: Optional[str] = language
-        self.output_dir: str = output_dir
-        self.movie_output_dir: str = movie_output_dir
-        self.tvshow_output_dir: str = tvshow_output_dir
-        self.file_permissions: int = file_permissions
-        self.dir_permissions: int = dir_permissions
+        self.codec: Optional[str] = codec
+        self.fields: Dict[str, Optional[str]] = {  # Template values, shared by every target
+            "title": self.title,
+            "year": year.strip("()") if year else None,
+            "resolution": resolution,
+            "language": language,
+            "codec": codec,
+        }
+        self.output: Tuple[str, str, str, int, int] = (
+            output_dir, movie_output_dir, tvshow_output_dir, file_permissions, dir_permissions
+        )
 
-    def getFilename(self) -> str:
+    @property
+    def target(self) -> OutputTarget:
+        """The target used when none is passed; shared by entries with the same output arguments."""
+        return _defaultTarget(*self.output)
+
+    def getFilename(self, target: Optional[OutputTarget] = None) -> str:
         """Getter to get the filename for the stream file.
 
         Returns:
             str: Fully constructed filename for the stream file.
         """
-        filestring: list[str] = [tools.sanitize_filename(self.title)]
-        if self.year:
-            if not self.year.startswith("("):  # Correctly format year
-                self.year: str = f"({self.year})"
-            filestring.append(self.year)
-
-        if self.resolution:
-            filestring.append(self.resolution)
-
-        # Build the full path using os.path.join
-        return os.path.join(
-            self.output_dir,
-            self.movie_output_dir,
-            f"{tools.sanitize_filename(self.title)}{' - ' + self.year if self.year else ''}",
-            f"{' - '.join(filestring)}.strm",
-        )
+        target = target or self.target
+        return target.movie_root + target.movie_template.render(self.fields) + ".strm"
 
-    def makeStream(self) -> str:
+    def makeStream(self, target: Optional[OutputTarget] = None) -> str:
         """Creates the stream file."""
-        filename: str = self.getFilename()
-        directory: str = os.path.dirname(filename)  # Get the directory part
-
-        tools.makeDirectory(directory)  # Create directory with permissions
-        os.chmod(directory, self.dir_permissions)  # Ensure correct permissions
-
-        tools.makeStrm(filename, self.url)
-        os.chmod(filename, self.file_permissions)  # Set file permissions
-        return filename
+        target = target or self.target
+        return target.writeStream(self.getFilename(target), self.url)
 
 
 class TVEpisode:
@@ -87,95 +225,281 @@ class TVEpisode:
         language: Optional[str] = None,
         episodename: Optional[str] = None,
         airdate: Optional[str] = None,
+        codec: Optional[str] = None,
         output_dir: str = "streams",
         movie_output_dir: str = "movies",
         tvshow_output_dir: str = "tvshows",
         file_permissions: int = 0o644,
         dir_permissions: int = 0o755,
     ) -> None:
-        """Initializes TVEpisode object."""
+        """Initializes TVEpisode object.
+
+        The output arguments describe the target used when getFilename and
+        makeStream are called without one; it is only built on first use.
+        """
         self.showtitle: str = showtitle
-        self.episodenumber: Optional[str] = episodenumber
         self.seasonnumber: Optional[str] = seasonnumber
-        self.episodenumber: Optional[str] = episodenumber  # Corrected typo here, was reassigned
+        self.episodenumber: Optional[str] = episodenumber
         self.url: str = url
         self.resolution: Optional[str] = resolution
         self.language: Optional[str] = language
         self.episodename: Optional[str] = episodename
         self.airdate: Optional[str] = airdate
+        self.codec: Optional[str] = codec
         self.sXXeXX: str = f"S{self.seasonnumber}E{self.episodenumber}"
-        self.output_dir: str = output_dir
-        self.movie_output_dir: str = movie_output_dir
-        self.tvshow_output_dir: str = tvshow_output_dir
-        self.file_permissions: int = file_permissions
-        self.dir_permissions: int = dir_permissions
+        self.fields: Dict[str, Optional[str]] = {  # Template values, shared by every target
+            "show": showtitle,
+            "season": seasonnumber,
+            "episode": episodenumber,
+            "episode_id": airdate or (self.sXXeXX if seasonnumber or episodenumber else None),
+            "episode_title": episodename,
+            "airdate": airdate,
+            "resolution": resolution,
+            "language": language,
+            "codec": codec,
+        }
+        self.output: Tuple[str, str, str, int, int] = (
+            output_dir, movie_output_dir, tvshow_output_dir, file_permissions, dir_permissions
+        )
+
+    @property
+    def target(self) -> OutputTarget:
+        """The target used when none is passed; shared by entries with the same output arguments."""
+        return _defaultTarget(*self.output)
 
-    def getFilename(self) -> str:
+    def getFilename(self, target: Optional[OutputTarget] = None) -> str:
         """Getter to get the filename for the stream file
 
-        :returns: the fully constructed filename with type directory ea. "tvshows/Star Trek the Next Generation - Season 02/Star Trek the Next Generation - S02E07 - The Borgs kill Picard - 1080p.strm"
+        :returns: the fully constructed filename with type directory ea. "tvshows/Star Trek the Next Generation/Star Trek the Next Generation - Season 02/Star Trek the Next Generation - S02E07 - The Borgs kill Picard - 1080p.strm"
         :rtype: str
         """
-        filestring: list[str] = [tools.sanitize_filename(self.showtitle)]
-        if self.airdate:
-            filestring.append(self.airdate.strip())
-        else:
-            filestring.append(self.sXXeXX.strip())
-        if self.episodename:
-            filestring.append(self.episodename.strip())
-        if self.language:
-            filestring.append(self.language.strip())
-        if self.resolution:
-            filestring.append(self.resolution.strip())
-
-        season_dir: str = ""
-        if self.seasonnumber:
-            season_dir = f"{tools.sanitize_filename(self.showtitle)} - Season {self.seasonnumber.strip()}"
-
-        return os.path.join(
-            self.output_dir,
-            self.tvshow_output_dir,
-            tools.sanitize_filename(self.showtitle),
-            season_dir,
-            f"{' - '.join(filestring).replace(':', '-').replace('*', '_')}.strm",  # Corrected f-string formatting
-        )
+        target = target or self.target
+        return target.tvshow_root + target.tvshow_template.render(self.fields) + ".strm"
+
+    def getShowDirectory(self, target: Optional[OutputTarget] = None) -> str:
+        """Getter for the show's directory, where tvshow.nfo lives.
+
+        That is the directory of the rendered template named after the show
+        (``Shows/{show}/...`` gives ``Shows/<show>``), or the episode's
+        directory when the show name is only in the file name.
+        """
+        target = target or self.target
+        return os.path.join(target.tvshow_root, target.tvshow_template.directory_of("show", self.fields))
 
-    def makeStream(self) -> str:
+    def makeStream(self, target: Optional[OutputTarget] = None) -> str:
         """Creates the stream file for TV episodes."""
-        filename: str = self.getFilename()
-        directory: str = os.path.dirname(filename)
+        target = target or self.target
+        return target.writeStream(self.getFilename(target), self.url)
 
-        tools.makeDirectory(directory)  # Create directory
-        os.chmod(directory, self.dir_permissions)  # Ensure correct permissions
 
-        tools.makeStrm(filename, self.url)
-        os.chmod(directory, self.dir_permissions)  # Ensure correct permissions
-        return filename
+class ShowIndex:
+    """Hash index from normalized show key to the canonical show name.
+
+    The first spelling ever seen for a show becomes its canonical name, so
+    every later variant (different case, punctuation, language tags) lands
+    in the same show directory. With a path, names are kept across runs in
+    an append-only file of ``key<TAB>name`` lines, so a reordered playlist
+    or a resumed run keeps using the existing directories.
+    """
+
+    def __init__(self, path: Optional[str] = None, write_suffix: str = "") -> None:
+        """Initializes ShowIndex object.
+
+        Args:
+            path: Index file; None keeps names for this run only.
+            write_suffix: Added to the path new names are appended to.
+                Sharded runs append to one file each and read them all.
+        """
+        self.shows: Dict[str, str] = {}
+        self.path: Optional[str] = path + write_suffix if path else None
+        self._file: Optional[IO[str]] = None
+        if path:
+            directory: str = os.path.dirname(path) or "."
+            prefix: str = os.path.basename(path)
+            names: List[str] = sorted(name for name in os.listdir(directory) if name.startswith(prefix)) \
+                if os.path.isdir(directory) else []
+            for name in names:  # The unsharded file sorts first
+                with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                    for line in f:
+                        key, tab, showname = line.rstrip("\n").partition("\t")
+                        if tab and showname:  # A torn last line has no name
+                            self.shows.setdefault(key, showname)
+
+    def canonical(self, showtitle: str) -> Tuple[str, Optional[str]]:
+        """Resolves a show title to its canonical name.
+
+        Returns:
+            tuple: The canonical show name and any language found in the title.
+        """
+        key, language = tools.showKey(showtitle)
+        if not key:
+            return showtitle.strip(), language
+        name: Optional[str] = self.shows.get(key)
+        if name is None:
+            name = tools.stripTags(showtitle)
+            self.shows[key] = name
+            if self.path:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(f"{key}\t{name.replace(chr(9), ' ')}\n")
+                self._file.flush()
+        return name, language
+
+    def sync(self) -> None:
+        """Forces the names written so far to disk."""
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
 
-class rawStreamList(QObject):  # Inherit from QObject for signals
-    progress_total = pyqtSignal(int)
-    progress_update = pyqtSignal(int)
+class rawStreamList:
+    """Reads an M3U playlist and writes a stream file for every VOD entry.
 
-    def __init__(self, config, log_level: logger.LogLevel) -> None:  # Use logger.LogLevel
-        super().__init__()  # Initialize QObject
-        self.log = logger.Logger(__file__, log_level=log_level)
+    Progress and log output are reported through plain callables so the
+    converter can run headless; the Qt UI adapts them to signals.
+    """
+
+    def __init__(
+        self,
+        config,
+        log_level: logger.LogLevel,
+        progress_total: Optional[Callable[[int], None]] = None,
+        progress_update: Optional[Callable[[int], None]] = None,
+        log_listener: Optional[Callable[[str], None]] = None,
+        result_listener: Optional[Callable[[StreamResult], None]] = None,
+        started_at: Optional[float] = None,
+        resume: bool = False,
+        shard: Optional[Tuple[int, int]] = None,
+        run_id: str = "",
+        warm: Optional[Dict[tuple, Any]] = None,
+    ) -> None:
+        """Converts the configured input right away.
+
+        With `shard` (index, count), only the entries whose identity hashes
+        to that shard are written, under the shard's lease (see shards).
+        `run_id` is shared by all workers of a sharded run and recorded in
+        the shard manifest. A resident caller (see service) passes the same
+        `warm` dict to every run, so the logger, tag matcher, show index and
+        metadata index are built once per distinct config and reused.
+        """
+        self.warm: Optional[Dict[tuple, Any]] = warm
+        if log_listener:  # Listeners belong to this run, so its logger is not shared
+            self.log = logger.Logger(__file__, log_level=log_level)
+            self.log.add_listener(log_listener)
+        else:
+            self.log = self.shared(("log", log_level), lambda: logger.Logger(__file__, log_level=log_level))
+        self.progress_total: Callable[[int], None] = progress_total or (lambda total: None)
+        self.progress_update: Callable[[int], None] = progress_update or (lambda value: None)
+        self.result_listener: Callable[[StreamResult], None] = result_listener or (lambda result: None)
+        self.started_at: float = started_at if started_at is not None else time.perf_counter()
+        self.first_entry_seconds: Optional[float] = None  # Cold-start time to first parsed entry
         self.streams: Dict[str, str] = {}  # Add type hint for streams
-        self.filename: str = config["paths"]["input_m3u"]
-        self.output_dir: str = config.get("paths", "output_dir", fallback="streams")
-        self.movie_output_dir: str = config.get(
-            "output_paths", "movie_output_dir", fallback="movies"
+        self.filename: str = config.get("paths", "input_m3u", fallback="")
+        self.targets: List[OutputTarget] = OutputTarget.from_config(config)
+        self.resume: bool = resume
+        self.shard: Optional[Tuple[int, int]] = shard
+        self.run_id: str = run_id
+        self.shard_suffix: str = f".{shards.shard_name(shard)}" if shard else ""  # For per-shard state files
+        self.lease_ttl: float = config.getfloat("settings", "lease_ttl", fallback=300.0)
+        self.shard_lease: Optional[shards.Lease] = None
+        self.stats: Dict[str, int] = {"movies": 0, "episodes": 0, "other_shards": 0, "live_skipped": 0}
+        self.checkpoint_interval: int = config.getint("settings", "checkpoint_interval", fallback=100)
+        self.max_line_length: int = config.getint("settings", "max_line_length", fallback=65536)
+        self.entry_time_budget: float = config.getfloat("settings", "entry_time_budget", fallback=0.5)
+        self.flagged_entries: List[Tuple[int, str]] = []  # (line number, reason) of skipped or slow entries
+        self.journal_path: str = config.get(
+            "paths",
+            "journal_path",
+            fallback=os.path.join(self.targets[0].output_dir, ".m3u_to_strm.journal"),
+        ) + self.shard_suffix
+        self.journal: Optional[journal.RunJournal] = None
+        self.journaled: Set[Tuple[str, str]] = set()  # (target, directory) already recorded as changed
+        index_path: str = config.get("metadata", "index_path", fallback="")
+        self.metadata = None
+        if index_path:
+            if os.path.exists(index_path):
+                import metadata  # sqlite3 is only loaded when NFO files are written
+
+                self.metadata = self.shared(  # A rebuilt index has a new mtime and is opened afresh
+                    ("metadata", index_path, os.path.getmtime(index_path)), lambda: metadata.MetadataIndex(index_path)
+                )
+            else:
+                self.log.write_to_log(f"Metadata index not found, skipping NFO files: {index_path}")
+        show_index_path: str = config.get(
+            "paths", "show_index_path", fallback=os.path.join(self.targets[0].output_dir, ".m3u_to_strm.shows")
         )
-        self.tvshow_output_dir: str = config.get(
-            "output_paths", "tvshow_output_dir", fallback="tvshows"
+        self.show_index: ShowIndex = self.shared(
+            ("shows", os.path.abspath(show_index_path), self.shard_suffix),
+            lambda: ShowIndex(show_index_path, self.shard_suffix),
         )
-        file_permissions_str: str = config.get("output_paths", "file_permissions", fallback="644")
-        dir_permissions_str: str = config.get("output_paths", "dir_permissions", fallback="755")
-        self.file_permissions: int = int(file_permissions_str, 8)  # Convert to octal
-        self.dir_permissions: int = int(dir_permissions_str, 8)  # Convert to octal
+        self.tag_matcher: tagmatcher.TagMatcher = self.shared(
+            ("tags",) + tuple(
+                (section, tuple(config.items(section))) for section in config.sections() if section.startswith("tags.")
+            ),
+            lambda: tagmatcher.TagMatcher.from_config(config),
+        )
+        self.media_servers: list = []
+        if any(section.startswith("refresh.") for section in config.sections()):
+            import refresh  # urllib.request and ssl are only loaded when a media server is configured
+
+            self.media_servers = refresh.MediaServer.from_config(config)
+        self.live = None
+        if config.get("live", "output_m3u", fallback=""):
+            import live  # ElementTree is only loaded when live output is configured
+
+            self.live = live.LiveWriter.from_config(config)
+        self.write_live: bool = not shard or shard[0] == 0  # One shard writes the single live M3U
+        self.xmltv_input: str = config.get("live", "xmltv_input", fallback="")
+        self.xmltv_output: str = config.get("live", "xmltv_output", fallback="")
+        self.dead_urls: Dict[str, str] = {}  # URL -> reason, filled by probeUrls
+        self.probe_action: str = config.get("probe", "action", fallback="skip")
+        self.probe_report_path: str = config.get("probe", "report_path", fallback="")
+        self.prober = None
+        self.probe_cache = None
+        if config.getboolean("probe", "enabled", fallback=False):
+            import probe  # asyncio and ssl are only loaded when probing is enabled
+
+            self.prober = probe.UrlProber.from_config(config)
+            self.probe_cache = probe.ProbeCache(
+                config.get(
+                    "probe",
+                    "cache_path",
+                    fallback=os.path.join(self.targets[0].output_dir, ".m3u_to_strm.probe.json"),
+                ),
+                config.getfloat("probe", "ttl_hours", fallback=24.0) * 3600,
+            )
+        self.artwork = None
+        self.artwork_filenames: List[str] = [
+            name.strip() for name in config.get("artwork", "filenames", fallback="poster.jpg, folder.jpg").split(",")
+            if name.strip()
+        ]
+        self.artwork_jobs: Dict[str, Tuple[str, OutputTarget]] = {}  # Directory -> (logo URL, target)
+        if config.getboolean("artwork", "enabled", fallback=False):
+            import artwork  # asyncio and ssl are only loaded when artwork is enabled
+
+            self.artwork = artwork.ArtworkFetcher.from_config(
+                config, os.path.join(self.targets[0].output_dir, ".m3u_to_strm.artwork"), self.shard_suffix
+            )
+        self.xtream = None
+        if config.get("xtream", "url", fallback=""):
+            import xtream  # asyncio and ssl are only loaded for Xtream providers
+
+            self.xtream = xtream.XtreamClient.from_config(
+                config, os.path.join(self.targets[0].output_dir, ".m3u_to_strm.xtream.json"), self.shard_suffix
+            )
         self.lines: List[str] = []  # Initialize lines as an empty list
-        self.read_lines()
-        self.parse_line()
+        if self.shard:
+            self.runShard()
+        elif self.xtream:
+            self.parseXtream()
+        else:
+            self.read_lines()
+            self.parse_line()
 
     def delete_downloaded_m3u(self) -> None:
         """Deletes the downloaded M3U file if it was downloaded from a URL."""
@@ -199,15 +523,18 @@ class rawStreamList(QObject):  # Inherit from QObject for signals
             if self.filename.startswith("http://") or self.filename.startswith(
                 "https://"
             ):
-                response = requests.get(self.filename, timeout=10)  # Add timeout
-                response.raise_for_status()  # Raise an exception for bad status codes
-                self.lines = response.text.splitlines()
+                import requests  # Imported lazily, local playlists never need it
+
+                try:
+                    response = requests.get(self.filename, timeout=10)  # Add timeout
+                    response.raise_for_status()  # Raise an exception for bad status codes
+                except requests.exceptions.RequestException as e:
+                    self.log.write_to_log(f"Error fetching URL: {e}")
+                    response = None
+                self.lines = response.text.splitlines() if response is not None else []
             else:
                 with open(self.filename, "r", encoding="utf8") as f:  # Explicitly open in text mode
                     self.lines = [line.rstrip("\n") for line in f]
-        except requests.exceptions.RequestException as e:
-            self.log.write_to_log(f"Error fetching URL: {e}")
-            self.lines = []  # Set lines to an empty list to avoid further processing
         except FileNotFoundError:
             self.log.write_to_log(f"File not found: {self.filename}")
             self.lines = []  # Set lines to an empty list to avoid further processing
@@ -215,56 +542,428 @@ class rawStreamList(QObject):  # Inherit from QObject for signals
             self.log.write_to_log(f"An unexpected error occurred during read_lines: {e}")
             self.lines = []
 
-        self.progress_total.emit(len(self.lines))  # Emit total lines
+        self.progress_total(len(self.lines))  # Emit total lines
         return len(self.lines)
 
     def parse_line(self) -> Optional[List[str]]:  # Expecting to return a list of filenames
         """Parses each line from the M3U file to create stream files."""
-        linenumber: int = 0
+        linenumber: int = self.startCheckpoint()
+        self.probeUrls(linenumber)
         results: List[str] = []
         numlines: int = len(self.lines)
         while linenumber < numlines:  # Use while loop for clarity
-            thisline: str = self.lines[linenumber]
-            nextline: Optional[str] = self.lines[linenumber + 1] if linenumber + 1 < numlines else None  # Check boundary
-            if not nextline:
-                linenumber += 1
-                continue
+            entry, nextnumber = self.entryAt(linenumber)
+            if entry:
+                result = self.parseEntry(linenumber, *entry)
+                if result:
+                    results.append(result)
+            linenumber = nextnumber
+            self.progress_update(linenumber)  # Emit current line number
+            if self.journal:
+                self.journal.advance(linenumber)
+        if self.flagged_entries:
+            self.log.write_warning(
+                f"{len(self.flagged_entries)} entries were skipped or slow, at lines "
+                f"{', '.join(str(line + 1) for line, _ in self.flagged_entries[:20])}"
+                f"{' ...' if len(self.flagged_entries) > 20 else ''}"
+            )
+        if self.stats["live_skipped"]:
+            self.log.write_warning(
+                f"{self.stats['live_skipped']} live entries were skipped, "
+                "set [live] output_m3u to write them to a live M3U"
+            )
+        self.finishLive()
+        self.fetchArtwork()
+        self.refreshLibraries()
+        self.show_index.close()
+        if self.journal:
+            self.journal.finish()
+        return results
 
-            if re.search("EXTM3U", thisline, re.IGNORECASE):
-                linenumber += 1
-                continue
+    def runShard(self) -> None:
+        """Converts this worker's shard while holding its lease, then writes the shard manifest.
+
+        A lease left by a worker that died expires after lease_ttl, so a
+        replacement worker waits at most that long before taking over.
+        """
+        name: str = shards.shard_name(self.shard)
+        output_root: str = self.targets[0].output_dir
+        self.shard_lease = shards.Lease(shards.lock_path(output_root, name), self.lease_ttl)
+        try:
+            self.shard_lease.acquire(timeout=self.lease_ttl)
+        except TimeoutError as e:
+            self.log.write_warning(f"Not processing {name}, another worker holds it: {e}")
+            return
+        started_at: float = time.time()
+        try:
+            if self.xtream:
+                self.parseXtream()
+            else:
+                self.read_lines()
+                self.parse_line()
+            manifest: str = shards.write_manifest(output_root, self.shard, {
+                "run_id": self.run_id,
+                "source": self.xtream.url if self.xtream else journal.hash_lines(self.lines),
+                "started_at": started_at,
+                "finished_at": time.time(),
+                "stats": {**self.stats, "flagged": len(self.flagged_entries)},
+                "files": sorted(self.streams),
+                "changed": {target.name: sorted(target.changed_directories) for target in self.targets},
+                "roots": {target.name: target.output_dir for target in self.targets},
+            })
+            self.log.write_to_log(f"Shard manifest written: {manifest} ({self.stats})")
+        except shards.LeaseLost as e:
+            self.log.write_warning(f"Stopping {name}, its lease was taken over: {e}")
+        finally:
+            self.shard_lease.release()
+
+    def inShard(self, key: str) -> bool:
+        """Returns True if this run writes the entry with this identity key; always True when not sharded."""
+        if not self.shard:
+            return True
+        if self.shard_lease:
+            self.shard_lease.heartbeat()
+        if shards.shard_of(key, self.shard[1]) == self.shard[0]:
+            return True
+        self.stats["other_shards"] += 1
+        return False
+
+    def parseXtream(self) -> List[str]:
+        """Writes stream files from an Xtream Codes catalog instead of a playlist.
 
-            if thisline.startswith("#") and nextline.startswith("#"):
-                if tools.verifyURL(self.lines[linenumber + 2]):
-                    log_message = f"raw stream found: {linenumber}\\n{'\\n'.join([thisline, nextline])}\\n{self.lines[linenumber + 2]}"
-                    self.log.write_to_log(msg=log_message)
-                    result = self.parseStream(
-                        " ".join([thisline, nextline]), self.lines[linenumber + 2]
+        Movies are written while the VOD list streams in. Episode lists are
+        then fetched for all series at once, skipping series unchanged since
+        the last run, and written with the provider's season and episode
+        numbers rather than numbers parsed from titles.
+        """
+        results: List[str] = []
+        started: float = time.perf_counter()
+        movies: int = 0
+        try:
+            if self.xtream.include_movies:
+                groups: Dict[str, str] = self.xtream.categories("get_vod_categories")
+                for stream in self.xtream.streams("get_vod_streams"):
+                    if stream.get("stream_id") is None or not stream.get("name"):
+                        continue
+                    streaminfo: str = self.xtreamInfo(
+                        stream["name"], stream.get("stream_icon"), groups.get(str(stream.get("category_id")))
+                    )
+                    year: str = str(stream.get("year") or "")
+                    result: Optional[str] = self.parseVodMovie(
+                        streaminfo,
+                        self.xtream.movieUrl(stream),
+                        f"({year})" if len(year) == 4 and year.isdigit() else None,
+                        stream["name"],
                     )
                     if result:
                         results.append(result)
-                    linenumber += 3
-                else:
-                    error_message = f"Error finding raw stream in linenumber: {linenumber}\\n{'\\n'.join(self.lines[linenumber:linenumber + 2])}"
-                    self.log.write_to_log(msg=error_message)
-                    linenumber += 1
-            elif tools.verifyURL(nextline):
-                log_message = f"raw stream found: {linenumber}\\n{'\\n'.join([thisline, nextline])}"
-                self.log.write_to_log(msg=log_message)
-                result = self.parseStream(thisline, nextline)
-                if result:
-                    results.append(result)
-                linenumber += 2
-            else:
-                linenumber += 1  # Increment linenumber even if no stream is found
-            self.progress_update.emit(linenumber)  # Emit current line number
+                    movies += 1
+                self.log.write_to_log(f"Xtream movies: {movies} in {time.perf_counter() - started:.1f}s")
+            if self.xtream.include_series:
+                groups = self.xtream.categories("get_series_categories")
+                series: List[dict] = [  # Only the fields needed later, get_series objects carry plots and cast lists
+                    {
+                        "series_id": show["series_id"],
+                        "name": show["name"],
+                        "last_modified": show.get("last_modified"),
+                        "cover": show.get("cover"),
+                        "group": groups.get(str(show.get("category_id"))),
+                    }
+                    for show in self.xtream.streams("get_series")
+                    if show.get("series_id") is not None and show.get("name")
+                    and self.inShard(tools.showKey(show["name"])[0] or show["name"].strip())
+                ]
+                self.progress_total(movies + len(series))
+                self.progress_update(movies)
+                episodes: Dict[str, List[dict]] = self.xtream.episodes(series)
+                for number, show in enumerate(series, movies + 1):
+                    for episode in episodes.get(str(show["series_id"]), []):
+                        result = self.parseXtreamEpisode(show, episode)
+                        if result:
+                            results.append(result)
+                    self.progress_update(number)
+                self.log.write_to_log(
+                    f"Xtream series: {len(series)} in {time.perf_counter() - started:.1f}s ({self.xtream.stats})"
+                )
+        except (OSError, ValueError) as e:  # urllib errors are OSErrors, malformed JSON is a ValueError
+            self.log.write_to_log(f"Error reading Xtream catalog from {self.xtream.url}: {e}")
+        self.fetchArtwork()
+        self.refreshLibraries()
+        self.show_index.close()
         return results
 
+    def xtreamInfo(self, name: str, logo: Optional[str], group: Optional[str]) -> str:
+        """Builds the #EXTINF line an M3U export would have for an Xtream entry, for tags, groups and artwork."""
+        name = name.replace('"', "'")
+        return f'#EXTINF:-1 tvg-name="{name}" tvg-logo="{logo or ""}" group-title="{group or ""}",{name}'
+
+    def parseXtreamEpisode(self, show: dict, episode: dict) -> Optional[str]:
+        """Creates a TVEpisode from an Xtream series and one of its episodes."""
+        if not (episode["season"].isdigit() and episode["episode"].isdigit()):
+            return None
+        streaminfo: str = self.xtreamInfo(show["name"], show.get("cover"), show.get("group"))
+        tags: Dict[str, str] = tools.matchTags(episode["title"] or show["name"], self.tag_matcher)[1]
+        # Episode titles usually repeat the show and number ("Show - S01E02 - Title"); keep what follows
+        episodename: str = episode["title"]
+        number_match = tools.sxxExxMatch(episodename)
+        if number_match:
+            episodename = episodename[number_match.end():]
+        if episodename and tags:
+            episodename = tools.stripResolution(episodename, self.tag_matcher)
+        episodename = episodename.strip(" -|")
+        showtitle, language = self.show_index.canonical(show["name"])
+        entry = TVEpisode(
+            showtitle=showtitle,
+            url=self.xtream.episodeUrl(episode),
+            seasonnumber=f"{int(episode['season']):02d}",
+            episodenumber=f"{int(episode['episode']):02d}",
+            resolution=tags.get("resolution"),
+            language=language or tags.get("language"),
+            episodename=episodename if episodename and episodename != showtitle else None,
+            codec=tags.get("codec"),
+        )
+        self.log.write_to_log(f"TVEpisode object: {entry.__dict__}")
+        return self.writeEntry(entry, streaminfo)
+
+    def entryAt(self, linenumber: int) -> Tuple[Optional[Tuple[str, str]], int]:
+        """Finds the entry starting at a playlist line.
+
+        An entry is an info line followed by its URL, or two info lines
+        (#EXTINF and #EXTGRP) followed by the URL.
+
+        Returns:
+            tuple: (stream info, URL) or None, and the line number to continue from.
+        """
+        numlines: int = len(self.lines)
+        thisline: str = self.lines[linenumber]
+        nextline: Optional[str] = self.lines[linenumber + 1] if linenumber + 1 < numlines else None  # Check boundary
+        if not nextline or re.search("EXTM3U", thisline, re.IGNORECASE):
+            return None, linenumber + 1
+        if thisline.startswith("#") and nextline.startswith("#"):
+            urlline: str = self.lines[linenumber + 2] if linenumber + 2 < numlines else ""
+            if tools.verifyURL(urlline):
+                log_message = "raw stream found: {}\n{}\n{}\n{}".format(linenumber, thisline, nextline, urlline)
+                self.log.write_to_log(msg=log_message)
+                return (" ".join([thisline, nextline]), urlline), linenumber + 3
+            error_message = "Error finding raw stream in linenumber: {}\n{}".format(
+                linenumber, "\n".join(self.lines[linenumber:linenumber + 2])
+            )
+            self.log.write_to_log(msg=error_message)
+            return None, linenumber + 1
+        if tools.verifyURL(nextline):
+            log_message = "raw stream found: {}\n{}\n{}".format(linenumber, thisline, nextline)
+            self.log.write_to_log(msg=log_message)
+            return (thisline, nextline), linenumber + 2
+        return None, linenumber + 1  # No stream found at this line
+
+    def parseEntry(self, linenumber: int, streaminfo: str, streamURL: str) -> Optional[str]:
+        """Parses one entry, skipping over-long lines and flagging entries that exceed the time budget.
+
+        Title parsing is linear in the line length, so max_line_length also
+        bounds the time a single entry can take.
+        """
+        if self.max_line_length and len(streaminfo) > self.max_line_length:
+            self.flagEntry(linenumber, f"skipped, {len(streaminfo)} characters exceed max_line_length")
+            return None
+        started: float = time.perf_counter()
+        result: Optional[str] = self.parseStream(streaminfo, streamURL)
+        elapsed: float = time.perf_counter() - started
+        if self.entry_time_budget and elapsed > self.entry_time_budget:
+            self.flagEntry(linenumber, f"took {elapsed:.3f}s, over the {self.entry_time_budget}s budget")
+        return result
+
+    def flagEntry(self, linenumber: int, reason: str) -> None:
+        """Records and logs a pathological entry with its position in the playlist."""
+        self.flagged_entries.append((linenumber, reason))
+        self.log.write_warning(f"Entry at line {linenumber + 1} {reason}: {self.lines[linenumber][:120]}")
+
+    def startCheckpoint(self) -> int:
+        """Opens the run journal and returns the line number parsing starts from.
+
+        A resumed run on an unchanged playlist continues after the last
+        committed entry, with the changed directories and artwork jobs of
+        the lines before it restored from the journal; anything else starts
+        from the top. Canonical show names come from the persisted show index.
+        """
+        if self.checkpoint_interval <= 0 or not self.lines:
+            return 0
+        self.journal = journal.RunJournal(
+            self.journal_path, journal.hash_lines(self.lines), self.checkpoint_interval, self.show_index.sync
+        )
+        for target in self.targets:
+            target.before_change = functools.partial(self.journalChange, target)
+        offset: int = self.journal.resume_offset() if self.resume else 0
+        records: List[Tuple[str, ...]] = []
+        if offset:
+            self.log.write_to_log(f"Resuming at line {offset} of {len(self.lines)} from {self.journal_path}")
+            records = self.journal.records()
+            self.restoreRecords(records)
+            self.replayLive(offset)
+        elif self.resume:
+            self.log.write_to_log("No checkpoint for this playlist, starting from the beginning")
+        self.journal.start(offset, records)
+        return offset
+
+    def shared(self, key: tuple, build: Callable[[], Any]) -> Any:
+        """Returns the object kept under key in the warm dict, building it on first use or when there is none."""
+        if self.warm is None:
+            return build()
+        if key not in self.warm:
+            self.warm[key] = build()
+        return self.warm[key]
+
+    def restoreRecords(self, records: List[Tuple[str, ...]]) -> None:
+        """Restores changed directories and artwork jobs journaled by an interrupted run."""
+        targets: Dict[str, OutputTarget] = {target.name: target for target in self.targets}
+        for record in records:
+            if record[0] == "changed" and len(record) == 3 and record[1] in targets:
+                targets[record[1]].changed_directories.add(record[2])
+                self.journaled.add((record[1], record[2]))
+            elif record[0] == "artwork" and len(record) == 4 and record[2] in targets:
+                self.artwork_jobs.setdefault(record[1], (record[3], targets[record[2]]))
+        self.log.write_to_log(f"Restored {len(records)} journal records")
+
+    def journalChange(self, target: OutputTarget, directory: str) -> None:
+        """Records a directory before a target first writes into it, so a resumed run still refreshes it.
+
+        The record is flushed ahead of the file, so a crash between commits
+        cannot leave a new file on disk that the resumed run no longer sees
+        as new.
+        """
+        if self.journal and (target.name, directory) not in self.journaled:
+            self.journaled.add((target.name, directory))
+            self.journal.record("changed", target.name, directory)
+
+    def replayLive(self, offset: int) -> None:
+        """Re-collects live entries before a resume offset.
+
+        Live channels go to a single M3U that is rewritten on every run, so
+        a resumed run has to see them again; no stream files are touched.
+        """
+        if not self.live or not self.write_live:
+            return
+        linenumber: int = 0
+        while linenumber < min(offset, len(self.lines)):
+            entry, linenumber = self.entryAt(linenumber)
+            if entry and self.parse_stream_type(entry[0]) == "live":
+                self.live.add(*entry)
+
+    def finishLive(self) -> None:
+        """Completes the live M3U and filters the XMLTV guide down to its channels."""
+        if not self.live or not self.write_live:
+            return
+        self.live.finish()
+        self.log.write_to_log(f"Live channels written: {self.live.count} to {self.live.path}")
+        if not (self.xmltv_input and self.xmltv_output):
+            return
+        import live  # Already loaded by __init__ when live output is configured
+
+        try:
+            channels, programmes = live.filter_xmltv(self.xmltv_input, self.xmltv_output, self.live.channel_ids)
+        except (OSError, SyntaxError) as e:  # ElementTree.ParseError is a SyntaxError
+            self.log.write_to_log(f"Error filtering XMLTV {self.xmltv_input}: {e}")
+            return
+        self.log.write_to_log(
+            f"XMLTV written: {channels} channels, {programmes} programmes to {self.xmltv_output}"
+        )
+
+    def probeUrls(self, start: int) -> None:
+        """Checks the stream URLs from line `start` on and records the dead ones.
+
+        Results younger than the cache TTL are reused, so only new or expired
+        URLs hit the network. Dead URLs are written to the report file if one
+        is configured.
+        """
+        if not self.prober:
+            return
+        urls: List[str] = [
+            line.strip()
+            for previous, line in zip(self.lines[start:], self.lines[start + 1:])
+            if previous.startswith("#") and not line.startswith("#") and tools.verifyURL(line)
+        ]
+        lease: Optional[shards.Lease] = None
+        if self.shard:  # Shards share the cache: the first to get the lease probes, the others reuse its results
+            import probe
+
+            lease = shards.Lease(shards.lock_path(self.targets[0].output_dir, "probe"), self.lease_ttl)
+            lease.acquire(while_waiting=self.shard_lease.heartbeat if self.shard_lease else None)
+            self.probe_cache = probe.ProbeCache(self.probe_cache.path, self.probe_cache.ttl)
+        try:
+            pending: List[str] = [url for url in dict.fromkeys(urls) if self.probe_cache.get(url) is None]
+            started: float = time.perf_counter()
+            for url, result in self.prober.run(pending).items():
+                self.probe_cache.put(url, result)
+                if not result.alive:
+                    self.dead_urls[url] = result.error or f"HTTP {result.status}"
+            self.probe_cache.save()
+        finally:
+            if lease:
+                lease.release()
+        for url in urls:
+            cached = self.probe_cache.get(url)
+            if cached and not cached.alive:
+                self.dead_urls[url] = f"HTTP {cached.status}"
+        self.log.write_to_log(
+            f"Probed {len(pending)} URLs in {time.perf_counter() - started:.1f}s "
+            f"({len(urls) - len(pending)} cached): {len(self.dead_urls)} dead"
+        )
+        if self.probe_report_path and self.dead_urls:
+            with open(self.probe_report_path, "w", encoding="utf-8") as report:
+                for url, reason in self.dead_urls.items():
+                    report.write(f"{reason}\t{url}\n")
+
+    def fetchArtwork(self) -> None:
+        """Downloads each distinct logo once and places it in the movie and show directories."""
+        if not self.artwork or not self.artwork_jobs:
+            return
+        started: float = time.perf_counter()
+        images: Dict[str, Optional[str]] = self.artwork.run(url for url, _ in self.artwork_jobs.values())
+        placed: int = 0
+        for directory, (url, target) in self.artwork_jobs.items():
+            image: Optional[str] = images.get(url)
+            if not image:
+                continue
+            for name in self.artwork_filenames:
+                if self.artwork.cache.place(image, os.path.join(directory, name)):
+                    placed += 1
+                    target.changed_directories.add(directory)
+        self.log.write_to_log(
+            f"Artwork for {len(self.artwork_jobs)} directories from {len(images)} logos in "
+            f"{time.perf_counter() - started:.1f}s ({self.artwork.stats}), {placed} files placed"
+        )
+
+    def refreshLibraries(self) -> None:
+        """Asks each configured media server to rescan only the directories this run changed."""
+        if self.shard and self.media_servers:
+            self.log.write_to_log("Sharded run: library refresh is left to --merge-shards")
+            return
+        for server in self.media_servers:
+            targets: List[OutputTarget] = [
+                target for target in self.targets if server.targets is None or target.name in server.targets
+            ]
+            directories: Set[str] = set().union(*(target.changed_directories for target in targets))
+            if not directories:
+                self.log.write_to_log(f"Nothing changed for media server {server.name}, no refresh sent")
+                continue
+            try:
+                paths: List[str] = server.notify(directories, [target.output_dir for target in targets])
+            except OSError as e:  # urllib errors are OSErrors
+                self.log.write_to_log(f"Library refresh on {server.name} failed: {e}")
+                continue
+            self.log.write_to_log(
+                f"Library refresh sent to {server.name}: {len(paths)} paths for {len(directories)} changed directories"
+            )
+
     def parse_stream_type(self, streaminfo: str) -> str:
         """Parses the stream type from stream info."""
         self.log.write_to_log(f"Parsing stream type for: {streaminfo}")
         if tools.ufcwweMatch(streaminfo):
             return "live"
+        tvg_type = tools.tvgTypeMatch(streaminfo)
+        if tvg_type and tvg_type.group(1).lower() == "live":
+            return "live"
+        if self.live and self.live.isLiveGroup(streaminfo):
+            return "live"
         if tools.sxxExxMatch(streaminfo) or tools.airDateMatch(streaminfo):  # Combine conditions
             return "vod_tv"
         return "vod_movie"  # Default to vodMovie
@@ -272,23 +971,38 @@ class rawStreamList(QObject):  # Inherit from QObject for signals
     def parseStream(self, streaminfo: str, streamURL: str) -> Optional[str]:
         """Parses a stream and delegates to specific parsers based on stream type."""
         self.log.write_to_log(f"Parsing stream: {streaminfo}, URL: {streamURL}")
+        reason: Optional[str] = self.dead_urls.get(streamURL.strip())
+        if reason:
+            self.log.write_to_log(f"Dead stream URL ({reason}): {streamURL}")
+            if self.probe_action == "skip":
+                return None
         streamtype: str = self.parse_stream_type(streaminfo)
         self.log.write_to_log(f"Stream type: {streamtype}")
         if streamtype == "vod_tv":
-            return self.parseVodTv(streaminfo, streamURL)
-        if streamtype == "vod_movie":
-            return self.parseVodMovie(streaminfo, streamURL)
-        return self.parseLiveStream(streaminfo, streamURL)  # No need for elif, only 3 types
+            result: Optional[str] = self.parseVodTv(streaminfo, streamURL)
+        elif streamtype == "vod_movie":
+            result = self.parseVodMovie(streaminfo, streamURL)
+        else:
+            result = self.parseLiveStream(streaminfo, streamURL)
+        if result and self.first_entry_seconds is None:
+            self.first_entry_seconds = time.perf_counter() - self.started_at
+            self.log.write_to_log(f"Time to first parsed entry: {self.first_entry_seconds:.3f}s")
+        return result
+
+    def parseTags(self, streaminfo: str) -> Dict[str, str]:
+        """Collects normalized release-tag fields (resolution, codec, language, ...) from the entry title."""
+        title_match = tools.infoMatch(streaminfo)
+        return tools.matchTags(title_match.group() if title_match else streaminfo, self.tag_matcher)[1]
 
     def parseVodTv(self, streaminfo: str, streamURL: str) -> Optional[str]:  # Could return None
         """Parses VOD TV stream info and creates a TVEpisode object."""
         self.log.write_to_log(f"Parsing VOD TV: {streaminfo}, URL: {streamURL}")
         title_match = tools.infoMatch(streaminfo)  # More descriptive variable name
         title: Optional[str] = tools.parseMovieInfo(title_match.group()) if title_match else None  # Use ternary and handle None
-        resolution_match = tools.resolutionMatch(streaminfo)  # More descriptive variable name
-        resolution: Optional[str] = tools.parseResolution(resolution_match) if resolution_match else None  # Use ternary and handle None
-        if title and resolution:  # Only strip resolution if both title and resolution are found
-            title = tools.stripResolution(title)
+        tags: Dict[str, str] = self.parseTags(streaminfo)
+        resolution: Optional[str] = tags.get("resolution")
+        if title and tags:  # Only strip tags if any were found
+            title = tools.stripResolution(title, self.tag_matcher)
         episodeinfo: Optional[list[Optional[str]]] = tools.parseEpisode(title) # Add type hint
 
         if episodeinfo and len(episodeinfo) >= 3:  # Check if episodeinfo is valid and has enough elements
@@ -298,6 +1012,10 @@ class rawStreamList(QObject):  # Inherit from QObject for signals
             seasonnumber: Optional[str] = episodeinfo[2] if len(episodeinfo) > 3 else None  # Handle season number
             episodenumber: Optional[str] = episodeinfo[3] if len(episodeinfo) > 3 else None  # Handle episode number
             language: Optional[str] = episodeinfo[4] if len(episodeinfo) > 4 else None  # Handle language
+            if not showtitle or not self.inShard(tools.showKey(showtitle)[0] or showtitle.strip()):
+                return None
+            showtitle, title_language = self.show_index.canonical(showtitle)
+            language = language or title_language or tags.get("language")
 
             episode = TVEpisode(
                 showtitle=showtitle,
@@ -308,43 +1026,53 @@ class rawStreamList(QObject):  # Inherit from QObject for signals
                 seasonnumber=seasonnumber,
                 episodenumber=episodenumber,
                 language=language,
-                output_dir=self.output_dir,
-                movie_output_dir=self.movie_output_dir,
-                tvshow_output_dir=self.tvshow_output_dir,
-                file_permissions=self.file_permissions,
-                dir_permissions=self.dir_permissions,
+                codec=tags.get("codec"),
             )
             self.log.write_to_log(f"TVEpisode object: {episode.__dict__}")
-            filename: str = episode.getFilename() # Add type hint
-            self.log.write_to_log(f"TVEpisode filename: {filename}")
-            created_file = episode.makeStream()
-            self.streams[created_file] = created_file
-            return created_file
+            return self.writeEntry(episode, streaminfo)
 
         return None  # Return None if no file created or parsing fails
 
     def parseLiveStream(
         self, streaminfo: str, streamURL: str
     ) -> Optional[str]:
-        """Parses Live stream info (currently does nothing)."""
+        """Parses Live stream info and adds it to the live M3U when live output is configured."""
         self.log.write_to_log(f"Parsing Live Stream: {streaminfo}, URL: {streamURL}")
+        if not self.live:
+            self.stats["live_skipped"] += 1  # Warned about once, at the end of the run
+        elif self.write_live and self.live.add(streaminfo, streamURL):
+            self.log.write_to_log(f"Live channel added: {streaminfo}")
         return None
 
-    def parseVodMovie(self, streaminfo: str, streamURL: str) -> Optional[str]:  # Could return None
-        """Parses VOD Movie stream info and creates a Movie object."""
+    def parseVodMovie(
+        self, streaminfo: str, streamURL: str, year: Optional[str] = None, name: Optional[str] = None
+    ) -> Optional[str]:  # Could return None
+        """Parses VOD Movie stream info and creates a Movie object.
+
+        A known year and name (from a structured source) win over those
+        found in the #EXTINF line; the name then only loses its tags, year
+        and language, and keeps any commas.
+        """
         self.log.write_to_log(f"Parsing VOD Movie: {streaminfo}, URL: {streamURL}")
-        title: Optional[str] = tools.parseMovieInfo(streaminfo)
-        resolution_match = tools.resolutionMatch(streaminfo)  # More descriptive variable name
-        resolution: Optional[str] = tools.parseResolution(resolution_match) if resolution_match else None  # Use ternary and handle None
+        title: Optional[str] = name.strip() if name is not None else tools.parseMovieInfo(streaminfo)
+        tags: Dict[str, str] = (
+            self.parseTags(streaminfo) if name is None else tools.matchTags(name, self.tag_matcher)[1]
+        )
+        resolution: Optional[str] = tags.get("resolution")
+        if title and tags:  # Only strip tags if any were found
+            title = tools.stripResolution(title, self.tag_matcher)
         year_match = tools.yearMatch(streaminfo)  # More descriptive variable name
-        year: Optional[str] = year_match.group().strip() if year_match else None  # Use ternary and handle None
-        if year and title:  # Only strip year if both year and title are found
+        if year_match and title:  # Only strip year if both year and title are found
             title = tools.stripYear(title)
+        year = year or (year_match.group().strip() if year_match else None)  # Use ternary and handle None
 
         language_match = tools.languageMatch(title)
         language: Optional[str] = language_match.group().strip() if language_match else None
         if language and title:
             title = tools.stripLanguage(title)
+        language = language or tags.get("language")
+        if not self.inShard(tools.normalizeTitle(title or "")):
+            return None
 
         moviestream = Movie(
             title=title,
@@ -352,15 +1080,71 @@ class rawStreamList(QObject):  # Inherit from QObject for signals
             year=year,
             resolution=resolution,
             language=language,
-            output_dir=self.output_dir,
-            movie_output_dir=self.movie_output_dir,
-            tvshow_output_dir=self.tvshow_output_dir,
-            file_permissions=self.file_permissions,
-            dir_permissions=self.dir_permissions,
+            codec=tags.get("codec"),
         )
         self.log.write_to_log(f"Movie object: {moviestream.__dict__}")
-        filename: str = moviestream.getFilename() # Add type hint
-        self.log.write_to_log(f"Movie filename: {filename}")
-        created_file: str = moviestream.makeStream() # Add type hint
-        self.streams[created_file] = created_file
-        return created_file
+        return self.writeEntry(moviestream, streaminfo)
+
+    def writeEntry(self, entry: Union[Movie, TVEpisode], streaminfo: str) -> Optional[str]:
+        """Fans a parsed entry out to every output target.
+
+        Parsing happens once per entry; only path formatting and file I/O
+        repeat per target.
+
+        Returns:
+            str: The filename written for the first target.
+        """
+        created_files: List[str] = []
+        self.stats["movies" if isinstance(entry, Movie) else "episodes"] += 1
+        group_match = tools.tvgGroupMatch(streaminfo)
+        group: Optional[str] = group_match.group(1) if group_match else None
+        for target in self.targets:
+            created_file: str = entry.makeStream(target)
+            self.log.write_to_log(f"{type(entry).__name__} filename ({target.name}): {created_file}")
+            self.streams[created_file] = created_file
+            if isinstance(entry, Movie):
+                nfo_file: Optional[str] = self.writeMetadata(
+                    target, "movie", entry.title, entry.year, os.path.dirname(created_file), streaminfo
+                )
+                self.result_listener(StreamResult(created_file, "movie", entry.title, group, target.name))
+            else:
+                nfo_file = self.writeMetadata(
+                    target, "tvshow", entry.showtitle, None, entry.getShowDirectory(target), streaminfo
+                )
+                self.result_listener(StreamResult(created_file, "tvshow", entry.showtitle, group, target.name))
+            if nfo_file:
+                target.changed_directories.add(os.path.dirname(nfo_file))
+            if self.artwork:
+                logo_match = tools.tvgLogoMatch(streaminfo)
+                if logo_match and logo_match.group(1).strip():
+                    directory: str = (
+                        os.path.dirname(created_file) if isinstance(entry, Movie) else entry.getShowDirectory(target)
+                    )
+                    if directory not in self.artwork_jobs:
+                        self.artwork_jobs[directory] = (logo_match.group(1).strip(), target)
+                        if self.journal:
+                            self.journal.record("artwork", directory, target.name, logo_match.group(1).strip())
+            created_files.append(created_file)
+        return created_files[0] if created_files else None
+
+    def writeMetadata(
+        self, target: OutputTarget, kind: str, title: str, year: Optional[str], directory: str, streaminfo: str
+    ) -> Optional[str]:
+        """Writes movie.nfo/tvshow.nfo with the IMDb ID when a metadata index is configured.
+
+        An ID embedded in the stream info wins over an index lookup.
+        """
+        if self.metadata is None or not title:
+            return None
+        imdb_match = tools.imdbCheck(streaminfo)
+        imdb_id: Optional[str] = imdb_match.group() if imdb_match else self.metadata.lookup(title, year, kind)
+        if not imdb_id:
+            self.log.write_to_log(f"No metadata match for {kind}: {title} {year or ''}")
+            return None
+        import metadata  # Already loaded by __init__ with the index
+
+        target.willCreate(os.path.join(directory, "movie.nfo" if kind == "movie" else "tvshow.nfo"))
+        nfo_file: Optional[str] = metadata.write_nfo(directory, kind, imdb_id, title, year)
+        if nfo_file:
+            self.log.write_to_log(f"NFO written: {nfo_file}")
+        return nfo_file
@@ -0,0 +1,278 @@
+# tagmatcher.py
+"""Dictionary-driven release-tag matching.
+
+All tags are compiled into one Aho-Corasick automaton, so a title is
+scanned once no matter how many tags the dictionary holds. Each tag maps
+to a normalized (field, value) pair such as ("resolution", "1080p").
+
+Tags made only of letters ("HD", "WEB", "MULTI") match case-sensitively,
+like the old hardcoded pattern did, so ordinary words such as "Web" in a
+title are left alone. As they are also plain words in all-caps titles
+("THE FRENCH CONNECTION", "CHARLOTTE'S WEB"), they only count in tag
+positions: in the run of tags that ends the text, inside brackets or
+bars ("[MULTI]", "|HD|"), or set off by ":" or "-" on both sides
+("HD : Title"). Tags containing digits or symbols ("1080p", "x265",
+"H.264") match anywhere, in any case. Every tag must sit on word
+boundaries.
+"""
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+_SEPARATORS: str = " -_:"  # Trimmed next to a removed tag; "|" is kept, it delimits language tags ("|FR|")
+_OPENING: str = "[(|"
+_CLOSING: str = "])|"
+_DELIMITERS: str = "-:"  # Separators that set a word tag off from the title ("HD : Title")
+
+# tag -> (field, normalized value)
+DEFAULT_TAGS: Dict[str, Tuple[str, str]] = {
+    # Historic provider strings, kept with their old meaning
+    "720p WEB x264-XLF": ("resolution", "720p"),
+    "WEB x264-XLF": ("resolution", "480p"),
+    # Resolution
+    "SD": ("resolution", "480p"),
+    "480p": ("resolution", "480p"),
+    "576p": ("resolution", "576p"),
+    "HD": ("resolution", "720p"),
+    "720p": ("resolution", "720p"),
+    "FHD": ("resolution", "1080p"),
+    "1080p": ("resolution", "1080p"),
+    "1080i": ("resolution", "1080p"),
+    "UHD": ("resolution", "2160p"),
+    "4K": ("resolution", "2160p"),
+    "2160p": ("resolution", "2160p"),
+    # Video codec
+    "x264": ("codec", "h264"),
+    "h264": ("codec", "h264"),
+    "H.264": ("codec", "h264"),
+    "AVC": ("codec", "h264"),
+    "x265": ("codec", "hevc"),
+    "h265": ("codec", "hevc"),
+    "H.265": ("codec", "hevc"),
+    "HEVC": ("codec", "hevc"),
+    "AV1": ("codec", "av1"),
+    # Dynamic range
+    "HDR": ("hdr", "hdr"),
+    "HDR10": ("hdr", "hdr10"),
+    "HDR10+": ("hdr", "hdr10+"),
+    "DV": ("hdr", "dv"),
+    "DoVi": ("hdr", "dv"),
+    # Source
+    "WEB": ("source", "web"),
+    "WEB-DL": ("source", "web"),
+    "WEBRip": ("source", "web"),
+    "BluRay": ("source", "bluray"),
+    "BDRip": ("source", "bluray"),
+    "HDTV": ("source", "hdtv"),
+    "DVDRip": ("source", "dvd"),
+    # Audio
+    "AAC": ("audio", "aac"),
+    "AC3": ("audio", "ac3"),
+    "DD5.1": ("audio", "ac3"),
+    "EAC3": ("audio", "eac3"),
+    "DDP5.1": ("audio", "eac3"),
+    "DTS": ("audio", "dts"),
+    "Atmos": ("audio", "atmos"),
+    # Language
+    "MULTI": ("language", "MULTI"),
+    "VOSTFR": ("language", "VOSTFR"),
+    "VOST": ("language", "VOST"),
+    "SUBFRENCH": ("language", "VOSTFR"),
+    "FRENCH": ("language", "FR"),
+    "VFF": ("language", "FR"),
+    "VFQ": ("language", "FR"),
+    "TRUEFRENCH": ("language", "FR"),
+    "GERMAN": ("language", "DE"),
+    "ITA": ("language", "IT"),
+    "SPANISH": ("language", "ES"),
+}
+
+
+class TagHit(NamedTuple):
+    """One tag found in a text."""
+
+    start: int
+    end: int
+    tag: str
+    field: str
+    value: str
+
+
+class TagMatcher:
+    """Finds and strips dictionary tags from titles in a single linear scan."""
+
+    def __init__(self, tags: Dict[str, Tuple[str, str]]) -> None:
+        """Compiles the tag dictionary into an Aho-Corasick automaton."""
+        self.tags: Dict[str, Tuple[str, str]] = dict(tags)
+        self._patterns: List[Tuple[str, bool, str, str]] = []  # (tag, case-sensitive, field, value)
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        for tag, (field, value) in self.tags.items():
+            state: int = 0
+            for char in tag.lower():
+                next_state: Optional[int] = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(len(self._patterns))
+            self._patterns.append((tag, tag.isalpha(), field, value))
+
+        # Breadth-first pass for failure links; outputs are merged along
+        # them so the scan never has to walk the failure chain for output.
+        fail: List[int] = [0] * len(goto)
+        queue: List[int] = list(goto[0].values())
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback: int = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                if fail[next_state] == next_state:
+                    fail[next_state] = 0
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+        self._goto: List[Dict[str, int]] = goto
+        self._fail: List[int] = fail
+        self._outputs: List[List[int]] = outputs
+
+    @classmethod
+    def from_config(cls, config) -> "TagMatcher":
+        """Builds a matcher from DEFAULT_TAGS plus any ``[tags.<field>]`` config sections.
+
+        Each option in such a section is a normalized value mapped to a
+        comma-separated list of tags, e.g. ``[tags.resolution]``
+        ``2160p = 4K, UHD, 2160p``.
+        """
+        tags: Dict[str, Tuple[str, str]] = dict(DEFAULT_TAGS)
+        for section in config.sections():
+            if not section.startswith("tags."):
+                continue
+            field: str = section[len("tags."):]
+            for value, taglist in config.items(section):
+                if field == "language":
+                    value = value.upper()  # Option names come back lower-cased
+                for tag in taglist.split(","):
+                    if tag.strip():
+                        tags[tag.strip()] = (field, value)
+        return cls(tags)
+
+    def find(self, text: str) -> List[TagHit]:
+        """Finds the leftmost-longest, non-overlapping tags in a text."""
+        goto: List[Dict[str, int]] = self._goto
+        fail: List[int] = self._fail
+        outputs: List[List[int]] = self._outputs
+        candidates: List[Tuple[int, int, int]] = []
+        state: int = 0
+        lowered: str = text.lower()
+        length: int = len(text)
+        if len(lowered) != length:  # A few characters lower-case to two ("İ"), keep offsets aligned
+            lowered = "".join(char.lower()[0] for char in text)
+        for index, char in enumerate(lowered):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not outputs[state]:
+                continue
+            end: int = index + 1
+            if end < length and text[end].isalnum():
+                continue
+            for pattern_id in outputs[state]:
+                tag, case_sensitive, _, _ = self._patterns[pattern_id]
+                start: int = end - len(tag)
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if case_sensitive and text[start:end] != tag:
+                    continue
+                candidates.append((start, -end, pattern_id))
+
+        hits: List[TagHit] = []
+        covered: int = 0
+        for start, negative_end, pattern_id in sorted(candidates):
+            if start < covered:
+                continue
+            tag, _, field, value = self._patterns[pattern_id]
+            hits.append(TagHit(start, -negative_end, tag, field, value))
+            covered = -negative_end
+        return [hit for index, hit in enumerate(hits) if not hit.tag.isalpha() or _in_tag_position(text, hits, index)]
+
+    def parse(self, text: str) -> Tuple[str, Dict[str, str]]:
+        """Strips every tag from a text and collects the normalized fields.
+
+        The first tag found for a field wins. Separators right after a tag
+        ("HD : Title") go with it, as do those leading up to tags that end
+        the text ("Title - 1080p"). A bar standing alone next to a tag
+        ("Title | HD", "|HD|") goes too; the bars of a language tag such
+        as "|FR|" are kept. The rest of the text is kept as is.
+
+        Returns:
+            tuple: The text without tags and a dict of field -> value.
+        """
+        hits: List[TagHit] = self.find(text)
+        if not hits:
+            return text.strip(), {}
+        fields: Dict[str, str] = {}
+        pieces: List[str] = []
+        position: int = 0
+        for hit in hits:
+            fields.setdefault(hit.field, hit.value)
+            piece: str = text[position:hit.start]
+            bare: str = piece.rstrip(_SEPARATORS)
+            if bare.endswith("|") and (len(bare) == 1 or bare[-2] in _SEPARATORS):  # Not a group's closing bar
+                piece = bare[:-1] + " "
+            pieces.append(piece)
+            position = hit.end
+            while position < len(text) and text[position] in _SEPARATORS:
+                position += 1
+            if position < len(text) and text[position] == "|" and (
+                position + 1 == len(text) or text[position + 1] in _SEPARATORS
+            ):  # Not a group's opening bar
+                position += 1
+                while position < len(text) and text[position] in _SEPARATORS:
+                    position += 1
+        stripped: str = "".join(pieces)
+        if position == len(text):  # Tags ended the text
+            stripped = stripped.rstrip(_SEPARATORS)
+        return " ".join((stripped + text[position:]).split()), fields
+
+
+def _in_tag_position(text: str, hits: List[TagHit], index: int) -> bool:
+    """Whether a word tag sits where tags go rather than inside the title.
+
+    Separators and neighbouring tags are skipped on both sides; the tag
+    counts if that reaches the end of the text, a pair of brackets or
+    bars, or a ":"/"-" delimiter (or the text's edge) on each side.
+    """
+    position: int = hits[index].start
+    previous: int = index - 1
+    left_delimited: bool = False
+    while position > 0:
+        if previous >= 0 and hits[previous].end == position:
+            position = hits[previous].start
+            previous -= 1
+        elif text[position - 1] in _SEPARATORS:
+            left_delimited = left_delimited or text[position - 1] in _DELIMITERS
+            position -= 1
+        else:
+            break
+    opened: bool = position > 0 and text[position - 1] in _OPENING
+    # A title may still carry the comma that ends the EXTINF attributes (",HD : Title")
+    left_delimited = left_delimited or position == 0 or opened or text[position - 1] == ","
+
+    position = hits[index].end
+    following: int = index + 1
+    right_delimited: bool = False
+    while position < len(text):
+        if following < len(hits) and hits[following].start == position:
+            position = hits[following].end
+            following += 1
+        elif text[position] in _SEPARATORS:
+            right_delimited = right_delimited or text[position] in _DELIMITERS
+            position += 1
+        else:
+            break
+    if position == len(text):  # Part of the tags ending the text
+        return True
+    if opened and text[position] in _CLOSING:
+        return True
+    return left_delimited and (right_delimited or text[position] in _CLOSING)
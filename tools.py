@@ -1,7 +1,10 @@
 # tools.py
 import re
 import os
-from typing import Optional, List, Match
+import unicodedata
+from typing import Dict, Optional, List, Match, Tuple
+
+import tagmatcher
 
 
 # Pre-compile regular expressions
@@ -16,20 +19,24 @@ _COMPILED_REGEX = {
     "tvg_id": re.compile('tvg-ID="(.*?)"', re.IGNORECASE),
     "tvg_logo": re.compile('tvg-logo="(.*?)"', re.IGNORECASE),
     "tvg_group": re.compile('group-title="(.*?)"', re.IGNORECASE),
-    "info": re.compile("[,](?!.*[,])(.*?)$", re.IGNORECASE),
+    "info": re.compile("[,]([^,]*)$"),  # Searched from the last comma, see infoMatch
     "sxx_exx": re.compile(
         "[s][0-9][0-9][e][0-9][0-9]|[0-9][0-9][x][0-9][0-9][ ][-][ ]|[s][0-9][0-9][ ][e][0-9][0-9]|[0-9][0-9][x][0-9][0-9]",
         re.IGNORECASE,
     ),
     "tvg_channel": re.compile('tvg-chno="(.*?)"', re.IGNORECASE),
     "year": re.compile("[(][1-2][0-9][0-9][0-9][)]"),
-    "resolution": re.compile("HD|SD|720p WEB x264-XLF|WEB x264-XLF"),
     "episode": re.compile("[e][0-9][0-9]|[0-9][0-9][x][0-9][0-9]", re.IGNORECASE),
     "season": re.compile("[s][0-9][0-9]", re.IGNORECASE),
-    "imdb": re.compile("[t][t][0-9][0-9][0-9]"),
+    "imdb": re.compile("[t][t][0-9]{7,}"),
     "language": re.compile("[|][A-Z][A-Z][|]", re.IGNORECASE),
+    "non_alnum": re.compile(r"[\W_]+"),
+    "bracket_tag": re.compile(r"\[[^\[\]]*\]"),  # Innermost only: a run of "[" can't rescan the line
 }
 
+# Release tags (resolution, codec, language, ...) are matched by one automaton
+_TAG_MATCHER: tagmatcher.TagMatcher = tagmatcher.TagMatcher(tagmatcher.DEFAULT_TAGS)
+
 
 def verifyURL(line: str) -> bool:
     """Checks if a line contains a URL."""
@@ -78,8 +85,12 @@ def tvgGroupMatch(line: str) -> Optional[Match[str]]:
 
 
 def infoMatch(line: str) -> Optional[Match[str]]:
-    """Matches info."""
-    return _COMPILED_REGEX["info"].search(line)
+    """Matches info: the text after the last comma.
+
+    The search starts at the last comma, so the cost stays linear however
+    many commas the attributes contain.
+    """
+    return _COMPILED_REGEX["info"].search(line, max(line.rfind(","), 0))
 
 
 def getResult(re_match: Match[str]) -> Optional[str]:
@@ -113,9 +124,21 @@ def yearMatch(line: str) -> Optional[Match[str]]:
     return _COMPILED_REGEX["year"].search(line)
 
 
-def resolutionMatch(line: str) -> Optional[Match[str]]:
+def resolutionMatch(
+    line: str, matcher: Optional[tagmatcher.TagMatcher] = None
+) -> Optional[tagmatcher.TagHit]:
     """Matches resolution."""
-    return _COMPILED_REGEX["resolution"].search(line)
+    for hit in (matcher or _TAG_MATCHER).find(line):
+        if hit.field == "resolution":
+            return hit
+    return None
+
+
+def matchTags(
+    line: str, matcher: Optional[tagmatcher.TagMatcher] = None
+) -> Tuple[str, Dict[str, str]]:
+    """Strips release tags from a line and returns it with their normalized fields."""
+    return (matcher or _TAG_MATCHER).parse(line)
 
 
 def episodeMatch(line: str) -> Optional[str]:
@@ -157,6 +180,30 @@ def imdbCheck(line: str) -> Optional[Match[str]]:
     return _COMPILED_REGEX["imdb"].search(line)
 
 
+def normalizeTitle(title: str) -> str:
+    """Normalizes a title for matching: case-folded, accents and punctuation removed."""
+    title = unicodedata.normalize("NFKD", title)
+    title = "".join(char for char in title if not unicodedata.combining(char))
+    title = title.casefold().replace("&", " and ").replace("'", "").replace("\u2019", "")
+    return " ".join(_COMPILED_REGEX["non_alnum"].sub(" ", title).split())
+
+
+def showKey(title: str) -> Tuple[str, Optional[str]]:
+    """Builds the grouping key for a show title and extracts its language tag.
+
+    "|FR| Blindspot ", "Blindspot" and "BLINDSPOT [VOSTFR]" all share the
+    key "blindspot"; the first one also yields the language "FR".
+    """
+    languagematch: Optional[Match[str]] = languageMatch(title)
+    language: Optional[str] = languagematch.group().strip("|").upper() if languagematch else None
+    return normalizeTitle(stripTags(title)), language
+
+
+def stripTags(title: str) -> str:
+    """Strips language tags and [bracketed] tags from a title and tidies whitespace."""
+    return " ".join(stripLanguage(_COMPILED_REGEX["bracket_tag"].sub(" ", title)).split())
+
+
 def parseMovieInfo(info: str) -> str:
     """Parses movie information."""
     if "," in info:
@@ -175,24 +222,24 @@ def parseMovieInfo(info: str) -> str:
     return info.strip()
 
 
-def parseResolution(match: Match[str]) -> Optional[str]:
+def parseResolution(match: tagmatcher.TagHit) -> Optional[str]:
     """Parses resolution."""
-    resolutionmatch: str = match.group().strip()
-    if resolutionmatch == "HD" or resolutionmatch == "720p WEB x264-XLF":
-        return "720p"
-    elif resolutionmatch == "SD" or resolutionmatch == "WEB x264-XLF":
-        return "480p"
-    return None
+    return match.value if match.field == "resolution" else None
 
 
-def makeStrm(filename: str, url: str) -> None:
-    """Creates a .strm file."""
+def makeStrm(filename: str, url: str) -> bool:
+    """Creates a .strm file.
+
+    Returns:
+        bool: True if the file was created, False if it already existed.
+    """
     if not os.path.exists(filename):
         with open(filename, "w+", encoding="utf-8") as streamfile:
             streamfile.write(url)
         print(f"strm file created: {filename}")
-    else:
-        print(f"Strm file already exists: {filename}")
+        return True
+    print(f"Strm file already exists: {filename}")
+    return False
 
 
 def makeDirectory(directory: str) -> None:
@@ -232,11 +279,11 @@ def stripLanguage(title: str) -> str:
     return title.strip()
 
 
-def stripResolution(title: str) -> str:
-    """Strips resolution from title."""
-    resolutionmatch: str = re.sub("HD|SD|720p WEB x264-XLF|WEB x264-XLF", "", title)
-    if resolutionmatch:
-        return resolutionmatch.strip()
+def stripResolution(title: str, matcher: Optional[tagmatcher.TagMatcher] = None) -> str:
+    """Strips resolution and other release tags from title."""
+    strippedtitle: str = matchTags(title, matcher)[0]
+    if strippedtitle:
+        return strippedtitle
     return title.strip()
 
 
@@ -302,3 +349,22 @@ def check_file_exists(file_path: str) -> bool:
     :return: True if the file exists, False otherwise.
     """
     return os.path.exists(file_path)
+
+
+def escapeXml(text: str) -> str:
+    """Escapes &, < and > in XML text.
+
+    Same as xml.sax.saxutils.escape, which is avoided because importing it
+    loads urllib.request and ssl.
+    """
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def quoteXmlAttribute(value: str) -> str:
+    """Escapes and quotes an XML attribute value, like xml.sax.saxutils.quoteattr."""
+    value = escapeXml(value).replace("\n", "&#10;").replace("\r", "&#13;").replace("\t", "&#9;")
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return '"{}"'.format(value.replace('"', "&quot;"))
@@ -1,9 +1,9 @@
 # ui.py
 
 import sys
+import time
 import configparser
 import logger
-import wget  # Import wget here
 import streamClasses
 import tools
 from PyQt6.QtWidgets import (
@@ -16,13 +16,195 @@ from PyQt6.QtWidgets import (
     QLineEdit,
     QPushButton,
     QComboBox,
-    QTextEdit,
+    QPlainTextEdit,
     QFileDialog,
-    QListWidget,
+    QTableView,
+    QHeaderView,
+    QAbstractItemView,
     QProgressBar,
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QObject
-from typing import Optional, Any
+from PyQt6.QtCore import (
+    Qt,
+    pyqtSignal,
+    QObject,
+    QThread,
+    QTimer,
+    QModelIndex,
+    QAbstractTableModel,
+    QSortFilterProxyModel,
+)
+from typing import Optional, Any, List
+
+
+class UISignalEmitter(QObject):
+    """
+    Adapts the UI logger's plain callback to a Qt signal.
+    """
+
+    log_signal = pyqtSignal(str)
+
+
+class ConversionThread(QThread):
+    """
+    Runs the converter off the UI thread.
+
+    Results and log lines are buffered and handed to the UI in batches, and
+    progress is throttled, so a run with hundreds of thousands of entries
+    costs the UI thread a few hundred signal deliveries instead of millions.
+    """
+
+    results_ready = pyqtSignal(list)
+    log_ready = pyqtSignal(list)
+    progress_total = pyqtSignal(int)
+    progress_update = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    BATCH_SIZE: int = 2000
+    BATCH_INTERVAL: float = 0.25  # Seconds between flushes while results trickle in
+
+    def __init__(self, config: configparser.ConfigParser, log_level: logger.LogLevel, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.config: configparser.ConfigParser = config
+        self.log_level: logger.LogLevel = log_level
+        self._results: List[streamClasses.StreamResult] = []
+        self._log_lines: List[str] = []
+        self._last_flush: float = 0.0
+        self._progress_step: int = 1
+        self._next_progress: int = 0
+
+    def run(self) -> None:
+        try:
+            streamClasses.rawStreamList(
+                self.config,
+                self.log_level,
+                progress_total=self._on_total,
+                progress_update=self._on_progress,
+                log_listener=self._on_log,
+                result_listener=self._on_result,
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            self._flush()
+
+    def _on_total(self, total: int) -> None:
+        self._progress_step = max(1, total // 500)
+        self.progress_total.emit(total)
+
+    def _on_progress(self, value: int) -> None:
+        if value >= self._next_progress:
+            self._next_progress = value + self._progress_step
+            self.progress_update.emit(value)
+
+    def _on_log(self, message: str) -> None:
+        self._log_lines.append(message)
+        self._maybe_flush()
+
+    def _on_result(self, result: streamClasses.StreamResult) -> None:
+        self._results.append(result)
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if (
+            len(self._results) >= self.BATCH_SIZE
+            or len(self._log_lines) >= self.BATCH_SIZE
+            or time.monotonic() - self._last_flush >= self.BATCH_INTERVAL
+        ):
+            self._flush()
+
+    def _flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if self._results:
+            self.results_ready.emit(self._results)
+            self._results = []
+        if self._log_lines:
+            self.log_ready.emit(self._log_lines)
+            self._log_lines = []
+
+
+class ResultTableModel(QAbstractTableModel):
+    """
+    Table model over the created stream files.
+
+    Rows are inserted a batch at a time and the view only asks for the
+    cells it paints, so the cost of a row is a tuple and a search key.
+    """
+
+    COLUMNS: tuple = ("Kind", "Show / Title", "Group", "File")
+    KIND_LABELS: dict = {"movie": "Movie", "tvshow": "TV"}
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._rows: List[streamClasses.StreamResult] = []
+        self._search_keys: List[str] = []  # Case-folded "title group" per row
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        row: streamClasses.StreamResult = self._rows[index.row()]
+        column: int = index.column()
+        if column == 0:
+            return self.KIND_LABELS.get(row.kind, row.kind)
+        if column == 1:
+            return row.title
+        if column == 2:
+            return row.group or ""
+        return row.filename
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def append_results(self, results: List[streamClasses.StreamResult]) -> None:
+        """Appends a batch of results with a single row insertion."""
+        if not results:
+            return
+        first: int = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(results) - 1)
+        self._rows.extend(results)
+        self._search_keys.extend(f"{result.title}\n{result.group or ''}".casefold() for result in results)
+        self.endInsertRows()
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._rows = []
+        self._search_keys = []
+        self.endResetModel()
+
+    def kind(self, row: int) -> str:
+        return self._rows[row].kind
+
+    def search_key(self, row: int) -> str:
+        return self._search_keys[row]
+
+
+class ResultFilterProxyModel(QSortFilterProxyModel):
+    """
+    Filters results by kind and by a case-insensitive search over show/title and group.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._kind: Optional[str] = None
+        self._text: str = ""
+
+    def set_filter(self, kind: Optional[str], text: str) -> None:
+        self._kind = kind
+        self._text = text.strip().casefold()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        model: ResultTableModel = self.sourceModel()
+        if self._kind and model.kind(source_row) != self._kind:
+            return False
+        return not self._text or self._text in model.search_key(source_row)
 
 
 class MainWindow(QMainWindow):
@@ -33,6 +215,8 @@ class MainWindow(QMainWindow):
     and initiating the conversion process.
     """
 
+    LOG_LINES: int = 5000
+
     def __init__(self) -> None:
         """Initializes the MainWindow.
 
@@ -102,13 +286,47 @@ class MainWindow(QMainWindow):
         self.main_layout.addWidget(self.process_button)
 
         # --- Output Section ---
-        self.output_text_edit: QTextEdit = QTextEdit()
+        # The log is a ring buffer: only the newest LOG_LINES lines are kept.
+        self.output_text_edit: QPlainTextEdit = QPlainTextEdit()
         self.output_text_edit.setReadOnly(True)
-        self.output_list_widget: QListWidget = QListWidget()
+        self.output_text_edit.setMaximumBlockCount(self.LOG_LINES)
+
+        self.filter_line_edit: QLineEdit = QLineEdit()
+        self.filter_line_edit.setPlaceholderText("Filter by show, title or group")
+        self.kind_filter_combo: QComboBox = QComboBox()
+        self.kind_filter_combo.addItem("All", None)
+        self.kind_filter_combo.addItem("Movies", "movie")
+        self.kind_filter_combo.addItem("TV", "tvshow")
+        self.filter_timer: QTimer = QTimer(self)  # Debounces typing in the filter box
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(200)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter_line_edit.textChanged.connect(self.filter_timer.start)
+        self.kind_filter_combo.currentIndexChanged.connect(self.apply_filter)
+        self.result_count_label: QLabel = QLabel()
+
+        filter_layout: QHBoxLayout = QHBoxLayout()
+        filter_layout.addWidget(self.kind_filter_combo)
+        filter_layout.addWidget(self.filter_line_edit)
+        filter_layout.addWidget(self.result_count_label)
+
+        self.results_model: ResultTableModel = ResultTableModel(self)
+        self.results_proxy: ResultFilterProxyModel = ResultFilterProxyModel(self)
+        self.results_proxy.setSourceModel(self.results_model)
+        self.results_view: QTableView = QTableView()
+        self.results_view.setModel(self.results_proxy)
+        self.results_view.setWordWrap(False)
+        self.results_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.results_view.verticalHeader().hide()
+        # Fixed row heights let the view lay out only the visible rows
+        self.results_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.results_view.verticalHeader().setDefaultSectionSize(self.results_view.fontMetrics().height() + 6)
+        self.results_view.horizontalHeader().setStretchLastSection(True)
 
         output_layout: QVBoxLayout = QVBoxLayout()
         output_layout.addWidget(self.output_text_edit)
-        output_layout.addWidget(self.output_list_widget)
+        output_layout.addLayout(filter_layout)
+        output_layout.addWidget(self.results_view)
 
         # --- Progress Bar ---
         self.progress_bar: QProgressBar = QProgressBar()
@@ -123,12 +341,36 @@ class MainWindow(QMainWindow):
 
         # Load initial configuration
         self.load_config()
+        self.ui_emitter: UISignalEmitter = UISignalEmitter()
+        self.ui_emitter.log_signal.connect(self.log_message_received)
         self.log = logger.Logger(__file__, logger.LogLevel.DEBUG)
-        self.log.ui_emitter.log_signal.connect(self.log_message_received)
+        self.log.add_listener(self.ui_emitter.log_signal.emit)
+        self.conversion_thread: Optional[ConversionThread] = None
+        self.update_result_count()
 
     def log_message_received(self, message: str) -> None:
         """Slot to receive log messages and display them in the UI."""
-        self.output_text_edit.append(message)
+        self.output_text_edit.appendPlainText(message)
+
+    def log_batch_received(self, messages: List[str]) -> None:
+        """Slot to receive a batch of converter log messages."""
+        self.output_text_edit.appendPlainText("\n".join(messages))
+
+    def results_received(self, results: List[streamClasses.StreamResult]) -> None:
+        """Slot to receive a batch of created stream files."""
+        self.results_model.append_results(results)
+        self.update_result_count()
+
+    def apply_filter(self) -> None:
+        """Applies the kind and text filters to the results view."""
+        self.results_proxy.set_filter(self.kind_filter_combo.currentData(), self.filter_line_edit.text())
+        self.update_result_count()
+
+    def update_result_count(self) -> None:
+        """Shows how many results pass the filter."""
+        self.result_count_label.setText(
+            f"{self.results_proxy.rowCount()} / {self.results_model.rowCount()}"
+        )
 
     def set_progress_total(self, total: int) -> None:
         """Sets the maximum value of the progress bar."""
@@ -186,9 +428,12 @@ class MainWindow(QMainWindow):
 
     def process_m3u(self) -> None:
         """Processes the M3U file based on the current UI settings."""
+        if self.conversion_thread and self.conversion_thread.isRunning():
+            return
         self.save_config()
         self.output_text_edit.clear()
-        self.output_list_widget.clear()
+        self.results_model.clear()
+        self.update_result_count()
 
         # Get settings from UI
         input_m3u: str = self.input_line_edit.text()
@@ -197,38 +442,43 @@ class MainWindow(QMainWindow):
 
         # Download the M3U file if it's a URL
         if input_m3u.startswith("http"):
-            self.output_text_edit.append(f"Downloading M3U from {input_m3u}...")
+            self.output_text_edit.appendPlainText(f"Downloading M3U from {input_m3u}...")
             try:
+                import wget  # Imported lazily, local playlists never need it
+
                 local_m3u_path: str = "m3u/downloaded.m3u"  # Temporary local path
                 wget.download(input_m3u, local_m3u_path)
-                self.output_text_edit.append("Download complete.")
+                self.output_text_edit.appendPlainText("Download complete.")
                 input_m3u = local_m3u_path  # Use the local file
             except Exception as e:
-                self.output_text_edit.append(f"Error downloading M3U: {e}")
+                self.output_text_edit.appendPlainText(f"Error downloading M3U: {e}")
                 return
         elif not input_m3u.startswith("/") and not input_m3u.startswith("C:\\"):
             input_m3u = f"m3u/{input_m3u}"
 
         # Check if file exists
         if not tools.check_file_exists(input_m3u):
-            self.output_text_edit.append(f"Error: M3U file not found at {input_m3u}")
+            self.output_text_edit.appendPlainText(f"Error: M3U file not found at {input_m3u}")
             return
 
-        # Process the M3U file
-        try:
-            stream_list: streamClasses.rawStreamList = streamClasses.rawStreamList(self.config, log_level)
-            stream_list.progress_total.connect(self.set_progress_total)
-            stream_list.progress_update.connect(self.update_progress)
-            # Output the created filenames to the UI and list
-            for filename in stream_list.streams.values():
-                if filename:
-                    self.output_list_widget.addItem(filename)
-                    self.output_text_edit.append(f"Created: {filename}")
-
-        except Exception as e:
-            self.output_text_edit.append(f"An error occurred: {e}")
-
-        self.output_text_edit.append("Processing finished.")
+        # Process the M3U file on a worker thread; results arrive in batches
+        self.conversion_thread = ConversionThread(self.config, log_level, self)
+        self.conversion_thread.progress_total.connect(self.set_progress_total)
+        self.conversion_thread.progress_update.connect(self.update_progress)
+        self.conversion_thread.log_ready.connect(self.log_batch_received)
+        self.conversion_thread.results_ready.connect(self.results_received)
+        self.conversion_thread.failed.connect(
+            lambda error: self.output_text_edit.appendPlainText(f"An error occurred: {error}")
+        )
+        self.conversion_thread.finished.connect(self.processing_finished)
+        self.process_button.setEnabled(False)
+        self.conversion_thread.start()
+
+    def processing_finished(self) -> None:
+        """Slot called when the worker thread is done."""
+        self.process_button.setEnabled(True)
+        self.progress_bar.setValue(self.progress_bar.maximum())
+        self.output_text_edit.appendPlainText("Processing finished.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,259 @@
+# xtream.py
+"""Catalog ingestion from an Xtream Codes provider's ``player_api.php``.
+
+The VOD and series lists are streamed and decoded one element at a time,
+so a catalog of several hundred MB never has to be held in memory at once.
+Per-series episode lists (``get_series_info``) are fetched concurrently
+over pooled keep-alive connections. They are cached by the series'
+``last_modified`` value, so later runs only fetch series that changed.
+"""
+import asyncio
+import codecs
+import json
+import os
+import re
+import urllib.parse
+import urllib.request
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import httppool
+
+_CHUNK_SIZE: int = 256 * 1024
+_MAX_ELEMENT: int = 16 * 1024 * 1024  # Larger array elements are treated as corrupt input
+_WHITESPACE = re.compile(r"\s*")
+_SEPARATORS = re.compile(r"[\s,]*")  # Whitespace and commas between array elements
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator:
+    """Yields the elements of a top-level JSON array from chunks of UTF-8 bytes.
+
+    Only the current chunk and the element being decoded are held in memory.
+
+    Raises:
+        ValueError: If the document is not a JSON array, is truncated, or
+            has an element larger than 16 MB.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+    pending: Iterator[bytes] = iter(chunks)
+    buffer: str = ""
+    position: int = 0
+    started: bool = False
+    exhausted: bool = False
+    while True:
+        position = (_SEPARATORS if started else _WHITESPACE).match(buffer, position).end()
+        if position < len(buffer):
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError(f"expected a JSON array, got {buffer[position:position + 80]!r}")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                end = -1  # The element continues in the next chunk (or the input is corrupt)
+            if end != -1 and (end < len(buffer) or exhausted):  # A number at the very end could continue
+                yield value
+                position = end
+                continue
+        if exhausted:
+            raise ValueError("truncated JSON array")
+        if len(buffer) - position > _MAX_ELEMENT:
+            raise ValueError(f"JSON array element larger than {_MAX_ELEMENT} bytes")
+        chunk: Optional[bytes] = next(pending, None)
+        exhausted = chunk is None
+        buffer = buffer[position:] + utf8.decode(chunk or b"", final=exhausted)
+        position = 0
+
+
+def _episode_groups(episodes) -> Iterator[dict]:
+    """Flattens get_series_info episodes: a {season: [episode, ...]} dict, or a list (of lists) on some panels."""
+    groups = episodes.values() if isinstance(episodes, dict) else [episodes] if isinstance(episodes, list) else []
+    for group in groups:
+        for item in group if isinstance(group, list) else [group]:
+            if isinstance(item, list):
+                yield from (episode for episode in item if isinstance(episode, dict))
+            elif isinstance(item, dict):
+                yield item
+
+
+class SeriesCache:
+    """Episode lists per series, persisted as JSON and reused while the series' last_modified is unchanged."""
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._series: Dict[str, dict] = {}  # series_id -> {"last_modified", "episodes"}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._series = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def get(self, series_id: str, last_modified: Optional[str]) -> Optional[List[dict]]:
+        """Returns the cached episodes if the series has not changed since they were fetched.
+
+        With last_modified None, whatever is cached is returned.
+        """
+        entry: Optional[dict] = self._series.get(series_id)
+        if entry and (last_modified is None or (last_modified and entry["last_modified"] == last_modified)):
+            return entry["episodes"]
+        return None
+
+    def put(self, series_id: str, last_modified: str, episodes: List[dict]) -> None:
+        self._series[series_id] = {"last_modified": last_modified, "episodes": episodes}
+
+    def save(self) -> None:
+        directory: str = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path: str = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._series, f)
+        os.replace(temp_path, self.path)
+
+
+class XtreamClient:
+    """Reads movies and series from an Xtream Codes API."""
+
+    def __init__(
+        self,
+        url: str,
+        username: str,
+        password: str,
+        cache: SeriesCache,
+        per_host: int = 4,
+        concurrency: int = 8,
+        timeout: float = 60.0,
+        include_movies: bool = True,
+        include_series: bool = True,
+    ) -> None:
+        """Initializes XtreamClient object.
+
+        Args:
+            url: Provider base URL, e.g. http://provider.example:8080.
+            per_host: Concurrent get_series_info requests (and pooled connections).
+            concurrency: Series in flight in total.
+            timeout: Seconds allowed for each request, or between chunks of a list.
+        """
+        self.url: str = url.rstrip("/")
+        self.username: str = username
+        self.password: str = password
+        self.cache: SeriesCache = cache
+        self.per_host: int = per_host
+        self.concurrency: int = max(1, concurrency)
+        self.timeout: float = timeout
+        self.include_movies: bool = include_movies
+        self.include_series: bool = include_series
+        self.stats: Dict[str, int] = {"fetched": 0, "cached": 0, "failed": 0}
+
+    @classmethod
+    def from_config(cls, config, default_cache_path: str, cache_suffix: str = "") -> "XtreamClient":
+        """Builds a client from the ``[xtream]`` section; sharded runs pass a suffix to keep one cache each."""
+        return cls(
+            url=config.get("xtream", "url"),
+            username=config.get("xtream", "username", fallback=""),
+            password=config.get("xtream", "password", fallback=""),
+            cache=SeriesCache(config.get("xtream", "cache_path", fallback=default_cache_path) + cache_suffix),
+            per_host=config.getint("xtream", "per_host", fallback=4),
+            concurrency=config.getint("xtream", "concurrency", fallback=8),
+            timeout=config.getfloat("xtream", "timeout", fallback=60.0),
+            include_movies=config.getboolean("xtream", "movies", fallback=True),
+            include_series=config.getboolean("xtream", "series", fallback=True),
+        )
+
+    def apiUrl(self, action: str, **params: str) -> str:
+        query: str = urllib.parse.urlencode(
+            {"username": self.username, "password": self.password, "action": action, **params}
+        )
+        return f"{self.url}/player_api.php?{query}"
+
+    def movieUrl(self, stream: dict) -> str:
+        extension: str = stream.get("container_extension") or "mp4"
+        return f"{self.url}/movie/{self.username}/{self.password}/{stream['stream_id']}.{extension}"
+
+    def episodeUrl(self, episode: dict) -> str:
+        return f"{self.url}/series/{self.username}/{self.password}/{episode['id']}.{episode['extension']}"
+
+    def streams(self, action: str) -> Iterator[dict]:
+        """Yields the objects of a list endpoint (get_vod_streams, get_series, ...) as they arrive.
+
+        Raises:
+            OSError: If the request fails (urllib errors are OSErrors).
+            ValueError: If the response is not a JSON array.
+        """
+        with urllib.request.urlopen(self.apiUrl(action), timeout=self.timeout) as response:
+            chunks: Iterator[bytes] = iter(lambda: response.read(_CHUNK_SIZE), b"")
+            for item in iter_json_array(chunks):
+                if isinstance(item, dict):
+                    yield item
+
+    def categories(self, action: str) -> Dict[str, str]:
+        """Returns category_id -> category name for get_vod_categories or get_series_categories."""
+        return {
+            str(category.get("category_id")): category.get("category_name") or ""
+            for category in self.streams(action)
+        }
+
+    def episodes(self, series: Iterable[dict]) -> Dict[str, List[dict]]:
+        """Returns the episodes of each series, from the cache or fetched concurrently, and saves the cache.
+
+        Each series is a get_series object; each episode is a dict with id,
+        season, episode, title and extension. Series that fail to load fall
+        back to their cached episodes, even when stale.
+        """
+        try:
+            return asyncio.run(self.fetch_all(series))
+        finally:
+            self.cache.save()
+
+    async def fetch_all(self, series: Iterable[dict]) -> Dict[str, List[dict]]:
+        results: Dict[str, List[dict]] = {}
+        stale: List[dict] = []
+        for show in series:
+            series_id: str = str(show["series_id"])
+            cached: Optional[List[dict]] = self.cache.get(series_id, str(show.get("last_modified") or ""))
+            if cached is None:
+                stale.append(show)
+            else:
+                results[series_id] = cached
+                self.stats["cached"] += 1
+        pool = httppool.HttpPool(self.per_host, 0.0, self.timeout)
+        try:
+            for show, episodes in await httppool.run_bounded(
+                stale, lambda show: self.fetch(pool, show), self.concurrency
+            ):
+                results[str(show["series_id"])] = episodes
+        finally:
+            pool.close()
+        return results
+
+    async def fetch(self, pool: httppool.HttpPool, show: dict) -> List[dict]:
+        """Fetches one series' episode list and caches it."""
+        series_id: str = str(show["series_id"])
+        try:
+            response: httppool.Response = await pool.request(
+                self.apiUrl("get_series_info", series_id=series_id), "GET", {}, _MAX_ELEMENT
+            )
+            if response.status != 200:
+                raise ValueError(f"HTTP {response.status}")
+            info = json.loads(response.body)
+        except httppool.CONNECTION_ERRORS:  # Includes JSON errors, which are ValueErrors
+            self.stats["failed"] += 1
+            return self.cache.get(series_id, None) or []
+        episodes: List[dict] = [
+            {
+                "id": str(episode["id"]),
+                "season": str(episode.get("season") or ""),
+                "episode": str(episode.get("episode_num") or ""),
+                "title": (episode.get("title") or "").strip(),
+                "extension": episode.get("container_extension") or "mp4",
+            }
+            for episode in _episode_groups(info.get("episodes") if isinstance(info, dict) else None)
+            if episode.get("id") is not None
+        ]
+        self.cache.put(series_id, str(show.get("last_modified") or ""), episodes)
+        self.stats["fetched"] += 1
+        return episodes